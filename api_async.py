@@ -0,0 +1,245 @@
+# api_async.py
+"""Asyncio (ASGI) server exposing the same contract as api_example.py
+
+Run with any ASGI server, e.g.:
+    uvicorn api_async:app --host 0.0.0.0 --port 8000
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from modularized.registry import ModelRegistry
+from modularized.microbatch import MicroBatcher
+from modularized.service import (predict_response, predict_batch_response, admin_authorized,
+                                 models_response, reload_response, shadow_response,
+                                 metrics_text, profile_response, drift_response,
+                                 predict_batch_bulk_response, ndjson_frame_response,
+                                 cache_response)
+from modularized.bulk import JSON, NDJSON, FRAME_TYPES, NdjsonDecoder, negotiate
+from modularized.metrics import record_request
+from modularized.result_cache import ResultCache
+from modularized.config import (USE_MICROBATCHING, ASYNC_MAX_WORKERS, ASYNC_MAX_PENDING,
+                                MODEL_WATCH_INTERVAL, BULK_NDJSON_FRAME_ROWS, USE_RESULT_CACHE)
+
+# Load the fraud model once; new versions are swapped in without a restart
+predictor = ModelRegistry()
+predictor.start_watch(MODEL_WATCH_INTERVAL)
+batcher = MicroBatcher(predictor) if USE_MICROBATCHING else None
+cache = ResultCache() if USE_RESULT_CACHE else None
+
+# CPU-bound scoring runs here so the event loop keeps accepting requests
+executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="fraud-score")
+
+# Requests admitted but not yet answered; beyond ASYNC_MAX_PENDING we shed load
+_pending = 0
+
+
+async def _read_body(receive):
+    parts = []
+    while True:
+        message = await receive()
+        parts.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(parts)
+
+
+async def _send_body(send, body, content_type, status=200):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type.encode()),
+                    (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, payload, status=200):
+    await _send_body(send, json.dumps(payload).encode('utf-8'), JSON, status)
+
+
+def _header(scope, name, default=''):
+    value = dict(scope['headers']).get(name)
+    return value.decode('latin-1') if value is not None else default
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            executor.shutdown(wait=True)
+            if batcher is not None:
+                batcher.stop()
+            predictor.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+_OVERLOADED = {'error': 'Server overloaded, retry later'}
+
+
+def _admit():
+    """Take a pending slot, or return False to shed the request
+
+    Checked before the body is read, so rejected requests cost no memory.
+    """
+    global _pending
+    if _pending >= ASYNC_MAX_PENDING:
+        return False
+    _pending += 1
+    return True
+
+
+def _release():
+    global _pending
+    _pending -= 1
+
+
+async def _score(handler, *args):
+    """Run a scoring handler on the executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, handler, *args)
+
+
+async def _predict_batch_ndjson(receive, send):
+    """Score an NDJSON body frame by frame, sending results while it streams in
+
+    The 200 status goes out first, so failures end the stream with an
+    {"error": ...} line.
+    """
+    start = time.perf_counter()
+    status = 200
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', NDJSON.encode()),
+                        (b'x-fraud-threshold', str(predictor.threshold).encode())],
+        })
+        loop = asyncio.get_running_loop()
+        decoder = NdjsonDecoder(BULK_NDJSON_FRAME_ROWS)
+        offset = 0
+        more_body = True
+        try:
+            while more_body:
+                message = await receive()
+                more_body = message.get('more_body', False)
+                frames = await loop.run_in_executor(executor, decoder.feed, message.get('body', b''))
+                if not more_body:
+                    frames += await loop.run_in_executor(executor, decoder.flush)
+                for df in frames:
+                    body = await loop.run_in_executor(executor, ndjson_frame_response,
+                                                      predictor, df, offset)
+                    await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+                    offset += len(df)
+        except Exception as e:
+            status = 400 if isinstance(e, ValueError) else 500
+            line = json.dumps({'error': str(e), 'transaction_index': offset}) + '\n'
+            await send({'type': 'http.response.body', 'body': line.encode('utf-8'), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        record_request('predict_batch_ndjson', time.perf_counter() - start, status)
+
+
+_ADMIN_ROUTES = {
+    ('GET', '/admin/models'): lambda data: models_response(predictor),
+    ('POST', '/admin/reload'): lambda data: reload_response(predictor, data),
+    ('POST', '/admin/shadow'): lambda data: shadow_response(predictor, data),
+    ('POST', '/admin/profile'): profile_response,
+}
+
+
+async def _admin(route, scope, receive, send):
+    """Model registry endpoints; loading models runs off the event loop"""
+    handler = _ADMIN_ROUTES.get(route)
+    if handler is None:
+        await _send_json(send, {'error': 'Not found'}, 404)
+        return
+    token = dict(scope['headers']).get(b'x-admin-token')
+    if not admin_authorized(token.decode('latin-1') if token is not None else None):
+        await _send_json(send, {'error': 'Forbidden'}, 403)
+        return
+    body = await _read_body(receive)
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        await _send_json(send, {'error': 'Invalid JSON body'}, 400)
+        return
+    loop = asyncio.get_running_loop()
+    response, status = await loop.run_in_executor(None, handler, data)
+    await _send_json(send, response, status)
+
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    route = (scope['method'], scope['path'])
+    if route == ('GET', '/health'):
+        await _send_json(send, {'status': 'healthy'})
+        return
+    if route == ('GET', '/metrics'):
+        await _send_body(send, metrics_text(predictor, cache).encode('utf-8'), 'text/plain; version=0.0.4')
+        return
+    if route == ('GET', '/drift'):
+        loop = asyncio.get_running_loop()
+        response, status = await loop.run_in_executor(None, drift_response, predictor)
+        await _send_json(send, response, status)
+        return
+    if route == ('GET', '/microbatch_stats'):
+        await _send_json(send, {'enabled': True, **batcher.stats()} if batcher is not None
+                         else {'enabled': False})
+        return
+    if route == ('GET', '/cache_stats'):
+        response, status = cache_response(cache)
+        await _send_json(send, response, status)
+        return
+    if route[1].startswith('/admin/'):
+        await _admin(route, scope, receive, send)
+        return
+    if route not in (('POST', '/predict'), ('POST', '/predict_batch')):
+        await _send_json(send, {'error': 'Not found'}, 404)
+        return
+
+    if not _admit():
+        await _send_json(send, _OVERLOADED, 429)
+        return
+    try:
+        await _predict_route(route, scope, receive, send)
+    finally:
+        _release()
+
+
+async def _predict_route(route, scope, receive, send):
+    """/predict and /predict_batch, once admitted"""
+    content_type = _header(scope, b'content-type', JSON).split(';')[0].strip().lower()
+    if route[1] == '/predict_batch' and content_type == NDJSON:
+        await _predict_batch_ndjson(receive, send)
+        return
+    if route[1] == '/predict_batch' and content_type in FRAME_TYPES:
+        output_type = negotiate(content_type, _header(scope, b'accept'))
+        response, status = await _score(predict_batch_bulk_response, predictor,
+                                        await _read_body(receive), content_type, output_type)
+        if isinstance(response, bytes):
+            await _send_body(send, response, output_type, status)
+        else:
+            await _send_json(send, response, status)
+        return
+
+    try:
+        data = json.loads(await _read_body(receive))
+    except ValueError:
+        await _send_json(send, {'error': 'Invalid JSON body'}, 400)
+        return
+
+    if route[1] == '/predict':
+        response, status = await _score(predict_response, predictor, data, batcher, cache)
+    else:
+        response, status = await _score(predict_batch_response, predictor, data)
+    await _send_json(send, response, status)
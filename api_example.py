@@ -1,114 +1,123 @@
 # api_example.py
-from flask import Flask, request, jsonify
-from modularized.inference import FraudPredictor
-import pandas as pd
-from datetime import datetime
+import atexit
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+from modularized.registry import ModelRegistry
+from modularized.microbatch import MicroBatcher
+from modularized.service import (predict_response, predict_batch_response, admin_authorized,
+                                 models_response, reload_response, shadow_response,
+                                 metrics_text, profile_response, drift_response,
+                                 predict_batch_bulk_response, predict_batch_stream,
+                                 cache_response)
+from modularized.bulk import NDJSON, FRAME_TYPES, negotiate
+from modularized.result_cache import ResultCache
+from modularized.config import (USE_MICROBATCHING, MODEL_WATCH_INTERVAL, BULK_READ_BYTES,
+                                USE_RESULT_CACHE)
 
 app = Flask(__name__)
 
-# Initialize the fraud predictor once when the server starts
-predictor = FraudPredictor()
+# Load the fraud model once; new versions are swapped in without a restart
+predictor = ModelRegistry()
+predictor.start_watch(MODEL_WATCH_INTERVAL)
+
+# Optionally coalesce concurrent /predict requests into batches
+batcher = MicroBatcher(predictor) if USE_MICROBATCHING else None
+
+# Answer retried /predict requests from memory
+cache = ResultCache() if USE_RESULT_CACHE else None
+
+# Stop the watcher and drift monitor threads on shutdown
+atexit.register(predictor.close)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage latency histograms and request counters (Prometheus format)"""
+    return Response(metrics_text(predictor, cache), mimetype='text/plain; version=0.0.4')
+
+@app.route('/drift', methods=['GET'])
+def drift():
+    """PSI/KS of live inputs and scores against the training reference profile"""
+    response, status = drift_response(predictor)
+    return jsonify(response), status
+
+@app.route('/microbatch_stats', methods=['GET'])
+def microbatch_stats():
+    """Achieved micro-batch sizes (only when micro-batching is enabled)"""
+    if batcher is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **batcher.stats()}), 200
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    """Result cache hits, misses, evictions and size"""
+    response, status = cache_response(cache)
+    return jsonify(response), status
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """Predict fraud for a single transaction"""
-    try:
-        # Get transaction data from request
-        transaction = request.json
-        
-        # Validate required fields
-        required_fields = [
-            'amount', 'old_balance', 'new_balance', 'age', 
-            'category', 'gender', 'transaction_type', 'location'
-        ]
-        
-        missing_fields = [field for field in required_fields if field not in transaction]
-        if missing_fields:
-            return jsonify({
-                'error': f'Missing required fields: {missing_fields}'
-            }), 400
-        
-        # Add timestamp if not provided
-        if 'timestamp' not in transaction:
-            transaction['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Add default values for optional fields
-        if 'customer_id' not in transaction:
-            transaction['customer_id'] = 'UNKNOWN'
-        if 'merchant' not in transaction:
-            transaction['merchant'] = 'UNKNOWN'
-        
-        # Make prediction
-        prediction, probability = predictor.predict_single(transaction)
-        
-        # Prepare response
-        response = {
-            'is_fraud': bool(prediction),
-            'fraud_probability': float(probability),
-            'threshold': float(predictor.threshold),
-            'risk_level': 'HIGH' if probability > 0.8 else 'MEDIUM' if probability > 0.5 else 'LOW'
-        }
-        
-        return jsonify(response), 200
-    
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    response, status = predict_response(predictor, request.json, batcher, cache)
+    return jsonify(response), status
 
 @app.route('/predict_batch', methods=['POST'])
 def predict_batch():
-    """Predict fraud for multiple transactions"""
-    try:
-        # Get transactions data from request
-        data = request.json
-        
-        if 'transactions' not in data:
-            return jsonify({'error': 'Missing transactions field'}), 400
-        
-        transactions = data['transactions']
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(transactions)
-        
-        # Add timestamps if not provided
-        if 'timestamp' not in df.columns:
-            df['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Add default values for optional fields
-        if 'customer_id' not in df.columns:
-            df['customer_id'] = 'UNKNOWN'
-        if 'merchant' not in df.columns:
-            df['merchant'] = 'UNKNOWN'
-        
-        # Make predictions
-        predictions = predictor.predict(df)
-        probabilities = predictor.predict(df, return_proba=True)
-        
-        # Prepare response
-        results = []
-        for i, (pred, prob) in enumerate(zip(predictions, probabilities)):
-            results.append({
-                'transaction_index': i,
-                'is_fraud': bool(pred),
-                'fraud_probability': float(prob),
-                'risk_level': 'HIGH' if prob > 0.8 else 'MEDIUM' if prob > 0.5 else 'LOW'
-            })
-        
-        response = {
-            'threshold': float(predictor.threshold),
-            'total_transactions': len(results),
-            'fraud_count': int(sum(predictions)),
-            'results': results
-        }
-        
-        return jsonify(response), 200
-    
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Predict fraud for multiple transactions
+
+    Besides JSON, accepts Arrow IPC streams and .npy structured arrays
+    (answered in the same format unless Accept asks otherwise) and NDJSON,
+    which is scored and answered frame by frame while the body streams in.
+    """
+    content_type = request.mimetype
+    if content_type == NDJSON:
+        chunks = iter(lambda: request.stream.read(BULK_READ_BYTES), b'')
+        return Response(stream_with_context(predict_batch_stream(predictor, chunks)),
+                        mimetype=NDJSON, headers={'X-Fraud-Threshold': str(predictor.threshold)})
+    if content_type in FRAME_TYPES:
+        output_type = negotiate(content_type, request.headers.get('Accept'))
+        response, status = predict_batch_bulk_response(predictor, request.get_data(), content_type,
+                                                       output_type)
+        if isinstance(response, bytes):
+            return Response(response, status=status, mimetype=output_type)
+        return jsonify(response), status
+    response, status = predict_batch_response(predictor, request.json)
+    return jsonify(response), status
+
+@app.route('/admin/models', methods=['GET'])
+def admin_models():
+    """Available models, the active version, reload history and shadow stats"""
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    response, status = models_response(predictor)
+    return jsonify(response), status
+
+@app.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    """Load, canary-validate and swap in a model version"""
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    response, status = reload_response(predictor, request.get_json(silent=True))
+    return jsonify(response), status
+
+@app.route('/admin/shadow', methods=['POST'])
+def admin_shadow():
+    """Start or stop shadow scoring with a candidate model"""
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    response, status = shadow_response(predictor, request.get_json(silent=True))
+    return jsonify(response), status
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_profile():
+    """Toggle the sampling profiler and fetch folded stacks of the scoring path"""
+    if not admin_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Forbidden'}), 403
+    response, status = profile_response(request.get_json(silent=True))
+    return jsonify(response), status
 
 # Example curl commands for testing:
 """
@@ -153,6 +162,43 @@ curl -X POST http://localhost:5000/predict_batch \
       }
     ]
   }'
+
+# Bulk formats: Arrow IPC in and out, or NDJSON streamed both ways:
+curl -X POST http://localhost:5000/predict_batch \
+  -H "Content-Type: application/vnd.apache.arrow.stream" --data-binary @transactions.arrows -o results.arrows
+curl -X POST http://localhost:5000/predict_batch -H "Content-Type: application/x-ndjson" \
+  -T transactions.ndjson
+
+# Swap to a new model version (requires FRAUD_ADMIN_TOKEN to be set):
+curl -X POST http://localhost:5000/admin/reload \
+  -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN" -H "Content-Type: application/json" \
+  -d '{"model_name": "fraud_model", "background": true}'
+
+# Roll back to an older saved version (see "versions" in /admin/models):
+curl -X POST http://localhost:5000/admin/reload \
+  -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN" -H "Content-Type: application/json" \
+  -d '{"model_name": "fraud_model", "version": "20240115T143000.000000Z"}'
+
+# Shadow-score live traffic with a candidate, then inspect the comparison:
+curl -X POST http://localhost:5000/admin/shadow \
+  -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN" -H "Content-Type: application/json" \
+  -d '{"model_name": "fraud_model_candidate"}'
+curl http://localhost:5000/admin/models -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN"
+
+# Result cache counters (retries of the same transaction are cache hits):
+curl http://localhost:5000/cache_stats
+
+# Drift of live inputs and scores vs the training data (PSI > 0.25 is an alert):
+curl http://localhost:5000/drift
+
+# Stage latencies, then a 30 s stack profile of the scoring path:
+curl http://localhost:5000/metrics
+curl -X POST http://localhost:5000/admin/profile \
+  -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN" -H "Content-Type: application/json" \
+  -d '{"enabled": true, "interval_ms": 5, "max_seconds": 30, "reset": true}'
+curl -X POST http://localhost:5000/admin/profile \
+  -H "X-Admin-Token: $FRAUD_ADMIN_TOKEN" -H "Content-Type: application/json" \
+  -d '{"enabled": false}' | python -c "import json,sys; print(json.load(sys.stdin)['folded'])" > scoring.folded
 """
 
 if __name__ == '__main__':
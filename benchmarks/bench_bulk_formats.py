@@ -0,0 +1,131 @@
+# bench_bulk_formats.py
+"""JSON versus Arrow IPC, NumPy .npy and NDJSON bodies for /predict_batch
+
+Trains a small model, then for each batch size encodes the same synthetic
+transactions in every format and reports request/response payload sizes,
+parse time (body -> DataFrame) and end-to-end handler latency (parse,
+score, encode the response) through the service functions both servers
+call. For JSON that includes json.loads and json.dumps, as Flask does. For
+NDJSON, "first ms" is when the first block of results is ready while the
+body is still being consumed in 64 KiB reads. Every format must return the
+same probabilities as the JSON path.
+Usage: python -m benchmarks.bench_bulk_formats --sizes 1000,10000,100000
+"""
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_transactions
+from modularized import bulk
+from modularized.artifact import save_bundle
+from modularized.inference import FraudPredictor
+from modularized.preprocessing import feature_engineering
+from modularized.service import predict_batch_bulk_response, predict_batch_response, predict_batch_stream
+from modularized.training import _build_pipeline
+
+FORMATS = ('json', 'arrow', 'npy', 'ndjson')
+_CONTENT_TYPES = {'arrow': bulk.ARROW, 'npy': bulk.NPY}
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000.0
+
+
+def _json_request(predictor, body):
+    response, _ = predict_batch_response(predictor, json.loads(body))
+    return json.dumps(response).encode('utf-8')
+
+
+def _ndjson_request(predictor, body, read_bytes):
+    """Returns (response bytes, seconds until the first result block)"""
+    start = time.perf_counter()
+    chunks = (body[i:i + read_bytes] for i in range(0, len(body), read_bytes))
+    blocks, first = [], None
+    for block in predict_batch_stream(predictor, chunks):
+        first = first if first is not None else time.perf_counter() - start
+        blocks.append(block)
+    return b''.join(blocks), first
+
+
+def _probabilities(name, response):
+    if name == 'json':
+        return np.array([r['fraud_probability'] for r in json.loads(response)['results']])
+    if name == 'arrow':
+        import pyarrow as pa
+        return pa.ipc.open_stream(response).read_all()['fraud_probability'].to_numpy()
+    if name == 'npy':
+        return np.load(io.BytesIO(response))['fraud_probability']
+    return np.array([json.loads(line)['fraud_probability'] for line in response.splitlines()])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--train-rows', type=int, default=20_000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--read-bytes', type=int, default=1 << 16)
+    args = parser.parse_args()
+
+    train = feature_engineering(generate_transactions(args.train_rows, seed=42))
+    model = _build_pipeline({'n_estimators': 50, 'max_depth': 6}, n_jobs=1).fit(
+        train.drop(columns=['is_fraud']), train['is_fraud'])
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        save_bundle(model.named_steps['preprocessor'], model.named_steps['classifier'], 0.5,
+                    model_dir=model_dir, version='benchmark')
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictor = FraudPredictor(model_dir=model_dir, metrics=None, drift=False)
+        predictor.classifier.set_params(n_jobs=1)
+
+        print(f"{'rows':>7} {'format':<7} {'request KB':>11} {'response KB':>12} "
+              f"{'parse ms':>9} {'total ms':>9} {'first ms':>9}")
+        for size in [int(s) for s in args.sizes.split(',')]:
+            df = generate_transactions(size, seed=size, with_label=False)
+            df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+            repeats = max(1, args.repeats if size < 100_000 else args.repeats // 2)
+            expected = None
+            for name in FORMATS:
+                if name == 'json':
+                    body = json.dumps({'transactions': df.to_dict('records')}).encode('utf-8')
+                    parse = lambda: pd.DataFrame(json.loads(body)['transactions'])
+                    request = lambda: _json_request(predictor, body)
+                elif name == 'ndjson':
+                    body = bulk.encode_frame(df, bulk.NDJSON)
+                    parse = lambda: bulk.NdjsonDecoder(len(df)).feed(body + b'\n')
+                    request = lambda: _ndjson_request(predictor, body, args.read_bytes)[0]
+                else:
+                    content_type = _CONTENT_TYPES[name]
+                    body = bulk.encode_frame(df, content_type)
+                    parse = lambda: bulk.decode_frame(body, content_type)
+                    request = lambda: predict_batch_bulk_response(predictor, body, content_type,
+                                                                  content_type)[0]
+
+                response = request()
+                probabilities = _probabilities(name, response)
+                if expected is None:
+                    expected = probabilities
+                elif np.abs(probabilities - expected).max() > 1e-9:
+                    raise SystemExit(f"{name} returned different probabilities at {size} rows")
+
+                parse_ms = _median_ms(parse, repeats)
+                total_ms = _median_ms(request, repeats)
+                first = (f"{_ndjson_request(predictor, body, args.read_bytes)[1] * 1000:>9.1f}"
+                         if name == 'ndjson' else f"{'-':>9}")
+                print(f"{size:>7} {name:<7} {len(body) / 1024:>11.1f} {len(response) / 1024:>12.1f} "
+                      f"{parse_ms:>9.1f} {total_ms:>9.1f} {first}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# bench_feature_engineering.py
+"""Rows/sec of feature_engineering before and after vectorization
+
+Usage: python -m benchmarks.bench_feature_engineering --sizes 10000,1000000,10000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modularized.preprocessing import feature_engineering
+from benchmarks.synthetic import generate_transactions
+
+# Columns consumed by get_preprocessor()
+PREPROCESSOR_COLUMNS = ['amount', 'old_balance', 'new_balance', 'age', 'hour',
+                        'day_of_week', 'balance_diff', 'amount_to_balance_ratio',
+                        'category', 'gender', 'transaction_type', 'country']
+
+
+def legacy_feature_engineering(df):
+    """Original row-wise implementation, kept for comparison"""
+    df['hour'] = df['timestamp'].dt.hour
+    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['month'] = df['timestamp'].dt.month
+    df['balance_diff'] = df['old_balance'] - df['new_balance']
+    df['overdraft_attempt'] = np.where(df['amount'] > df['old_balance'], 1, 0)
+    df['amount_to_balance_ratio'] = df['amount'] / (df['old_balance'] + 1e-6)
+    df['is_night'] = df['hour'].apply(lambda x: 1 if x < 5 or x > 22 else 0)
+    df['is_high_risk_category'] = df['category'].isin(['electronics', 'travel', 'gaming']).astype(int)
+    df['country'] = df['location'].str.split(',').str[-1].str.strip()
+    return df
+
+
+def _rows_per_sec(func, df, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return len(df) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,1000000,10000000')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy r/s':>14} {'full r/s':>14} {'columns r/s':>14}")
+    for n_rows in [int(s) for s in args.sizes.split(',')]:
+        df = generate_transactions(n_rows, with_label=False)
+        repeats = args.repeats if n_rows <= 1_000_000 else 1
+        legacy = _rows_per_sec(lambda d: legacy_feature_engineering(d.copy()), df, repeats)
+        full = _rows_per_sec(lambda d: feature_engineering(d.copy()), df, repeats)
+        selected = _rows_per_sec(lambda d: feature_engineering(d, columns=PREPROCESSOR_COLUMNS),
+                                 df, repeats)
+        print(f"{n_rows:>10} {legacy:>14,.0f} {full:>14,.0f} {selected:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
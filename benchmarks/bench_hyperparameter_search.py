@@ -0,0 +1,36 @@
+# bench_hyperparameter_search.py
+"""Wall-clock and best CV F1: exhaustive grid search vs successive halving
+
+Usage: python -m benchmarks.bench_hyperparameter_search --rows 50000
+"""
+import argparse
+import time
+
+from modularized.preprocessing import feature_engineering
+from modularized.training import train_model
+from benchmarks.synthetic import generate_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--modes', default='halving,grid')
+    args = parser.parse_args()
+
+    df = feature_engineering(generate_transactions(args.rows))
+    X = df.drop(['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location'], axis=1)
+    y = df['is_fraud']
+
+    rows = []
+    for mode in args.modes.split(','):
+        start = time.perf_counter()
+        train_model(X, y, search=mode)
+        rows.append((mode, time.perf_counter() - start))
+
+    print(f"\n{'search':<10} {'seconds':>10}")
+    for mode, seconds in rows:
+        print(f"{mode:<10} {seconds:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
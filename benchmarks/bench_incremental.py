@@ -0,0 +1,118 @@
+# bench_incremental.py
+"""Warm-start retraining on new data only vs a full retrain on all data
+
+Trains a base model on --base-rows synthetic transactions and saves it as a
+bundle. A batch of --new-rows new transactions then arrives with amounts
+scaled by --shift (which also raises the fraud rate). Compared models:
+  base         the saved model, unchanged
+  full         the training pipeline refit on base + new rows; --search none
+               reuses the base parameters, grid/halving adds the
+               hyperparameter search a production retrain runs
+  incremental  retrain_incremental on the new rows only
+Both retrains include feature engineering, threshold selection on a holdout
+and saving a bundle. Every model is scored on a test set drawn like the new
+data: ROC AUC, PR AUC and precision/recall/F1 at its own threshold.
+Usage: python -m benchmarks.bench_incremental --base-rows 200000 --new-rows 20000
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+from sklearn.metrics import average_precision_score, precision_recall_fscore_support, roc_auc_score
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import load_bundle, save_bundle
+from modularized.incremental import retrain_incremental
+from modularized.preprocessing import feature_engineering
+from modularized.training import (_build_pipeline, find_optimal_threshold, threshold_holdout_split,
+                                  train_model)
+
+BASE_PARAMS = {'n_estimators': 100, 'max_depth': 7, 'learning_rate': 0.1}
+DROP_COLUMNS = ['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location']
+
+
+def _features(raw):
+    df = feature_engineering(raw)
+    return df.drop(columns=DROP_COLUMNS), df['is_fraud']
+
+
+def _train_full(raw, model_dir, search):
+    """Feature engineering, fit, threshold and bundle, as a full retrain does"""
+    X, y = _features(raw)
+    X_fit, X_holdout, y_fit, y_holdout = threshold_holdout_split(X, y)
+    if search == 'none':
+        model = _build_pipeline(BASE_PARAMS).fit(X_fit, y_fit)
+    else:
+        model = train_model(X_fit, y_fit, search=search)
+    threshold = find_optimal_threshold(model, X_holdout, y_holdout)
+    save_bundle(model.named_steps['preprocessor'], model.named_steps['classifier'], threshold,
+                model_dir=model_dir)
+
+
+def _train_incremental(raw, model_dir, extra_rounds, learning_rate):
+    X, y = _features(raw)
+    retrain_incremental(X, y, model_dir=model_dir, activate=True, extra_rounds=extra_rounds,
+                        learning_rate=learning_rate)
+
+
+def _score(model_dir, X_test, y_test):
+    preprocessor, classifier, threshold, _ = load_bundle(model_dir=model_dir)
+    y_proba = classifier.predict_proba(preprocessor.transform(X_test))[:, 1]
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_test, y_proba >= threshold, average='binary', zero_division=0)
+    return {'roc_auc': roc_auc_score(y_test, y_proba),
+            'pr_auc': average_precision_score(y_test, y_proba),
+            'threshold': threshold, 'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-rows', type=int, default=200_000)
+    parser.add_argument('--new-rows', type=int, default=20_000)
+    parser.add_argument('--test-rows', type=int, default=50_000)
+    parser.add_argument('--shift', type=float, default=1.3)
+    parser.add_argument('--search', default='none', choices=['none', 'halving', 'grid'])
+    parser.add_argument('--extra-rounds', type=int, default=30)
+    parser.add_argument('--learning-rate', type=float, default=None)
+    args = parser.parse_args()
+
+    base = generate_transactions(args.base_rows, seed=1)
+    new = generate_transactions(args.new_rows, seed=2, amount_scale=args.shift)
+    X_test, y_test = _features(generate_transactions(args.test_rows, seed=3, amount_scale=args.shift))
+    print(f"Fraud rate: base {base['is_fraud'].mean():.2%}, new {new['is_fraud'].mean():.2%}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as base_dir, tempfile.TemporaryDirectory() as full_dir, \
+            tempfile.TemporaryDirectory() as incremental_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _train_full(base, base_dir, 'none')
+        shutil.copytree(base_dir, incremental_dir, dirs_exist_ok=True)
+        rows.append(('base', None, _score(base_dir, X_test, y_test)))
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _train_full(pd.concat([base, new], ignore_index=True), full_dir, args.search)
+        rows.append((f'full ({args.search})', time.perf_counter() - start,
+                     _score(full_dir, X_test, y_test)))
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _train_incremental(new, incremental_dir, args.extra_rounds, args.learning_rate)
+        rows.append((f'incremental (+{args.extra_rounds})', time.perf_counter() - start,
+                     _score(incremental_dir, X_test, y_test)))
+
+    print(f"\n{'model':<18} {'seconds':>8} {'ROC AUC':>8} {'PR AUC':>7} {'thresh':>7} "
+          f"{'prec':>6} {'recall':>6} {'F1':>6}")
+    for name, seconds, m in rows:
+        elapsed = f"{seconds:>8.1f}" if seconds is not None else f"{'-':>8}"
+        print(f"{name:<18} {elapsed} {m['roc_auc']:>8.4f} {m['pr_auc']:>7.4f} {m['threshold']:>7.3f} "
+              f"{m['precision']:>6.3f} {m['recall']:>6.3f} {m['f1']:>6.3f}")
+
+
+if __name__ == '__main__':
+    main()
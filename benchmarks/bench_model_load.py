@@ -0,0 +1,62 @@
+# bench_model_load.py
+"""Cold-start load time and RSS: joblib files versus the artifact bundle
+
+Each variant is loaded in a fresh interpreter so imports and caches do not
+leak between measurements. Requires both formats in MODEL_DIR (see
+`python -m modularized.artifact` to build a bundle from joblib files).
+Usage: python -m benchmarks.bench_model_load --repeats 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+_LOADERS = {
+    'joblib': (
+        "from modularized.training import load_model_for_inference\n"
+        "load_model_for_inference({model_name!r})\n"
+    ),
+    'bundle': (
+        "from modularized.artifact import load_bundle\n"
+        "load_bundle({model_name!r})\n"
+    ),
+}
+
+_TEMPLATE = """
+import json, resource, time
+import numpy, pandas, sklearn, xgboost
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{loader}
+elapsed = time.perf_counter() - start
+rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'rss_kb': rss_after, 'rss_delta_kb': rss_after - rss_before}}))
+"""
+
+
+def measure(variant, model_name):
+    code = _TEMPLATE.format(loader=_LOADERS[variant].format(model_name=model_name))
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-name', default='fraud_model')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'format':<8} {'load ms (median)':>18} {'RSS MB':>8} {'RSS delta MB':>13}")
+    for variant in _LOADERS:
+        runs = [measure(variant, args.model_name) for _ in range(args.repeats)]
+        seconds = np.median([r['seconds'] for r in runs])
+        rss = np.median([r['rss_kb'] for r in runs]) / 1024
+        delta = np.median([r['rss_delta_kb'] for r in runs]) / 1024
+        print(f"{variant:<8} {seconds * 1000:>18.1f} {rss:>8.1f} {delta:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# bench_out_of_core_memory.py
+"""Peak RSS of out-of-core training as the input file grows
+
+Peak RSS should stay roughly flat across sizes for a fixed chunk size.
+Each size is trained in a fresh interpreter. With --max-growth the run
+exits non-zero when the largest size's peak RSS exceeds the smallest's by
+more than that factor. Growth is not zero: the holdout fills up to
+OOC_MAX_HOLDOUT_ROWS and XGBoost keeps per-row labels, weights and
+predictions in memory next to its on-disk feature pages (about 8 bytes per
+row per such array); a 16x larger file measured 418 -> 538 MB.
+Usage: python -m benchmarks.bench_out_of_core_memory --sizes 250000,500000,1000000,2000000
+       python -m benchmarks.bench_out_of_core_memory --sizes 100000,1600000 --max-growth 1.5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_transactions
+
+_TEMPLATE = """
+import contextlib, io, json, resource, time
+from modularized.out_of_core import train_out_of_core
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    train_out_of_core({path!r}, chunk_size={chunk_size}, num_boost_round={rounds})
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def write_dataset(path, n_rows, block=250_000):
+    """Write a synthetic training CSV block by block"""
+    for i, start in enumerate(range(0, n_rows, block)):
+        df = generate_transactions(min(block, n_rows - start), seed=i)
+        df.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+
+def measure(path, chunk_size, rounds):
+    """Train on path in a fresh interpreter
+
+    Returns:
+        Dictionary with seconds and peak_rss_kb
+    """
+    code = _TEMPLATE.format(path=path, chunk_size=chunk_size, rounds=rounds)
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='250000,500000,1000000,2000000')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--max-growth', type=float, default=None,
+                        help="Fail if peak RSS of the largest size exceeds the smallest's by this factor")
+    args = parser.parse_args()
+
+    peaks = {}
+    print(f"{'rows':>10} {'file MB':>9} {'seconds':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_rows in [int(s) for s in args.sizes.split(',')]:
+            path = os.path.join(tmp_dir, f'train_{n_rows}.csv')
+            write_dataset(path, n_rows)
+            result = measure(path, args.chunk_size, args.rounds)
+            print(f"{n_rows:>10} {os.path.getsize(path) / 2**20:>9.1f} {result['seconds']:>9.1f} "
+                  f"{result['peak_rss_kb'] / 1024:>12.1f}")
+            peaks[n_rows] = result['peak_rss_kb']
+            os.remove(path)
+
+    if args.max_growth is not None:
+        growth = peaks[max(peaks)] / peaks[min(peaks)]
+        print(f"\nPeak RSS growth {min(peaks)} -> {max(peaks)} rows: {growth:.2f}x "
+              f"(limit {args.max_growth:.2f}x)")
+        if growth > args.max_growth:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
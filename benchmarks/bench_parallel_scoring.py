@@ -0,0 +1,37 @@
+# bench_parallel_scoring.py
+"""Batch scoring throughput with 1, 2, 4 and 8 worker processes
+
+Requires a trained model in MODEL_DIR.
+Usage: python -m benchmarks.bench_parallel_scoring --rows 2000000 --workers 1,2,4,8
+"""
+import argparse
+import time
+
+from modularized.batch import score_dataframe
+from benchmarks.synthetic import generate_transactions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', default='1,2,4,8')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--model-name', default='fraud_model')
+    args = parser.parse_args()
+
+    df = generate_transactions(args.rows, with_label=False)
+
+    print(f"{'workers':>8} {'seconds':>10} {'rows/sec':>14} {'speedup':>8}")
+    baseline = None
+    for n_workers in [int(w) for w in args.workers.split(',')]:
+        start = time.perf_counter()
+        score_dataframe(df, n_workers=n_workers, chunk_size=args.chunk_size,
+                        model_name=args.model_name)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{n_workers:>8} {elapsed:>10.2f} {args.rows / elapsed:>14,.0f} "
+              f"{baseline / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
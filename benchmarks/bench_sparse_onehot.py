@@ -0,0 +1,95 @@
+# bench_sparse_onehot.py
+"""Dense versus sparse (CSR) one-hot encoding on high-cardinality categoricals
+
+For each country cardinality, fits get_preprocessor(sparse=...) and a small
+XGBoost model (after SMOTE) on the same synthetic rows, then reports the
+transformed matrix size, training time and batch / single-row scoring time.
+Usage: python -m benchmarks.bench_sparse_onehot --rows 50000 --cardinalities 8,500,5000
+"""
+import argparse
+import time
+
+import numpy as np
+from imblearn.over_sampling import SMOTE
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import generate_transactions
+from modularized.fast_path import CompiledPreprocessor
+from modularized.preprocessing import feature_engineering, get_preprocessor
+
+
+def _nbytes(X):
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def high_cardinality_transactions(n_rows, n_countries, seed=42):
+    """Synthetic transactions whose location spans n_countries countries"""
+    df = generate_transactions(n_rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    # Zipf-like popularity, as real country/location columns have
+    weights = 1.0 / np.arange(1, n_countries + 1)
+    country = rng.choice(n_countries, n_rows, p=weights / weights.sum())
+    df['location'] = np.char.add('City, Country', country.astype(str))
+    return feature_engineering(df)
+
+
+def measure(df, sparse, n_estimators, n_single):
+    preprocessor = get_preprocessor(sparse=sparse)
+
+    start = time.perf_counter()
+    X = preprocessor.fit_transform(df)
+    fit_transform_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_res, y_res = SMOTE(random_state=42).fit_resample(X, df['is_fraud'])
+    classifier = XGBClassifier(n_estimators=n_estimators, max_depth=6, tree_method='hist',
+                               random_state=42).fit(X_res, y_res)
+    train_s = time.perf_counter() - start
+
+    compiled = CompiledPreprocessor.from_preprocessor(preprocessor)
+    booster = classifier.get_booster()
+    start = time.perf_counter()
+    booster.inplace_predict(compiled.transform(df))
+    batch_s = time.perf_counter() - start
+
+    records = df.head(n_single).to_dict('records')
+    start = time.perf_counter()
+    for record in records:
+        booster.inplace_predict(compiled.transform_one(record))
+    single_ms = (time.perf_counter() - start) / len(records) * 1000.0
+
+    return {
+        'n_features': X.shape[1],
+        'matrix_mb': _nbytes(X) / 2**20,
+        'resampled_mb': _nbytes(X_res) / 2**20,
+        'fit_transform_s': fit_transform_s,
+        'train_s': train_s,
+        'batch_s': batch_s,
+        'single_ms': single_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--cardinalities', default='8,500,5000')
+    parser.add_argument('--n-estimators', type=int, default=50)
+    parser.add_argument('--single', type=int, default=500, help="Rows scored one at a time")
+    args = parser.parse_args()
+
+    print(f"{'countries':>9} {'mode':>6} {'features':>9} {'X MB':>8} {'SMOTE X MB':>11} "
+          f"{'fit_tf s':>9} {'train s':>8} {'batch s':>8} {'single ms':>10}")
+    for n_countries in [int(c) for c in args.cardinalities.split(',')]:
+        df = high_cardinality_transactions(args.rows, n_countries)
+        for sparse in (False, True):
+            r = measure(df, sparse, args.n_estimators, args.single)
+            print(f"{n_countries:>9} {'csr' if sparse else 'dense':>6} {r['n_features']:>9} "
+                  f"{r['matrix_mb']:>8.1f} {r['resampled_mb']:>11.1f} {r['fit_transform_s']:>9.3f} "
+                  f"{r['train_s']:>8.2f} {r['batch_s']:>8.3f} {r['single_ms']:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
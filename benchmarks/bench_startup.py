@@ -0,0 +1,63 @@
+# bench_startup.py
+"""Startup report for the scoring path: import time and RSS at ready
+
+Each target runs in a fresh interpreter. Requires a trained model in
+MODEL_DIR; a bundle (see modularized.artifact) gives the fastest start.
+With the default 'xgboost' engine, importing xgboost also loads
+scikit-learn, scipy and joblib (xgboost imports them itself); the numpy
+engine on a bundle avoids all four.
+Usage: python -m benchmarks.bench_startup --repeats 5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+HEAVY_MODULES = ['sklearn', 'imblearn', 'scipy', 'matplotlib', 'seaborn', 'joblib', 'xgboost', 'flask']
+
+_TARGETS = {
+    'import inference': "import modularized.inference",
+    'FraudPredictor ready': "from modularized.inference import FraudPredictor\nFraudPredictor()",
+    'Flask API ready': "import api_example",
+    # Scores from the bundle's compiled trees; xgboost (and through it
+    # scikit-learn, scipy and joblib) is never imported
+    'Flask API, numpy': "import os\nos.environ['FRAUD_INFERENCE_ENGINE'] = 'numpy'\nimport api_example",
+}
+
+_TEMPLATE = """
+import contextlib, io, json, resource, sys, time
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+{code}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'seconds': elapsed, 'rss_kb': rss_kb, 'loaded': loaded}}))
+"""
+
+
+def measure(code):
+    indented = '\n'.join('    ' + line for line in code.splitlines())
+    script = _TEMPLATE.format(code=indented, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'target':<22} {'ms (median)':>12} {'RSS MB':>8}  heavy modules loaded")
+    for name, code in _TARGETS.items():
+        runs = [measure(code) for _ in range(args.repeats)]
+        seconds = np.median([r['seconds'] for r in runs])
+        rss = np.median([r['rss_kb'] for r in runs]) / 1024
+        print(f"{name:<22} {seconds * 1000:>12.1f} {rss:>8.1f}  {', '.join(runs[-1]['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# bench_threshold_search.py
+"""Threshold search runtime versus row count: per-threshold f1_score loop vs single pass
+
+Usage: python -m benchmarks.bench_threshold_search --sizes 10000,100000,1000000
+"""
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+from sklearn.metrics import precision_recall_curve, f1_score
+
+from modularized.training import find_optimal_threshold
+
+
+class _Scores:
+    """Stand-in model returning fixed probabilities"""
+
+    def __init__(self, proba):
+        self.proba = proba
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - self.proba, self.proba])
+
+
+def legacy_find_optimal_threshold(y_true, y_proba, min_precision=0.60, min_recall=0.60):
+    """Original implementation: one f1_score call per candidate threshold"""
+    precision, recall, thresholds = precision_recall_curve(y_true, y_proba)
+    candidates = [(t, f1_score(y_true, y_proba >= t)) for i, t in enumerate(thresholds)
+                  if precision[i] >= min_precision and recall[i] >= min_recall]
+    if candidates:
+        return max(candidates, key=lambda c: c[1])[0]
+    f1_scores = 2 * (precision * recall) / (precision + recall + 1e-9)
+    return thresholds[np.argmax(f1_scores)]
+
+
+def synthetic_scores(n_rows, seed=42, fraud_rate=0.05):
+    rng = np.random.default_rng(seed)
+    y = (rng.uniform(size=n_rows) < fraud_rate).astype(int)
+    proba = np.clip(rng.normal(0.25 + 0.5 * y, 0.15), 0, 1)
+    return y, proba
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--legacy-max-rows', type=int, default=20000,
+                        help="Skip the quadratic legacy search above this size")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy s':>10} {'vectorized s':>13} {'same threshold':>15}")
+    for n_rows in [int(s) for s in args.sizes.split(',')]:
+        y, proba = synthetic_scores(n_rows)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            threshold = find_optimal_threshold(_Scores(proba), None, y)
+        vectorized = time.perf_counter() - start
+
+        if n_rows <= args.legacy_max_rows:
+            start = time.perf_counter()
+            legacy_threshold = legacy_find_optimal_threshold(y, proba)
+            legacy = f"{time.perf_counter() - start:>10.3f}"
+            same = str(np.isclose(legacy_threshold, threshold))
+        else:
+            legacy, same = f"{'skipped':>10}", '-'
+        print(f"{n_rows:>10} {legacy} {vectorized:>13.3f} {same:>15}")
+
+
+if __name__ == '__main__':
+    main()
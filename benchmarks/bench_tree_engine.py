@@ -0,0 +1,71 @@
+# bench_tree_engine.py
+"""NumPy tree-ensemble engine versus XGBoost inplace_predict, batch sizes 1 to 100k
+
+Trains a model on synthetic transactions, checks that both engines agree
+on every scored row (fails if the max probability difference exceeds
+--tolerance) and reports the median per-call latency at each batch size.
+Usage: python -m benchmarks.bench_tree_engine --sizes 1,10,100,1000,10000,100000
+"""
+import argparse
+import time
+
+import numpy as np
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import BoosterClassifier
+from modularized.preprocessing import feature_engineering, get_preprocessor
+from modularized.tree_engine import TreeEngineClassifier
+
+
+def _median_ms(fn, X, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1,10,100,1000,10000,100000')
+    parser.add_argument('--train-rows', type=int, default=50_000)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=7)
+    parser.add_argument('--threads', type=int, default=1, help="XGBoost predictor threads")
+    parser.add_argument('--sparse', action='store_true', help="Use the sparse one-hot path")
+    parser.add_argument('--tolerance', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    train = feature_engineering(generate_transactions(args.train_rows, seed=42))
+    preprocessor = get_preprocessor(sparse=args.sparse)
+    X_train = preprocessor.fit_transform(train)
+    classifier = XGBClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth,
+                               random_state=42).fit(X_train, train['is_fraud'])
+
+    xgb = BoosterClassifier(classifier.get_booster()).set_params(n_jobs=args.threads)
+    engine = TreeEngineClassifier(classifier)
+
+    sizes = [int(s) for s in args.sizes.split(',')]
+    score = feature_engineering(generate_transactions(max(sizes), seed=7, with_label=False))
+    X_all = preprocessor.transform(score)
+
+    print(f"{'rows':>8} {'xgboost ms':>11} {'numpy ms':>10} {'speedup':>8} {'max |diff|':>11}")
+    for size in sizes:
+        X = X_all[:size]
+        expected = xgb.predict_proba(X)[:, 1]
+        actual = engine.predict_proba(X)[:, 1]
+        diff = float(np.abs(expected - actual).max())
+        if diff > args.tolerance:
+            raise SystemExit(f"Parity check failed at {size} rows: max |diff| = {diff:.3g}")
+
+        repeats = max(3, min(200, 20_000 // size))
+        xgb_ms = _median_ms(xgb.predict_proba, X, repeats)
+        engine_ms = _median_ms(engine.predict_proba, X, repeats)
+        print(f"{size:>8} {xgb_ms:>11.3f} {engine_ms:>10.3f} {xgb_ms / engine_ms:>7.2f}x {diff:>11.2e}")
+
+
+if __name__ == '__main__':
+    main()
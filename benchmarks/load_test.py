@@ -0,0 +1,105 @@
+# load_test.py
+"""Closed-loop load test for the scoring servers
+
+Start both servers on the same machine, then compare them, e.g.:
+    python api_example.py                                   # Flask, port 5000
+    uvicorn api_async:app --port 8000 --workers 1           # ASGI
+    python -m benchmarks.load_test --url http://localhost:5000 --url http://localhost:8000
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from benchmarks.synthetic import generate_transactions
+
+
+def _payloads(n, endpoint, batch_size):
+    df = generate_transactions(n * batch_size, with_label=False)
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    records = df.drop(columns='is_fraud', errors='ignore').to_dict('records')
+    if endpoint == '/predict':
+        return [json.dumps(r).encode() for r in records]
+    return [json.dumps({'transactions': records[i:i + batch_size]}).encode()
+            for i in range(0, len(records), batch_size)]
+
+
+def run_load(url, payloads, concurrency, duration):
+    """Hammer url with concurrency closed-loop clients for duration seconds
+
+    Returns:
+        Dictionary with requests/sec, latency percentiles and status counts
+    """
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset):
+        i = offset
+        local_lat, local_status = [], {}
+        while time.perf_counter() < stop_at:
+            request = urllib.request.Request(url, data=payloads[i % len(payloads)],
+                                             headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as resp:
+                    resp.read()
+                    status = resp.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except urllib.error.URLError:
+                status = 'conn_error'
+            local_lat.append(time.perf_counter() - start)
+            local_status[status] = local_status.get(status, 0) + 1
+            i += concurrency
+        with lock:
+            latencies.extend(local_lat)
+            for k, v in local_status.items():
+                statuses[k] = statuses.get(k, 0) + v
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000.0
+    return {
+        'url': url,
+        'requests': len(latencies),
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(lat_ms, 50)) if len(lat_ms) else float('nan'),
+        'p99_ms': float(np.percentile(lat_ms, 99)) if len(lat_ms) else float('nan'),
+        'statuses': statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', action='append', required=True,
+                        help="Server base URL; repeat to compare servers")
+    parser.add_argument('--endpoint', default='/predict', choices=['/predict', '/predict_batch'])
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0)
+    args = parser.parse_args()
+
+    payloads = _payloads(1000, args.endpoint, args.batch_size)
+    print(f"{'server':<32} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}  statuses")
+    for base_url in args.url:
+        result = run_load(base_url.rstrip('/') + args.endpoint, payloads,
+                          args.concurrency, args.duration)
+        print(f"{base_url:<32} {result['requests_per_sec']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p99_ms']:>10.2f}  {result['statuses']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+# suite.py
+"""Reproducible benchmark suite with machine-readable results
+
+`run` trains a small model on synthetic transactions (fixed seeds, fixed
+XGBoost thread count) in a temporary model directory, then measures
+training, threshold search, model load, single-row latency, batch
+throughput and /predict latency through the Flask app. Each measurement is
+repeated and the median is kept. `compare` diffs two result files and
+exits non-zero when any metric regressed by more than the threshold.
+
+Usage:
+    python -m benchmarks.suite run --output base.json
+    (change code)
+    python -m benchmarks.suite run --output head.json
+    python -m benchmarks.suite compare base.json head.json --threshold 0.10
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.synthetic import generate_transactions
+
+RESULTS_FORMAT_VERSION = 1
+
+# Sizes per profile; 'quick' is meant for CI smoke runs
+PROFILES = {
+    'quick': {'train_rows': 5_000, 'n_estimators': 30, 'threshold_rows': 100_000,
+              'single_rows': 300, 'batch_sizes': [100, 10_000], 'api_requests': 200,
+              'load_repeats': 3},
+    'full': {'train_rows': 50_000, 'n_estimators': 100, 'threshold_rows': 1_000_000,
+             'single_rows': 2_000, 'batch_sizes': [100, 10_000, 100_000], 'api_requests': 1_000,
+             'load_repeats': 5},
+}
+
+_API_SCRIPT = """
+import contextlib, io, json, sys, time
+with contextlib.redirect_stdout(io.StringIO()):
+    import api_example
+client = api_example.app.test_client()
+payloads = json.loads(sys.stdin.read())
+latencies = []
+for payload in payloads:
+    start = time.perf_counter()
+    response = client.post('/predict', json=payload)
+    latencies.append(time.perf_counter() - start)
+    assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps(latencies))
+"""
+
+
+def _metric(value, unit, better):
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+
+def _median_seconds(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def _quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def _records(n_rows, seed):
+    df = generate_transactions(n_rows, seed=seed, with_label=False)
+    df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def _metadata(profile, threads):
+    import pandas
+    import sklearn
+    import xgboost
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'timestamp': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'profile': profile,
+        'settings': PROFILES[profile],
+        'xgb_threads': threads,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'versions': {'numpy': np.__version__, 'pandas': pandas.__version__,
+                     'scikit-learn': sklearn.__version__, 'xgboost': xgboost.__version__},
+    }
+
+
+def run_suite(profile='quick', threads=1, repeats=3):
+    """Run every benchmark case
+
+    Returns:
+        Dictionary with 'meta' and 'results' (metric name -> value, unit and
+        whether lower or higher is better)
+    """
+    from modularized.artifact import save_bundle
+    from modularized.inference import FraudPredictor
+    from modularized.preprocessing import feature_engineering
+    from modularized.training import _build_pipeline, find_optimal_threshold, threshold_holdout_split
+    from benchmarks.bench_threshold_search import synthetic_scores
+
+    settings = PROFILES[profile]
+    results = {}
+
+    # Training: preprocessor + SMOTE + XGBoost with fixed parameters
+    data = feature_engineering(generate_transactions(settings['train_rows'], seed=42))
+    X, y = data.drop(columns=['is_fraud']), data['is_fraud']
+    X_fit, X_holdout, y_fit, y_holdout = threshold_holdout_split(X, y)
+    params = {'n_estimators': settings['n_estimators'], 'max_depth': 6, 'learning_rate': 0.1}
+    model = None
+
+    def fit():
+        nonlocal model
+        model = _build_pipeline(params, n_jobs=threads).fit(X_fit, y_fit)
+    results['train.pipeline_fit_s'] = _metric(_median_seconds(fit, repeats), 's', 'lower')
+
+    # Threshold search on a large synthetic score vector
+    y_scores, proba = synthetic_scores(settings['threshold_rows'])
+    seconds = _median_seconds(
+        lambda: _quiet(find_optimal_threshold, None, None, y_scores, y_proba=proba), repeats)
+    results['train.threshold_search_s'] = _metric(seconds, 's', 'lower')
+    threshold = _quiet(find_optimal_threshold, model, X_holdout, y_holdout)
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        save_bundle(model.named_steps['preprocessor'], model.named_steps['classifier'],
+                    threshold, model_dir=model_dir, version='benchmark')
+
+        seconds = _median_seconds(lambda: _quiet(FraudPredictor, model_dir=model_dir),
+                                  settings['load_repeats'])
+        results['load.bundle_s'] = _metric(seconds, 's', 'lower')
+
+        predictor = _quiet(FraudPredictor, model_dir=model_dir, metrics=None)
+        predictor.classifier.set_params(n_jobs=threads)
+
+        # Single-row latency through the compiled path
+        records = _records(settings['single_rows'], seed=7).to_dict('records')
+        for record in records[:50]:
+            predictor.predict_single(record)
+        # Median over rounds of each round's percentiles damps scheduler noise
+        p50, p99 = [], []
+        for _ in range(repeats):
+            latencies = []
+            for record in records:
+                start = time.perf_counter()
+                predictor.predict_single(record)
+                latencies.append(time.perf_counter() - start)
+            p50.append(np.percentile(latencies, 50) * 1e6)
+            p99.append(np.percentile(latencies, 99) * 1e6)
+        results['single.p50_us'] = _metric(np.median(p50), 'us', 'lower')
+        results['single.p99_us'] = _metric(np.median(p99), 'us', 'lower')
+
+        # Batch throughput
+        for size in settings['batch_sizes']:
+            batch = _records(size, seed=size)
+            seconds = _median_seconds(lambda: predictor.predict_with_scores(batch), repeats)
+            results[f'batch.{size}_rows_per_s'] = _metric(size / seconds, 'rows/s', 'higher')
+
+        # API latency: Flask test client in a fresh interpreter pointed at the model
+        payloads = _records(settings['api_requests'], seed=11).to_dict('records')
+        env = {**os.environ, 'FRAUD_MODEL_DIR': model_dir, 'FRAUD_MICROBATCHING': '0',
+               'OMP_NUM_THREADS': str(threads)}
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        completed = subprocess.run([sys.executable, '-c', _API_SCRIPT], input=json.dumps(payloads),
+                                   capture_output=True, text=True, env=env, cwd=repo_root)
+        if completed.returncode != 0:
+            raise RuntimeError(f"API benchmark failed:\n{completed.stderr}")
+        api_us = np.array(json.loads(completed.stdout.strip().splitlines()[-1]))[20:] * 1e6
+        results['api.predict_p50_us'] = _metric(np.percentile(api_us, 50), 'us', 'lower')
+        results['api.predict_p99_us'] = _metric(np.percentile(api_us, 99), 'us', 'lower')
+
+    return {'meta': _metadata(profile, threads), 'results': results}
+
+
+def compare(baseline, current, threshold=0.10, overrides=None):
+    """Relative change of every metric present in both result sets
+
+    Returns:
+        Tuple of (rows, regressions); a row is (name, baseline, current,
+        change, regressed) where change > 0 always means worse
+    """
+    overrides = overrides or {}
+    rows, regressions = [], []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        old, new = baseline['results'].get(name), current['results'].get(name)
+        if old is None or new is None:
+            rows.append((name, old and old['value'], new and new['value'], None, False))
+            continue
+        if old['value'] == 0:
+            change = 0.0
+        elif old['better'] == 'lower':
+            change = (new['value'] - old['value']) / old['value']
+        else:
+            change = (old['value'] - new['value']) / old['value']
+        regressed = change > overrides.get(name, threshold)
+        rows.append((name, old['value'], new['value'], change, regressed))
+        if regressed:
+            regressions.append(name)
+    return rows, regressions
+
+
+def _print_results(results):
+    print(f"{'metric':<28} {'value':>14}  unit")
+    for name, metric in results['results'].items():
+        print(f"{name:<28} {metric['value']:>14,.3f}  {metric['unit']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run the suite and write a JSON result file")
+    run.add_argument('--output', required=True)
+    run.add_argument('--profile', default='quick', choices=sorted(PROFILES))
+    run.add_argument('--threads', type=int, default=1,
+                     help="XGBoost threads; keep fixed between compared runs")
+    run.add_argument('--repeats', type=int, default=3)
+
+    diff = commands.add_parser('compare', help="Compare two result files")
+    diff.add_argument('baseline')
+    diff.add_argument('current')
+    diff.add_argument('--threshold', type=float, default=0.10,
+                      help="Allowed relative slowdown before a metric counts as regressed")
+    diff.add_argument('--metric-threshold', action='append', default=[], metavar='NAME=FRACTION',
+                      help="Per-metric override, e.g. api.predict_p99_us=0.3")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run_suite(args.profile, args.threads, args.repeats)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        _print_results(results)
+        print(f"Results written to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline['meta']['settings'] != current['meta']['settings']:
+        print("Warning: result files were produced with different benchmark settings")
+    overrides = {name: float(value) for name, value in
+                 (item.split('=', 1) for item in args.metric_threshold)}
+    rows, regressions = compare(baseline, current, args.threshold, overrides)
+
+    print(f"{'metric':<28} {'baseline':>14} {'current':>14} {'change':>9}")
+    for name, old, new, change, regressed in rows:
+        old_text = f"{old:>14,.3f}" if old is not None else f"{'-':>14}"
+        new_text = f"{new:>14,.3f}" if new is not None else f"{'-':>14}"
+        change_text = f"{change:>+9.1%}" if change is not None else f"{'n/a':>9}"
+        print(f"{name:<28} {old_text} {new_text} {change_text}{'  REGRESSION' if regressed else ''}")
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed beyond the threshold (positive change = worse)")
+        return 1
+    print("No regressions beyond the threshold (positive change = worse)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# synthetic.py
+import numpy as np
+import pandas as pd
+
+CATEGORIES = ['clothing', 'dining', 'education', 'electronics', 'entertainment',
+              'gas', 'groceries', 'health', 'other', 'travel']
+LOCATIONS = ['New York, USA', 'Los Angeles, USA', 'Miami, USA', 'London, UK',
+             'Paris, France', 'Berlin, Germany', 'Toronto, Canada', 'Sydney, Australia']
+TRANSACTION_TYPES = ['purchase', 'withdrawal', 'transfer']
+
+
+def generate_transactions(n_rows, seed=42, with_label=True, n_customers=None, amount_scale=1.0):
+    """Generate synthetic transactions matching the inference schema
+
+    Columns follow FraudPredictor's example_usage (amount, balances, age,
+    category, gender, transaction_type, location, timestamp, customer_id,
+    merchant), plus `is_fraud` when with_label is True. amount_scale shifts
+    the amount distribution (and with it the fraud rate) to simulate drift.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(1, n_rows // 20)
+
+    amount = rng.gamma(2.0, 120.0 * amount_scale, n_rows).round(2)
+    old_balance = rng.uniform(0, 5000, n_rows).round(2)
+    seconds = rng.integers(0, 60 * 86400, n_rows)
+    timestamp = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(seconds), unit='s')
+    category = rng.choice(CATEGORIES, n_rows)
+
+    df = pd.DataFrame({
+        'amount': amount,
+        'old_balance': old_balance,
+        'new_balance': (old_balance - amount).round(2),
+        'age': rng.integers(18, 85, n_rows),
+        'category': category,
+        'gender': rng.choice(['M', 'F'], n_rows),
+        'transaction_type': rng.choice(TRANSACTION_TYPES, n_rows),
+        'location': rng.choice(LOCATIONS, n_rows),
+        'timestamp': timestamp,
+        'customer_id': np.char.add('CUST', rng.integers(0, n_customers, n_rows).astype(str)),
+        'merchant': np.char.add('MERCH', rng.integers(0, 200, n_rows).astype(str)),
+    })
+
+    if with_label:
+        hour = timestamp.hour.to_numpy()
+        logit = (-4.0 + 0.004 * amount + 1.5 * ((hour < 5) | (hour > 22))
+                 + 1.0 * np.isin(category, ['electronics', 'travel']))
+        df['is_fraud'] = (rng.uniform(size=n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+
+    return df
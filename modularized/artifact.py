@@ -0,0 +1,366 @@
+# artifact.py
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .config import MODEL_DIR, BUNDLE_KEEP_VERSIONS
+from .fast_path import CompiledPreprocessor
+from .tree_engine import TreeEnsemble
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+BOOSTER_NAME = "model.ubj"
+DRIFT_PROFILE_NAME = "drift_profile.json"
+# Pointer file naming the active version inside a model's bundle directory
+CURRENT_NAME = "CURRENT"
+# Preprocessing constants stored as .npy so they can be memory-mapped
+ARRAY_NAMES = ('num_medians', 'num_means', 'num_scales')
+# Trees compiled for the NumPy engine (see tree_engine.py), stored as
+# tree_<name>.npy so it can score without importing xgboost
+TREE_ARRAY_NAMES = ('feature', 'threshold', 'children', 'default_left', 'value', 'roots')
+
+
+def bundle_root(model_name="fraud_model", model_dir=None):
+    """Directory holding every saved version of a model's bundle"""
+    return os.path.join(model_dir or MODEL_DIR, f"{model_name}.bundle")
+
+
+def current_version(model_name="fraud_model", model_dir=None):
+    """Version the CURRENT pointer selects, or None"""
+    try:
+        with open(os.path.join(bundle_root(model_name, model_dir), CURRENT_NAME), 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def bundle_path(model_name="fraud_model", model_dir=None, version=None):
+    """Directory holding one version of a model's bundle
+
+    version defaults to the one CURRENT points at. Bundles saved before
+    versions were kept side by side have their files directly in the root.
+    """
+    root = bundle_root(model_name, model_dir)
+    version = version or current_version(model_name, model_dir)
+    return os.path.join(root, version) if version else root
+
+
+def list_versions(model_name="fraud_model", model_dir=None):
+    """Saved versions of a model's bundle, oldest first"""
+    root = bundle_root(model_name, model_dir)
+    if not os.path.isdir(root):
+        return []
+    versions = []
+    for entry in os.listdir(root):
+        manifest_path = os.path.join(root, entry, MANIFEST_NAME)
+        if not entry.startswith('.') and os.path.exists(manifest_path):
+            versions.append((os.stat(manifest_path).st_mtime_ns, entry))
+    return [version for _, version in sorted(versions)]
+
+
+def activate_version(model_name, version, model_dir=None):
+    """Point CURRENT at a saved version
+
+    The pointer is replaced atomically, so a loader sees either the old or
+    the new version, never a mix.
+
+    Raises:
+        FileNotFoundError: If the version does not exist
+    """
+    root = bundle_root(model_name, model_dir)
+    if not os.path.exists(os.path.join(root, version, MANIFEST_NAME)):
+        raise FileNotFoundError(f"No bundle version {version} in {root}")
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{CURRENT_NAME}.", dir=root)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(root, CURRENT_NAME))
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _new_version(root, version):
+    """Directory name for a new version; existing versions are never overwritten"""
+    if version is not None:
+        if version.startswith('.') or version == CURRENT_NAME or os.sep in version or \
+                (os.altsep and os.altsep in version):
+            raise ValueError(f"Invalid bundle version label: {version!r}")
+        if os.path.exists(os.path.join(root, version)):
+            raise FileExistsError(f"Bundle version {version} already exists in {root}")
+        return version
+    # Microseconds, so labels stay unique even after older versions are pruned
+    base = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S.%fZ')
+    version, n = base, 1
+    while os.path.exists(os.path.join(root, version)):
+        n += 1
+        version = f"{base}-{n}"
+    return version
+
+
+def _prune_versions(model_name, model_dir, keep, new_version):
+    """Delete the oldest versions beyond keep, never the active or the new one"""
+    protected = {current_version(model_name, model_dir), new_version} - {None}
+    others = [v for v in list_versions(model_name, model_dir) if v not in protected]
+    root = bundle_root(model_name, model_dir)
+    for version in others[:max(0, len(others) - max(keep - len(protected), 0))]:
+        # Predictors mapping these files keep their (unlinked) data
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+def save_bundle(preprocessor, classifier, threshold, model_name="fraud_model",
+                model_dir=None, version=None, drift_profile=None, activate=True,
+                keep_versions=BUNDLE_KEEP_VERSIONS):
+    """Write a new versioned artifact bundle for inference
+
+    The bundle holds a manifest (feature schema, threshold, categorical
+    vocabularies, file checksums), the numeric preprocessing constants as
+    .npy files and the XGBoost booster in its native binary format, plus
+    the trees compiled for the NumPy engine when the model supports it.
+
+    Every save creates a new version directory next to the previous ones:
+    files are written to a temporary directory that is renamed into place,
+    and then CURRENT is switched to it. Files of an existing version are
+    never rewritten, so predictors memory-mapping them are unaffected.
+
+    Args:
+        preprocessor: Fitted ColumnTransformer from get_preprocessor(), or
+            an already compiled CompiledPreprocessor
+        classifier: Fitted XGBClassifier
+        threshold: Decision threshold on fraud probability
+        model_name: Base name of the bundle directory
+        model_dir: Target directory (defaults to MODEL_DIR)
+        version: Version label (defaults to a UTC timestamp)
+        drift_profile: Reference profile from drift.build_reference_profile
+        activate: Point CURRENT at the new version
+        keep_versions: Versions kept on disk, including the active one
+
+    Raises:
+        FileExistsError: If version already exists
+
+    Returns:
+        Path to the new version's directory
+    """
+    if isinstance(preprocessor, CompiledPreprocessor):
+        compiled = preprocessor
+    else:
+        compiled = CompiledPreprocessor.from_preprocessor(preprocessor)
+    root = bundle_root(model_name, model_dir)
+    os.makedirs(root, exist_ok=True)
+    version = _new_version(root, version)
+    path = tempfile.mkdtemp(prefix='.tmp-', dir=root)
+
+    try:
+        files = {}
+        for name in ARRAY_NAMES:
+            filename = f"{name}.npy"
+            np.save(os.path.join(path, filename), getattr(compiled, name))
+            files[filename] = _sha256(os.path.join(path, filename))
+
+        booster = classifier.get_booster()
+        booster.save_model(os.path.join(path, BOOSTER_NAME))
+        files[BOOSTER_NAME] = _sha256(os.path.join(path, BOOSTER_NAME))
+        tree_ensemble = None
+        try:
+            ensemble = TreeEnsemble.from_booster(booster, _iteration_range(booster))
+        except ValueError:
+            # Unsupported objective or splits: only the XGBoost engine applies
+            ensemble = None
+        if ensemble is not None:
+            for name in TREE_ARRAY_NAMES:
+                filename = f"tree_{name}.npy"
+                np.save(os.path.join(path, filename), getattr(ensemble, name))
+                files[filename] = _sha256(os.path.join(path, filename))
+            tree_ensemble = {'max_depth': ensemble.max_depth, 'base_margin': ensemble.base_margin,
+                             'n_features': ensemble.n_features}
+        # The native model file does not keep training parameters; warm-start
+        # retraining (see incremental.py) continues boosting with these
+        xgb_params = {name: value for name, value in classifier.get_xgb_params().items()
+                      if value is not None and name not in ('n_jobs', 'nthread')}
+
+        if drift_profile is not None:
+            with open(os.path.join(path, DRIFT_PROFILE_NAME), 'w') as f:
+                json.dump(drift_profile, f)
+            files[DRIFT_PROFILE_NAME] = _sha256(os.path.join(path, DRIFT_PROFILE_NAME))
+
+        manifest = {
+            'format_version': BUNDLE_FORMAT_VERSION,
+            'model_name': model_name,
+            'version': version,
+            'threshold': float(threshold),
+            'numeric_features': compiled.numeric_features,
+            'categorical_features': compiled.categorical_features,
+            'categorical_fill': [str(v) for v in compiled.cat_fill],
+            'categories': [[str(v) for v in values] for values in compiled.categories],
+            'n_features': compiled.n_features,
+            'sparse': compiled.sparse,
+            'xgb_params': xgb_params,
+            'tree_ensemble': tree_ensemble,
+            'drift_profile': DRIFT_PROFILE_NAME if drift_profile is not None else None,
+            'files': files,
+        }
+        with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(path, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+
+    if activate:
+        activate_version(model_name, version, model_dir)
+    _prune_versions(model_name, model_dir, keep_versions, version)
+    return os.path.join(root, version)
+
+
+def _iteration_range(booster):
+    """Rounds XGBClassifier scores with: up to best_iteration after early stopping"""
+    best_iteration = booster.attr('best_iteration')
+    return (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+
+
+class BoosterClassifier:
+    """Minimal predict_proba wrapper around a raw xgboost.Booster
+
+    Avoids XGBClassifier on the scoring path. Matches
+    XGBClassifier.predict_proba for binary:logistic. params are the
+    training parameters, kept for get_xgb_params.
+
+    Given model_file instead of a booster, the booster is only loaded (and
+    xgboost, which imports scikit-learn, scipy and joblib, only imported)
+    on first use; ensemble is then the bundle's precompiled TreeEnsemble,
+    which TreeEngineClassifier scores with instead.
+    """
+
+    def __init__(self, booster=None, params=None, model_file=None, ensemble=None):
+        self.params = dict(params or {})
+        self.model_file = model_file
+        self.ensemble = ensemble
+        self._booster = None
+        self._booster_params = {}
+        if booster is not None:
+            self._set_booster(booster)
+
+    def _set_booster(self, booster):
+        self._booster = booster
+        # Honour early stopping the same way XGBClassifier does
+        self.iteration_range = _iteration_range(booster)
+        if self._booster_params:
+            booster.set_param(self._booster_params)
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            import xgboost
+            self._set_booster(xgboost.Booster(model_file=self.model_file))
+        return self._booster
+
+    def predict_proba(self, X):
+        booster = self.booster
+        positive = booster.inplace_predict(X, iteration_range=self.iteration_range)
+        return np.column_stack([1.0 - positive, positive])
+
+    def get_booster(self):
+        return self.booster
+
+    def get_xgb_params(self):
+        return dict(self.params)
+
+    def set_params(self, n_jobs=None, **params):
+        if n_jobs is not None:
+            params['nthread'] = n_jobs
+        if params:
+            # Kept for a booster that is not loaded yet
+            self._booster_params.update(params)
+            if self._booster is not None:
+                self._booster.set_param(params)
+        return self
+
+
+def has_bundle(model_name="fraud_model", model_dir=None, version=None):
+    return os.path.exists(os.path.join(bundle_path(model_name, model_dir, version), MANIFEST_NAME))
+
+
+def load_bundle(model_name="fraud_model", model_dir=None, verify=True, mmap=True, version=None,
+                lazy_booster=False):
+    """Load a bundle written by save_bundle
+
+    Args:
+        model_name: Base name of the bundle directory
+        model_dir: Directory containing the bundle (defaults to MODEL_DIR)
+        verify: Check every file against its manifest checksum
+        mmap: Memory-map the preprocessing arrays instead of reading them
+        version: Version to load (defaults to the active one)
+        lazy_booster: Defer loading the XGBoost booster to its first use
+            when the bundle has precompiled trees for the NumPy engine
+
+    Returns:
+        Tuple of (compiled preprocessor, classifier, threshold, manifest)
+    """
+    return load_bundle_dir(bundle_path(model_name, model_dir, version), verify=verify, mmap=mmap,
+                           lazy_booster=lazy_booster)
+
+
+def load_bundle_dir(path, verify=True, mmap=True, lazy_booster=False):
+    """Load the bundle version stored in path (see load_bundle)"""
+    with open(os.path.join(path, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format_version')}")
+
+    if verify:
+        for filename, expected in manifest['files'].items():
+            if _sha256(os.path.join(path, filename)) != expected:
+                raise ValueError(f"Checksum mismatch for {filename} in {path}")
+
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None)
+              for name in ARRAY_NAMES}
+    compiled = CompiledPreprocessor(
+        manifest['numeric_features'], arrays['num_medians'], arrays['num_means'],
+        arrays['num_scales'], manifest['categorical_features'],
+        manifest['categorical_fill'], manifest['categories'],
+        sparse=manifest.get('sparse', False))
+
+    ensemble = None
+    if manifest.get('tree_ensemble'):
+        ensemble = TreeEnsemble(
+            **{name: np.load(os.path.join(path, f"tree_{name}.npy"), mmap_mode='r' if mmap else None)
+               for name in TREE_ARRAY_NAMES},
+            **manifest['tree_ensemble'])
+    classifier = BoosterClassifier(params=manifest.get('xgb_params'),
+                                   model_file=os.path.join(path, BOOSTER_NAME), ensemble=ensemble)
+    if not (lazy_booster and ensemble is not None):
+        classifier.get_booster()
+
+    return compiled, classifier, manifest['threshold'], manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert joblib model files into an artifact bundle")
+    parser.add_argument('--model-name', default="fraud_model")
+    parser.add_argument('--version', default=None)
+    args = parser.parse_args(argv)
+
+    import joblib
+    from .drift import load_profile, profile_path
+    preprocessor = joblib.load(os.path.join(MODEL_DIR, f"{args.model_name}_preprocessor.joblib"))
+    classifier = joblib.load(os.path.join(MODEL_DIR, f"{args.model_name}_classifier.joblib"))
+    with open(os.path.join(MODEL_DIR, f"{args.model_name}_threshold.txt"), 'r') as f:
+        threshold = float(f.read().strip())
+
+    path = save_bundle(preprocessor, classifier, threshold, args.model_name, version=args.version,
+                       drift_profile=load_profile(profile_path(args.model_name)))
+    print(f"Bundle saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
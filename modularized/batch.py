@@ -0,0 +1,241 @@
+# batch.py
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .config import INFERENCE_ENGINE
+
+DEFAULT_CHUNK_SIZE = 100_000
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet input/output requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def iter_chunks(input_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrame chunks of at most chunk_size rows from a CSV or Parquet file"""
+    if _is_parquet(input_path):
+        pa = _require_pyarrow()
+        parquet_file = pa.parquet.ParquetFile(input_path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(input_path, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+class _ResultWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = _is_parquet(output_path)
+        self._writer = None
+        self._header_written = False
+
+    def write(self, results):
+        if self.parquet:
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(results, preserve_index=False)
+            if self._writer is None:
+                self._writer = pa.parquet.ParquetWriter(self.output_path, table.schema)
+            self._writer.write_table(table)
+        else:
+            results.to_csv(self.output_path, mode='a' if self._header_written else 'w',
+                           header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_chunk(predictor, chunk, row_offset=0, keep_columns=None):
+    """Score one chunk and return its result frame
+
+    Args:
+        predictor: Loaded FraudPredictor
+        chunk: DataFrame of raw transactions
+        row_offset: Position of the chunk's first row in the input file
+        keep_columns: Input columns to copy through to the output
+
+    Returns:
+        DataFrame with row_id, kept columns, fraud_probability and is_fraud
+    """
+    probabilities = predictor.predict(chunk, return_proba=True)
+    results = pd.DataFrame({'row_id': np.arange(row_offset, row_offset + len(chunk))})
+    for col in keep_columns or []:
+        if col in chunk.columns:
+            results[col] = chunk[col].to_numpy()
+    results['fraud_probability'] = probabilities
+    results['is_fraud'] = (probabilities >= predictor.threshold).astype(int)
+    return results
+
+
+def _batch_predictor(model_name, model_dir=None, engine='xgboost', version=None):
+    """FraudPredictor for bulk scoring
+
+    Drift monitoring and request metrics are off: both would queue whole
+    chunk frames for a background thread that bulk runs do not need.
+    """
+    from .inference import FraudPredictor
+    return FraudPredictor(model_name=model_name, model_dir=model_dir, metrics=None, engine=engine,
+                          drift=False, version=version)
+
+
+# Predictor loaded once per pool worker by _init_worker
+_worker_predictor = None
+
+
+def _init_worker(model_name, model_dir, engine, version, xgb_threads):
+    """Load the model components once when a pool worker starts"""
+    global _worker_predictor
+    _worker_predictor = _batch_predictor(model_name, model_dir, engine, version)
+    # One XGBoost thread per process avoids oversubscribing the cores
+    _worker_predictor.classifier.set_params(n_jobs=xgb_threads)
+
+
+def _score_in_worker(chunk, row_offset, keep_columns):
+    return score_chunk(_worker_predictor, chunk, row_offset, keep_columns)
+
+
+def iter_scored_chunks(chunks, n_workers=1, predictor=None, model_name="fraud_model",
+                       keep_columns=None, xgb_threads=1, model_dir=None, engine=INFERENCE_ENGINE):
+    """Score an iterable of chunks, yielding result frames in input order
+
+    With n_workers > 1 the chunks are sharded across a process pool. At most
+    2 * n_workers chunks are in flight, so memory stays bounded by chunk size.
+    Workers load the same model as predictor (name, directory, engine and
+    bundle version) when one is given, else model_name from model_dir.
+
+    A model with velocity features is always scored in this process: each
+    worker would keep its own VelocityFeatureStore and see only some of a
+    customer's transactions.
+    """
+    if n_workers > 1 and predictor is None:
+        predictor = _batch_predictor(model_name, model_dir, engine)
+    if predictor is not None and predictor.velocity_columns:
+        n_workers = 1
+
+    if n_workers <= 1:
+        if predictor is None:
+            predictor = _batch_predictor(model_name, model_dir, engine)
+        row_offset = 0
+        for chunk in chunks:
+            yield score_chunk(predictor, chunk, row_offset, keep_columns)
+            row_offset += len(chunk)
+        return
+
+    model_name, model_dir = predictor.model_name, predictor.model_dir
+    engine, version = predictor.engine, predictor.bundle_version
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(model_name, model_dir, engine, version, xgb_threads)) as pool:
+        pending = deque()
+        row_offset = 0
+        for chunk in chunks:
+            pending.append(pool.submit(_score_in_worker, chunk, row_offset, keep_columns))
+            row_offset += len(chunk)
+            if len(pending) >= 2 * n_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def score_dataframe(df, n_workers=1, chunk_size=DEFAULT_CHUNK_SIZE, predictor=None,
+                    model_name="fraud_model", keep_columns=None, xgb_threads=1, model_dir=None,
+                    engine=INFERENCE_ENGINE):
+    """Score an in-memory DataFrame, optionally in parallel over row chunks
+
+    Returns:
+        DataFrame of results in the same row order as df
+    """
+    chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+    results = list(iter_scored_chunks(chunks, n_workers, predictor, model_name,
+                                      keep_columns, xgb_threads, model_dir, engine))
+    if not results:
+        return pd.DataFrame(columns=['row_id', 'fraud_probability', 'is_fraud'])
+    return pd.concat(results, ignore_index=True)
+
+
+def score_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+               predictor=None, keep_columns=('customer_id',), n_workers=1,
+               model_name="fraud_model", xgb_threads=1, model_dir=None, engine=INFERENCE_ENGINE):
+    """Stream a transaction file through the model chunk by chunk
+
+    Only a bounded number of input chunks and their results are held in
+    memory at a time, so peak memory depends on chunk_size (and n_workers)
+    rather than on the file size.
+
+    Args:
+        input_path: CSV or Parquet file of raw transactions
+        output_path: CSV or Parquet file to write results to
+        chunk_size: Number of rows read and scored per chunk
+        predictor: Loaded FraudPredictor (one without drift monitoring or
+            metrics is created if None)
+        keep_columns: Input columns to copy through to the output
+        n_workers: Number of worker processes; 1 scores in this process,
+            as does a model with velocity features
+        model_name, model_dir, engine: Model to load when predictor is None
+        xgb_threads: XGBoost threads per worker process
+
+    Returns:
+        Dictionary with row, fraud and chunk counts
+    """
+    writer = _ResultWriter(output_path)
+    n_rows = n_fraud = n_chunks = 0
+    try:
+        scored = iter_scored_chunks(iter_chunks(input_path, chunk_size), n_workers,
+                                    predictor, model_name, keep_columns, xgb_threads, model_dir, engine)
+        for results in scored:
+            writer.write(results)
+            n_rows += len(results)
+            n_fraud += int(results['is_fraud'].sum())
+            n_chunks += 1
+    finally:
+        writer.close()
+
+    return {'rows': n_rows, 'fraud_count': n_fraud, 'chunks': n_chunks}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a transaction file in bounded memory")
+    parser.add_argument('input_path', help="CSV or Parquet file of transactions")
+    parser.add_argument('output_path', help="CSV or Parquet file for the results")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--model-name', default="fraud_model")
+    parser.add_argument('--model-dir', default=None)
+    parser.add_argument('--engine', default=INFERENCE_ENGINE, choices=['xgboost', 'numpy', 'auto'])
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes scoring chunks in parallel")
+    parser.add_argument('--xgb-threads', type=int, default=1,
+                        help="XGBoost threads per worker process")
+    parser.add_argument('--keep-columns', default="customer_id",
+                        help="Comma-separated input columns to copy to the output")
+    args = parser.parse_args(argv)
+
+    keep_columns = [c for c in args.keep_columns.split(',') if c]
+    summary = score_file(args.input_path, args.output_path, args.chunk_size,
+                         keep_columns=keep_columns, n_workers=args.workers,
+                         model_name=args.model_name, xgb_threads=args.xgb_threads,
+                         model_dir=args.model_dir, engine=args.engine)
+    print(f"Scored {summary['rows']} transactions in {summary['chunks']} chunks "
+          f"({summary['fraud_count']} flagged as fraud)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# bulk.py
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+NPY = 'application/x-npy'
+NDJSON = 'application/x-ndjson'
+# Request bodies decoded whole into one frame (NDJSON is streamed instead)
+FRAME_TYPES = (ARROW, NPY)
+
+RESULT_DTYPE = np.dtype([('transaction_index', '<i8'), ('is_fraud', '?'),
+                         ('fraud_probability', '<f8'), ('risk_level', '<U6')])
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as e:
+        raise UnsupportedMediaType(f"{ARROW} requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def negotiate(content_type, accept=None):
+    """Response format: the first supported type in Accept, else the request's own"""
+    supported = (JSON, NDJSON) + FRAME_TYPES
+    for item in (accept or '').split(','):
+        media_type = item.split(';')[0].strip().lower()
+        if media_type in supported:
+            return media_type
+    return content_type if content_type in supported else JSON
+
+
+def _decode_npy(body):
+    """Structured array viewed in place over the request body (no pickles)"""
+    fp = io.BytesIO(body)
+    version = np.lib.format.read_magic(fp)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(fp)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(fp)
+    if dtype.names is None or dtype.hasobject or len(shape) != 1:
+        raise ValueError("Expected a one-dimensional structured array without object fields")
+    records = np.frombuffer(body, dtype=dtype, count=shape[0], offset=fp.tell())
+    data = {}
+    for name in dtype.names:
+        column = records[name]
+        # Fixed-width strings become Python strings like in every other path
+        data[name] = column.astype(object) if column.dtype.kind in 'US' else column
+    return pd.DataFrame(data, copy=False)
+
+
+def decode_frame(body, content_type):
+    """Transactions frame from an Arrow IPC stream or .npy structured array body
+
+    Raises:
+        UnsupportedMediaType: For other content types
+        ValueError: If the body cannot be decoded
+    """
+    if content_type == ARROW:
+        pa = _require_pyarrow()
+        try:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"Invalid Arrow IPC stream: {e}") from e
+        # split_blocks keeps null-free numeric columns as views of the body
+        return table.to_pandas(split_blocks=True)
+    if content_type == NPY:
+        return _decode_npy(body)
+    raise UnsupportedMediaType(f"Unsupported content type: {content_type}")
+
+
+def encode_frame(df, content_type):
+    """Request body for a transactions frame (client side of decode_frame)"""
+    if content_type == ARROW:
+        pa = _require_pyarrow()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if content_type == NPY:
+        # Text columns become fixed-width unicode fields sized to their longest value
+        text = {name: f"U{max(1, int(df[name].astype(str).str.len().max()))}"
+                for name in df.columns if not pd.api.types.is_numeric_dtype(df[name])}
+        out = io.BytesIO()
+        np.lib.format.write_array(out, df.to_records(index=False, column_dtypes=text),
+                                  allow_pickle=False)
+        return out.getvalue()
+    if content_type == NDJSON:
+        return df.to_json(orient='records', lines=True).encode('utf-8')
+    raise UnsupportedMediaType(f"Unsupported content type: {content_type}")
+
+
+def result_records(probabilities, predictions, risks, start=0):
+    records = np.empty(len(probabilities), dtype=RESULT_DTYPE)
+    records['transaction_index'] = np.arange(start, start + len(probabilities))
+    records['is_fraud'] = predictions.astype(bool)
+    records['fraud_probability'] = probabilities
+    records['risk_level'] = risks
+    return records
+
+
+def encode_results(records, content_type, threshold):
+    """Serialize result records as Arrow IPC, .npy or NDJSON bytes"""
+    if content_type == ARROW:
+        pa = _require_pyarrow()
+        table = pa.table({name: records[name] for name in RESULT_DTYPE.names})
+        table = table.replace_schema_metadata({'threshold': repr(float(threshold)),
+                                               'fraud_count': str(int(records['is_fraud'].sum()))})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if content_type == NPY:
+        out = io.BytesIO()
+        np.lib.format.write_array(out, records, allow_pickle=False)
+        return out.getvalue()
+    if content_type == NDJSON:
+        # Fixed schema, so lines are formatted directly instead of via json.dumps
+        lines = [f'{{"transaction_index": {i}, "is_fraud": {"true" if f else "false"}, '
+                 f'"fraud_probability": {p!r}, "risk_level": "{r}"}}\n'
+                 for i, f, p, r in zip(records['transaction_index'].tolist(), records['is_fraud'].tolist(),
+                                       records['fraud_probability'].tolist(), records['risk_level'].tolist())]
+        return ''.join(lines).encode('utf-8')
+    raise UnsupportedMediaType(f"Unsupported content type: {content_type}")
+
+
+class NdjsonDecoder:
+    """Turns NDJSON body chunks into frames of rows_per_frame transactions
+
+    Bytes are buffered only up to the last complete line, so a frame can be
+    scored (and its results sent) while the rest of the body is still
+    arriving. Each frame is parsed as one JSON array rather than with one
+    json.loads call per line.
+    """
+
+    def __init__(self, rows_per_frame):
+        self.rows_per_frame = rows_per_frame
+        self._partial = b''
+        self._lines = []
+
+    def feed(self, chunk):
+        """Add body bytes; returns the frames that are now complete"""
+        lines = (self._partial + chunk).split(b'\n')
+        self._partial = lines.pop()
+        self._lines.extend(line for line in lines if line.strip())
+        frames = []
+        while len(self._lines) >= self.rows_per_frame:
+            frames.append(self._parse(self._lines[:self.rows_per_frame]))
+            del self._lines[:self.rows_per_frame]
+        return frames
+
+    def flush(self):
+        """Frame of whatever remains once the body has ended"""
+        if self._partial.strip():
+            self._lines.append(self._partial)
+        self._partial = b''
+        lines, self._lines = self._lines, []
+        return [self._parse(lines)] if lines else []
+
+    @staticmethod
+    def _parse(lines):
+        return pd.DataFrame(json.loads(b'[' + b','.join(lines) + b']'))
@@ -4,7 +4,10 @@ import os
 # Configuration settings
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATASET_DIR = os.path.join(BASE_DIR, "datasets")
-MODEL_DIR = os.path.join(BASE_DIR, "models")
+MODEL_DIR = os.environ.get("FRAUD_MODEL_DIR", os.path.join(BASE_DIR, "models"))
+BUNDLE_KEEP_VERSIONS = int(os.environ.get("FRAUD_BUNDLE_KEEP_VERSIONS", 5))  # Per model, for rollback
+DATASET_CACHE_DIR = os.path.join(BASE_DIR, ".dataset_cache")
+USE_DATASET_CACHE = True
 RANDOM_STATE = 42
 TEST_SIZE = 0.2
 
@@ -17,9 +20,117 @@ HYPERPARAMETERS = {
     'classifier__gamma': [0, 0.1, 0.3]
 }
 
+# Hyperparameter search: 'grid' (exhaustive) or 'halving' (successive halving)
+SEARCH_MODE = "grid"
+CV_FOLDS = 3
+EARLY_STOPPING_ROUNDS = 20
+HALVING_FACTOR = 3
+HALVING_MIN_ROUNDS = 12
+HALVING_MAX_ROUNDS = 100
+
+# Out-of-core training (see out_of_core.py)
+OOC_CHUNK_SIZE = 200_000
+OOC_RESERVOIR_SIZE = 100_000
+OOC_HOLDOUT_EVERY = 10
+OOC_MAX_HOLDOUT_ROWS = 200_000
+OOC_RESAMPLING = "chunk_smote"
+OOC_NUM_BOOST_ROUND = 100
+OOC_XGB_PARAMS = {
+    'objective': 'binary:logistic',
+    'eval_metric': 'logloss',
+    'max_depth': 7,
+    'learning_rate': 0.1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'seed': RANDOM_STATE,
+}
+
+# Keep one-hot encoded categoricals as CSR through preprocessing, SMOTE and XGBoost
+SPARSE_ONEHOT = os.environ.get("FRAUD_SPARSE_ONEHOT", "0") == "1"
+
+# Warm-start retraining (see incremental.py): extra boosting rounds on new data only
+INCREMENTAL_EXTRA_ROUNDS = 30
+INCREMENTAL_LEARNING_RATE = None  # None keeps the saved model's learning rate
+INCREMENTAL_RESAMPLING = "chunk_smote"
+
+# Per-customer velocity features (see velocity.py)
+USE_VELOCITY_FEATURES = False
+VELOCITY_MAX_CUSTOMERS = 1_000_000
+# Window counters are kept per time bucket; windows span whole buckets
+VELOCITY_BUCKET_SECONDS = int(os.environ.get("FRAUD_VELOCITY_BUCKET_SECONDS", 60))
+# Customers idle this long are dropped, swept at most every interval (wall clock)
+VELOCITY_IDLE_SECONDS = int(os.environ.get("FRAUD_VELOCITY_IDLE_SECONDS", 86400))
+VELOCITY_EVICT_INTERVAL_SECONDS = 60.0
+
 # Threshold selection
 MIN_PRECISION = 0.60
 MIN_RECALL = 0.60
+THRESHOLD_HOLDOUT_SIZE = 0.2
+
+# Evaluation (see evaluation.py): test sets are scored and binned chunk by chunk
+EVAL_CHUNK_SIZE = 100_000
+EVAL_N_BINS = 10_000
+EVAL_N_BOOTSTRAP = 200
+EVAL_BOOTSTRAP_BINS = 1_000
+EVAL_SEGMENTS = ['category', 'transaction_type', 'country']
+EVAL_SEGMENT_BINS = 100
+
+# Risk level bands on fraud probability (strictly greater than)
+RISK_HIGH_THRESHOLD = 0.8
+RISK_MEDIUM_THRESHOLD = 0.5
+
+# Scoring engine: 'xgboost', 'numpy' (compiled tree arrays, see tree_engine.py) or
+# 'auto' (numpy up to TREE_ENGINE_MAX_ROWS rows per call, xgboost above). Importing
+# xgboost loads scikit-learn, scipy and joblib; 'numpy' on a bundle skips all four
+INFERENCE_ENGINE = os.environ.get("FRAUD_INFERENCE_ENGINE", "xgboost")
+TREE_ENGINE_MAX_ROWS = 64
+
+# Micro-batching of concurrent /predict requests
+USE_MICROBATCHING = os.environ.get("FRAUD_MICROBATCHING", "0") == "1"
+MICROBATCH_MAX_BATCH_SIZE = 64
+MICROBATCH_MAX_WAIT_MS = 5
+
+# Idempotent /predict result cache (see result_cache.py): retried or replayed
+# transactions are answered from memory until the TTL passes or the model changes
+USE_RESULT_CACHE = os.environ.get("FRAUD_RESULT_CACHE", "1") == "1"
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("FRAUD_RESULT_CACHE_TTL_SECONDS", 300))
+RESULT_CACHE_MAX_ENTRIES = 100_000
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("FRAUD_RESULT_CACHE_MAX_BYTES", 32 << 20))
+
+# Bulk /predict_batch formats (see bulk.py): NDJSON bodies are scored in frames of this many rows
+BULK_NDJSON_FRAME_ROWS = 10_000
+BULK_READ_BYTES = 1 << 16
+
+# Async (ASGI) server: scoring threads and requests allowed in flight before 429
+ASYNC_MAX_WORKERS = int(os.environ.get("FRAUD_ASYNC_WORKERS", os.cpu_count() or 1))
+ASYNC_MAX_PENDING = int(os.environ.get("FRAUD_ASYNC_MAX_PENDING", 256))
+
+# Model registry and hot reload (see registry.py)
+MODEL_WATCH_INTERVAL = float(os.environ.get("FRAUD_MODEL_WATCH_SECONDS", 0))  # 0 disables the watch
+CANARY_SAMPLE_SIZE = 200
+CANARY_MIN_AGREEMENT = 0.0  # Minimum decision agreement with the live model; 0 disables the gate
+SHADOW_MAX_QUEUE = 1000
+ADMIN_TOKEN = os.environ.get("FRAUD_ADMIN_TOKEN")
+
+# Latency metrics and the on-demand sampling profiler (see metrics.py)
+METRICS_ENABLED = os.environ.get("FRAUD_METRICS", "1") == "1"
+PROFILER_INTERVAL_MS = 5
+PROFILER_MAX_SECONDS = 60
+
+# Live input and score drift against the training reference profile (see drift.py)
+DRIFT_ENABLED = os.environ.get("FRAUD_DRIFT", "1") == "1"
+DRIFT_NUMERIC_FEATURES = ['amount', 'old_balance', 'new_balance', 'age', 'hour',
+                          'day_of_week', 'balance_diff', 'amount_to_balance_ratio']
+DRIFT_CATEGORICAL_FEATURES = ['category', 'transaction_type', 'country']
+DRIFT_N_BINS = 10  # Reference quantile bins per numeric feature
+DRIFT_SCORE_BINS = 20
+DRIFT_MAX_CATEGORIES = 50  # Rarer reference values share one 'other' bucket
+DRIFT_WINDOW_ROWS = 50_000  # Statistics cover the last one to two windows of traffic
+DRIFT_MIN_ROWS = 1_000
+DRIFT_MAX_QUEUE = 10_000  # Scored calls waiting to be binned; more are dropped
+DRIFT_FLUSH_SECONDS = 1.0
+DRIFT_PSI_WARN = 0.1
+DRIFT_PSI_ALERT = 0.25
 
 def get_latest_dataset():
     """Get the path to the latest generated dataset"""
@@ -0,0 +1,204 @@
+# dataset_cache.py
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .config import DATASET_CACHE_DIR
+
+CACHE_FORMAT_VERSION = 3  # 3: string dtypes and datetime units round-trip; 2: datetime timezones
+TIMESTAMP_COLUMNS = ('timestamp',)
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_key(path, cache_dir):
+    """Content hash of a raw file, re-hashed only when size or mtime change"""
+    index_path = os.path.join(cache_dir, 'index.json')
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+
+    stat = os.stat(path)
+    entry = index.get(os.path.abspath(path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+
+    sha = _file_sha256(path)
+    index[os.path.abspath(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return sha
+
+
+def _prune_stale(cache_dir, keep_path=None):
+    """Remove cache entries no indexed source file points at any more
+
+    Index entries of deleted source files are dropped first, so replacing
+    or editing a raw file frees the entries built from its old content.
+    """
+    index_path = os.path.join(cache_dir, 'index.json')
+    if not os.path.exists(index_path):
+        return
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    live_index = {path: entry for path, entry in index.items()
+                  if path == keep_path or os.path.exists(path)}
+    if len(live_index) != len(index):
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(live_index, f, indent=2)
+        os.replace(tmp_path, index_path)
+    live = {entry['sha256'] for entry in live_index.values()}
+    for name in os.listdir(cache_dir):
+        entry_path = os.path.join(cache_dir, name)
+        if os.path.isdir(entry_path) and name not in live:
+            shutil.rmtree(entry_path, ignore_errors=True)
+
+
+def _engineering_key():
+    """Changes whenever preprocessing.py changes, invalidating engineered caches"""
+    from . import preprocessing
+    return _file_sha256(preprocessing.__file__)[:16]
+
+
+def write_columns(df, path):
+    """Store a DataFrame as one .npy file per column
+
+    Numeric columns keep their dtype, strings are dictionary-encoded
+    (int32 codes + vocabulary) and datetimes are stored as int64 ns (UTC
+    for timezone-aware columns). The schema records each string column's
+    dtype and each datetime column's unit and timezone, so read_columns
+    returns the dtypes the frame had.
+    """
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    schema = []
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        filename = f"{i:03d}.npy"
+        if pd.api.types.is_datetime64_any_dtype(column):
+            kind = 'datetime'
+            tz = getattr(column.dtype, 'tz', None)
+            if tz is not None:
+                column = column.dt.tz_convert('UTC').dt.tz_localize(None)
+            values = column.to_numpy(dtype='datetime64[ns]').view(np.int64)
+            extra = {'unit': column.dt.unit}
+            if tz is not None:
+                extra['tz'] = str(tz)
+        elif pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+            kind = 'numeric'
+            values = column.to_numpy()
+            extra = {}
+        else:
+            kind = 'categorical'
+            codes, uniques = pd.factorize(column)
+            values = codes.astype(np.int32)
+            extra = {'categories': [str(v) for v in uniques], 'dtype': str(column.dtype)}
+        np.save(os.path.join(tmp_path, filename), values)
+        schema.append({'name': name, 'kind': kind, 'file': filename, **extra})
+
+    with open(os.path.join(tmp_path, 'schema.json'), 'w') as f:
+        json.dump({'format_version': CACHE_FORMAT_VERSION, 'n_rows': len(df),
+                   'columns': schema}, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def read_columns(path, mmap=True):
+    """Load a DataFrame written by write_columns
+
+    String columns come back as their original dtype (object or str), not
+    as pd.Categorical, so a cache hit matches a direct CSV load.
+    """
+    with open(os.path.join(path, 'schema.json'), 'r') as f:
+        schema = json.load(f)
+    if schema['format_version'] != CACHE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported dataset cache format in {path}")
+
+    data = {}
+    for column in schema['columns']:
+        values = np.load(os.path.join(path, column['file']), mmap_mode='r' if mmap else None)
+        if column['kind'] == 'datetime':
+            timestamps = pd.to_datetime(np.asarray(values).view('datetime64[ns]'))
+            if column.get('tz'):
+                timestamps = timestamps.tz_localize('UTC').tz_convert(column['tz'])
+            data[column['name']] = timestamps.as_unit(column['unit'])
+        elif column['kind'] == 'categorical':
+            # Missing values have code -1, which indexes the trailing NaN slot
+            categories = np.array(column['categories'] + [np.nan], dtype=object)
+            data[column['name']] = pd.Series(categories[np.asarray(values)], dtype=column['dtype'])
+        else:
+            data[column['name']] = values
+    return pd.DataFrame(data)
+
+
+def _has_entry(path):
+    """An entry in the current format (older ones are rebuilt)"""
+    schema_path = os.path.join(path, 'schema.json')
+    if not os.path.exists(schema_path):
+        return False
+    with open(schema_path, 'r') as f:
+        return json.load(f).get('format_version') == CACHE_FORMAT_VERSION
+
+
+def load_dataset(data_path, engineered=False, cache_dir=DATASET_CACHE_DIR):
+    """Load a raw CSV through the columnar cache
+
+    The first call parses the CSV (and timestamps) once and stores it as
+    typed columns keyed by the file's content hash; later calls load the
+    columns directly. With engineered=True the output of feature_engineering
+    is cached too, keyed additionally by the preprocessing code. Writing a
+    new entry removes the ones it supersedes: other content of the same or
+    deleted files, and engineered columns from older preprocessing code.
+
+    Returns:
+        DataFrame with timestamps parsed (and engineered features if requested)
+    """
+    from .preprocessing import feature_engineering
+
+    key = _source_key(data_path, cache_dir)
+    raw_path = os.path.join(cache_dir, key, 'raw')
+    engineered_path = os.path.join(cache_dir, key, f'engineered-{_engineering_key()}')
+
+    if engineered and _has_entry(engineered_path):
+        return read_columns(engineered_path)
+
+    if _has_entry(raw_path):
+        df = read_columns(raw_path)
+    else:
+        df = pd.read_csv(data_path)
+        for name in TIMESTAMP_COLUMNS:
+            if name in df.columns:
+                df[name] = pd.to_datetime(df[name])
+        write_columns(df, raw_path)
+        _prune_stale(cache_dir, keep_path=os.path.abspath(data_path))
+        # Reload so both branches return the same dtypes
+        df = read_columns(raw_path)
+
+    if engineered:
+        df = feature_engineering(df)
+        write_columns(df, engineered_path)
+        key_dir = os.path.dirname(engineered_path)
+        for name in os.listdir(key_dir):
+            if name.startswith('engineered-') and name != os.path.basename(engineered_path):
+                shutil.rmtree(os.path.join(key_dir, name), ignore_errors=True)
+    return df
+
+
+def clear_cache(cache_dir=DATASET_CACHE_DIR):
+    shutil.rmtree(cache_dir, ignore_errors=True)
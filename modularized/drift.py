@@ -0,0 +1,331 @@
+# drift.py
+import json
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .config import (MODEL_DIR, DRIFT_NUMERIC_FEATURES, DRIFT_CATEGORICAL_FEATURES, DRIFT_N_BINS,
+                     DRIFT_SCORE_BINS, DRIFT_MAX_CATEGORIES, DRIFT_WINDOW_ROWS, DRIFT_MIN_ROWS,
+                     DRIFT_MAX_QUEUE, DRIFT_FLUSH_SECONDS, DRIFT_PSI_WARN, DRIFT_PSI_ALERT)
+from .metrics import _format_labels
+from .preprocessing import feature_engineering
+
+PROFILE_FORMAT_VERSION = 1
+# Bin fractions are floored at this so empty bins keep PSI finite
+PSI_EPSILON = 1e-4
+
+
+def profile_path(model_name="fraud_model", model_dir=None):
+    """Reference profile saved next to the joblib model files"""
+    return os.path.join(model_dir or MODEL_DIR, f"{model_name}_drift_profile.json")
+
+
+def save_profile(profile, path):
+    with open(path, 'w') as f:
+        json.dump(profile, f)
+    return path
+
+
+def load_profile(path):
+    """Reference profile at path, or None if the model was saved without one"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        profile = json.load(f)
+    if profile.get('format_version') != PROFILE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported drift profile format: {profile.get('format_version')}")
+    return profile
+
+
+def _numeric_counts(values, edges):
+    """Counts per bin between edges, plus a trailing bin for missing values"""
+    values = np.asarray(values, dtype=np.float64)
+    index = np.searchsorted(edges, values, side='right')
+    index[np.isnan(values)] = len(edges) + 1
+    return np.bincount(index, minlength=len(edges) + 2)
+
+
+def _categorical_counts(values, vocabulary):
+    """Counts per reference value, then unseen values, then missing values"""
+    values = pd.Series(np.asarray(values, dtype=object))
+    index = vocabulary.get_indexer(values)
+    index[index == -1] = len(vocabulary)
+    index[values.isna().to_numpy()] = len(vocabulary) + 1
+    return np.bincount(index, minlength=len(vocabulary) + 2)
+
+
+def _fractions(counts):
+    counts = np.asarray(counts, dtype=np.float64)
+    return counts / max(counts.sum(), 1.0)
+
+
+def _numeric_spec(values, n_bins):
+    values = np.asarray(values, dtype=np.float64)
+    present = values[~np.isnan(values)]
+    if len(present):
+        edges = np.unique(np.quantile(present, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    else:
+        edges = np.array([])
+    return {'edges': edges.tolist(), 'fractions': _fractions(_numeric_counts(values, edges)).tolist()}
+
+
+def build_reference_profile(X, scores=None, numeric_features=DRIFT_NUMERIC_FEATURES,
+                            categorical_features=DRIFT_CATEGORICAL_FEATURES, n_bins=DRIFT_N_BINS,
+                            score_bins=DRIFT_SCORE_BINS, max_categories=DRIFT_MAX_CATEGORIES):
+    """Summarize the data a model was trained on for later drift checks
+
+    Numeric features are cut at their reference quantiles, so each bin
+    holds about 1/n_bins of the reference rows; categoricals keep the
+    max_categories most frequent values. Features missing from X are skipped.
+
+    Args:
+        X: Feature-engineered frame (as from load_and_preprocess_data)
+        scores: Fraud probabilities of the model on X, if available
+
+    Returns:
+        JSON-serializable profile dictionary
+    """
+    numeric = {name: _numeric_spec(X[name], n_bins) for name in numeric_features if name in X.columns}
+    categorical = {}
+    for name in categorical_features:
+        if name not in X.columns:
+            continue
+        top = X[name].value_counts().index[:max_categories]
+        vocabulary = pd.Index([str(value) for value in top], dtype=object)
+        counts = _categorical_counts(X[name], vocabulary)
+        categorical[name] = {'values': vocabulary.tolist(), 'fractions': _fractions(counts).tolist()}
+    return {
+        'format_version': PROFILE_FORMAT_VERSION,
+        'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'n_rows': int(len(X)),
+        'numeric': numeric,
+        'categorical': categorical,
+        'score': _numeric_spec(scores, score_bins) if scores is not None else None,
+    }
+
+
+def psi(expected, actual, epsilon=PSI_EPSILON):
+    """Population stability index between two bin-fraction vectors"""
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), epsilon)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), epsilon)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(expected, actual):
+    """Kolmogorov-Smirnov distance evaluated at the bin edges only
+
+    A lower bound of the exact statistic that tightens with more bins.
+    """
+    return float(np.abs(np.cumsum(expected) - np.cumsum(actual)).max(initial=0.0))
+
+
+def _status(value):
+    if value >= DRIFT_PSI_ALERT:
+        return 'alert'
+    return 'warn' if value >= DRIFT_PSI_WARN else 'ok'
+
+
+class DriftMonitor:
+    """Compares live scoring traffic with a model's reference profile
+
+    submit() only puts the scored rows on a bounded queue (dropping them
+    when it is full), so the request path never waits on drift bookkeeping.
+    Every flush_seconds a background thread bins whatever has queued up in
+    one vectorized pass into fixed-size count arrays (one per feature and
+    one for the fraud score), kept for two tumbling windows of window_rows
+    rows: statistics always cover the most recent one to two windows. PSI
+    and a bin-edge KS distance are computed on request.
+    """
+
+    def __init__(self, profile, window_rows=DRIFT_WINDOW_ROWS, max_queue=DRIFT_MAX_QUEUE,
+                 flush_seconds=DRIFT_FLUSH_SECONDS):
+        self.profile = profile
+        self.window_rows = window_rows
+        self.flush_seconds = flush_seconds
+        self._edges = {name: np.asarray(spec['edges']) for name, spec in profile['numeric'].items()}
+        self._vocabularies = {name: pd.Index(spec['values'], dtype=object)
+                              for name, spec in profile['categorical'].items()}
+        self._score_edges = (np.asarray(profile['score']['edges'])
+                             if profile.get('score') is not None else None)
+        self._columns = list(self._edges) + list(self._vocabularies)
+
+        self._lock = threading.Lock()
+        self._current = self._empty_counts()
+        self._current_rows = 0
+        self._previous = None
+        self._previous_rows = 0
+        self._rows_seen = 0
+        self._dropped = 0
+        self._errors = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fraud-drift", daemon=True)
+        self._thread.start()
+
+    def _empty_counts(self):
+        counts = {name: np.zeros(len(edges) + 2, dtype=np.int64) for name, edges in self._edges.items()}
+        counts.update({name: np.zeros(len(vocabulary) + 2, dtype=np.int64)
+                       for name, vocabulary in self._vocabularies.items()})
+        if self._score_edges is not None:
+            counts[None] = np.zeros(len(self._score_edges) + 2, dtype=np.int64)
+        return counts
+
+    def submit(self, features, scores):
+        """Queue scored rows without blocking
+
+        Args:
+            features: DataFrame (raw or feature-engineered) or one transaction dict
+            scores: Fraud probabilities of those rows (a scalar for a dict)
+        """
+        try:
+            self._queue.put_nowait((features, scores))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def update(self, features, scores=None):
+        """Bin a frame of rows into the current window (runs on the calling thread)"""
+        missing = [name for name in self._columns if name not in features.columns]
+        engineered = feature_engineering(features, columns=missing) if missing else features
+        counts = {}
+        for name, edges in self._edges.items():
+            column = features[name] if name in features.columns else engineered[name]
+            counts[name] = _numeric_counts(pd.to_numeric(column, errors='coerce'), edges)
+        for name, vocabulary in self._vocabularies.items():
+            column = features[name] if name in features.columns else engineered[name]
+            counts[name] = _categorical_counts(column, vocabulary)
+        if self._score_edges is not None and scores is not None:
+            counts[None] = _numeric_counts(scores, self._score_edges)
+
+        with self._lock:
+            for name, value in counts.items():
+                self._current[name] += value
+            self._current_rows += len(features)
+            self._rows_seen += len(features)
+            if self._current_rows >= self.window_rows:
+                self._previous, self._previous_rows = self._current, self._current_rows
+                self._current, self._current_rows = self._empty_counts(), 0
+
+    def _run(self):
+        # Waking once per flush interval rather than per request keeps the
+        # binning work (and its hold on the GIL) off the request path
+        while not self._stop.wait(self.flush_seconds):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if items:
+            self._process(items)
+
+    def _process(self, items):
+        # Single transactions are merged into one frame so they cost one update
+        rows = [(features, score) for features, score in items if isinstance(features, dict)]
+        if rows:
+            try:
+                self.update(pd.DataFrame([features for features, _ in rows]),
+                            np.array([score for _, score in rows], dtype=np.float64))
+            except Exception:
+                # Retry one by one so a malformed transaction only loses itself
+                for features, score in rows:
+                    self._update_item(pd.DataFrame([features]), [score])
+        for features, scores in items:
+            if not isinstance(features, dict):
+                self._update_item(features, scores)
+
+    def _update_item(self, features, scores):
+        # update() adds nothing to the window when it raises
+        try:
+            self.update(features, np.asarray(scores, dtype=np.float64))
+        except Exception:
+            with self._lock:
+                self._errors += 1
+
+    def close(self):
+        """Stop the background thread after binning what is already queued"""
+        self._stop.set()
+        self._thread.join()
+
+    def _window_counts(self):
+        with self._lock:
+            counts = {name: value.copy() for name, value in self._current.items()}
+            if self._previous is not None:
+                for name, value in self._previous.items():
+                    counts[name] += value
+            return (counts, self._current_rows + self._previous_rows, self._rows_seen,
+                    self._dropped, self._errors, self._queue.qsize())
+
+    def _compare(self, spec, counts, ordered):
+        expected = np.asarray(spec['fractions'])
+        actual = _fractions(counts)
+        value = psi(expected, actual)
+        result = {'psi': value, 'missing_rate': float(actual[-1])}
+        if ordered:
+            result['ks'] = ks_statistic(expected, actual)
+        else:
+            result['unseen_rate'] = float(actual[-2])
+        return result
+
+    def stats(self):
+        """PSI per feature and for the score, with an ok/warn/alert status
+
+        The status is 'insufficient_data' until DRIFT_MIN_ROWS rows are in
+        the window.
+        """
+        counts, window_rows, rows_seen, dropped, errors, queued = self._window_counts()
+        enough = window_rows >= DRIFT_MIN_ROWS
+        features = {}
+        for name, spec in self.profile['numeric'].items():
+            features[name] = self._compare(spec, counts[name], ordered=True)
+        for name, spec in self.profile['categorical'].items():
+            features[name] = self._compare(spec, counts[name], ordered=False)
+        score = (self._compare(self.profile['score'], counts[None], ordered=True)
+                 if self._score_edges is not None else None)
+        for result in list(features.values()) + ([score] if score else []):
+            result['status'] = _status(result['psi']) if enough else 'insufficient_data'
+
+        worst = max((r['psi'] for r in features.values()), default=0.0)
+        return {
+            'status': _status(max(worst, score['psi'] if score else 0.0)) if enough else 'insufficient_data',
+            'reference_rows': self.profile['n_rows'],
+            'reference_created_at': self.profile.get('created_at'),
+            'window_rows': window_rows,
+            'rows_seen': rows_seen,
+            'dropped': dropped,
+            'errors': errors,
+            'queued': queued,
+            'score': score,
+            'features': features,
+        }
+
+    def render(self):
+        """PSI and KS gauges in Prometheus text format
+
+        Only the window size is exported until DRIFT_MIN_ROWS rows are in,
+        so a freshly started server does not page on a handful of requests.
+        """
+        stats = self.stats()
+        entries = dict(stats['features']) if stats['status'] != 'insufficient_data' else {}
+        if entries and stats['score'] is not None:
+            entries['fraud_probability'] = stats['score']
+        lines = ["# HELP fraud_drift_window_rows Rows in the current drift window",
+                 "# TYPE fraud_drift_window_rows gauge",
+                 f"fraud_drift_window_rows {stats['window_rows']}"]
+        for metric, description in (('psi', "Population stability index of live traffic vs the training reference"),
+                                    ('ks', "Bin-edge Kolmogorov-Smirnov distance vs the training reference")):
+            lines.append(f"# HELP fraud_drift_{metric} {description}")
+            lines.append(f"# TYPE fraud_drift_{metric} gauge")
+            for name, result in entries.items():
+                if metric in result:
+                    lines.append(f"fraud_drift_{metric}{_format_labels((('feature', name),))} "
+                                 f"{result[metric]}")
+        return '\n'.join(lines) + '\n'
@@ -1,57 +1,385 @@
 # evaluation.py
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, 
-    f1_score, roc_auc_score, confusion_matrix, 
-    ConfusionMatrixDisplay, average_precision_score,
-    RocCurveDisplay, PrecisionRecallDisplay
-)
-
-def evaluate_model(model, threshold, X_test, y_test):
-    """Evaluate model performance with given threshold"""
-    # Predict probabilities
-    y_proba = model.predict_proba(X_test)[:, 1]
-    
-    # Apply threshold
-    y_pred = (y_proba >= threshold).astype(int)
-    
-    # Calculate metrics
-    metrics = {
-        'accuracy': accuracy_score(y_test, y_pred),
-        'precision': precision_score(y_test, y_pred),
-        'recall': recall_score(y_test, y_pred),
-        'f1': f1_score(y_test, y_pred),
-        'roc_auc': roc_auc_score(y_test, y_proba),
-        'pr_auc': average_precision_score(y_test, y_proba)
-    }
-    
-    # Print metrics
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import (RANDOM_STATE, EVAL_CHUNK_SIZE, EVAL_N_BINS, EVAL_N_BOOTSTRAP,
+                     EVAL_BOOTSTRAP_BINS, EVAL_SEGMENTS, EVAL_SEGMENT_BINS)
+
+METRIC_NAMES = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'pr_auc']
+
+# Rows per Poisson weight block: n_bootstrap x this many weights in memory
+_BOOTSTRAP_BLOCK = 8192
+
+
+def _confusion_metrics(tp, fp, fn, tn):
+    """Threshold metrics from confusion counts (scalars or arrays of replicates)
+
+    Undefined ratios are 0, as with sklearn's zero_division default.
+    """
+    tp, fp, fn, tn = (np.asarray(c, dtype=np.float64) for c in (tp, fp, fn, tn))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        accuracy = (tp + tn) / np.maximum(tp + fp + fn + tn, 1.0)
+    return {'accuracy': accuracy, 'precision': precision, 'recall': recall, 'f1': f1}
+
+
+def _curve_counts(pos, neg):
+    """Cumulative TP/FP when predicting positive from the highest score level down"""
+    return np.cumsum(pos[..., ::-1], axis=-1), np.cumsum(neg[..., ::-1], axis=-1)
+
+
+def _ranking_metrics(pos, neg):
+    """ROC-AUC and average precision from class counts per score level
+
+    pos and neg have shape (..., n_levels) with levels in ascending score
+    order; scores sharing a level count as ties. With one level per
+    distinct score this matches roc_auc_score and average_precision_score;
+    with histogram bins it approximates them. Undefined values are NaN.
+    """
+    tp, fp = _curve_counts(np.asarray(pos, dtype=np.float64), np.asarray(neg, dtype=np.float64))
+    n_pos, n_neg = tp[..., -1:], fp[..., -1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tpr = np.concatenate([np.zeros_like(n_pos), tp / n_pos], axis=-1)
+        fpr = np.concatenate([np.zeros_like(n_neg), fp / n_neg], axis=-1)
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        roc_auc = np.sum(np.diff(fpr, axis=-1) * (tpr[..., 1:] + tpr[..., :-1]) / 2, axis=-1)
+        pr_auc = np.sum(np.diff(tpr, axis=-1) * precision, axis=-1)
+    undefined = (n_pos[..., 0] == 0) | (n_neg[..., 0] == 0)
+    return np.where(undefined, np.nan, roc_auc), np.where(n_pos[..., 0] == 0, np.nan, pr_auc)
+
+
+def _bins(y_proba, n_bins):
+    return np.clip((y_proba * n_bins).astype(np.int64), 0, n_bins - 1)
+
+
+class StreamingEvaluator:
+    """Bounded-memory evaluation of fraud scores fed chunk by chunk
+
+    Keeps, instead of the scores themselves:
+    - exact confusion counts at the decision threshold
+    - per-class score histograms (n_bins) for ROC-AUC, PR-AUC and curves
+    - Poisson-bootstrap replicates of both (each row gets a Poisson(1)
+      weight per replicate), giving confidence intervals in one pass
+    - confusion counts and coarse histograms per segment value
+
+    With keep_scores=True the scores are kept as well and the overall AUCs
+    and curves are exact (one sort) rather than binned.
+    """
+
+    def __init__(self, threshold, segments=EVAL_SEGMENTS, n_bins=EVAL_N_BINS,
+                 n_bootstrap=EVAL_N_BOOTSTRAP, bootstrap_bins=EVAL_BOOTSTRAP_BINS,
+                 segment_bins=EVAL_SEGMENT_BINS, keep_scores=False, random_state=RANDOM_STATE):
+        self.threshold = threshold
+        self.segments = list(segments)
+        self.n_bins = n_bins
+        self.n_bootstrap = n_bootstrap
+        self.bootstrap_bins = bootstrap_bins
+        self.segment_bins = segment_bins
+        self.n = 0
+        # Confusion counts are ordered tp, fp, fn, tn throughout
+        self.confusion = np.zeros(4)
+        self.histogram = np.zeros((2, n_bins))
+        self._boot_confusion = np.zeros((n_bootstrap, 4))
+        self._boot_histogram = np.zeros((n_bootstrap, 2, bootstrap_bins))
+        self._segment_stats = {name: {} for name in self.segments}
+        self._scores = [] if keep_scores else None
+        self._rng = np.random.default_rng(random_state)
+
+    def update(self, y_true, y_proba, segment_values=None):
+        """Add one chunk of labels and fraud probabilities
+
+        Args:
+            y_true: 0/1 labels
+            y_proba: Fraud probabilities
+            segment_values: DataFrame (or dict of arrays) holding the
+                segment columns for the same rows; None skips the segments
+        """
+        y = np.asarray(y_true).astype(bool)
+        proba = np.asarray(y_proba, dtype=np.float64)
+        predicted = proba >= self.threshold
+        # Cell index per row: 0 tp, 1 fp, 2 fn, 3 tn
+        cell = np.where(predicted, np.where(y, 0, 1), np.where(y, 2, 3))
+        self.confusion += np.bincount(cell, minlength=4)
+        self.histogram += np.bincount(y * self.n_bins + _bins(proba, self.n_bins),
+                                      minlength=2 * self.n_bins).reshape(2, self.n_bins)
+        self.n += len(y)
+
+        if self.n_bootstrap:
+            self._update_bootstrap(y, proba, cell)
+        if segment_values is not None:
+            for name in self.segments:
+                self._update_segment(name, segment_values[name], y, proba, cell)
+        if self._scores is not None:
+            self._scores.append((y, proba))
+
+    def _update_bootstrap(self, y, proba, cell):
+        n_boot, n_bins = self.n_bootstrap, self.bootstrap_bins
+        histogram_index = y * n_bins + _bins(proba, n_bins)
+        replicate_offsets = (np.arange(n_boot) * 2 * n_bins)[:, None]
+        cells = np.eye(4)[cell]
+        for start in range(0, len(y), _BOOTSTRAP_BLOCK):
+            stop = start + _BOOTSTRAP_BLOCK
+            weights = self._rng.poisson(1.0, size=(n_boot, len(cell[start:stop]))).astype(np.float64)
+            self._boot_confusion += weights @ cells[start:stop]
+            flat = (replicate_offsets + histogram_index[start:stop]).ravel()
+            self._boot_histogram += np.bincount(flat, weights=weights.ravel(),
+                                                minlength=n_boot * 2 * n_bins).reshape(n_boot, 2, n_bins)
+
+    def _update_segment(self, name, values, y, proba, cell):
+        values = pd.Series(np.asarray(values, dtype=object)).fillna('missing')
+        codes, uniques = pd.factorize(values)
+        n_values, n_bins = len(uniques), self.segment_bins
+        confusion = np.bincount(codes * 4 + cell, minlength=n_values * 4).reshape(n_values, 4)
+        histogram = np.bincount((codes * 2 + y) * n_bins + _bins(proba, n_bins),
+                                minlength=n_values * 2 * n_bins).reshape(n_values, 2, n_bins)
+        stats = self._segment_stats[name]
+        for i, value in enumerate(uniques):
+            if value in stats:
+                stats[value][0] += confusion[i]
+                stats[value][1] += histogram[i]
+            else:
+                stats[value] = [confusion[i].astype(np.float64), histogram[i].astype(np.float64)]
+
+    def _exact_levels(self):
+        """Class counts per distinct score, from the kept scores (one sort)"""
+        y = np.concatenate([y for y, _ in self._scores])
+        proba = np.concatenate([p for _, p in self._scores])
+        levels, inverse = np.unique(proba, return_inverse=True)
+        pos = np.bincount(inverse, weights=y, minlength=len(levels))
+        neg = np.bincount(inverse, weights=~y, minlength=len(levels))
+        return pos, neg, levels
+
+    def result(self, confidence=0.95):
+        """Metrics, bootstrap confidence intervals and per-segment breakdowns"""
+        metrics = {name: float(value) for name, value in _confusion_metrics(*self.confusion).items()}
+        if self._scores is not None and self.n:
+            pos, neg, _ = self._exact_levels()
+        else:
+            neg, pos = self.histogram
+        roc_auc, pr_auc = _ranking_metrics(pos, neg)
+        metrics['roc_auc'], metrics['pr_auc'] = float(roc_auc), float(pr_auc)
+
+        intervals = {}
+        if self.n_bootstrap and self.n:
+            replicates = _confusion_metrics(*self._boot_confusion.T)
+            replicates['roc_auc'], replicates['pr_auc'] = _ranking_metrics(
+                self._boot_histogram[:, 1], self._boot_histogram[:, 0])
+            alpha = (1.0 - confidence) / 2
+            for name in METRIC_NAMES:
+                values = replicates[name][~np.isnan(replicates[name])]
+                intervals[name] = ([float(np.quantile(values, alpha)), float(np.quantile(values, 1 - alpha))]
+                                   if len(values) else [np.nan, np.nan])
+
+        segments = {}
+        for name, stats in self._segment_stats.items():
+            rows = {}
+            for value, (confusion, histogram) in sorted(stats.items(), key=lambda s: -s[1][0].sum()):
+                seg_roc, seg_pr = _ranking_metrics(histogram[1], histogram[0])
+                n_rows = confusion.sum()
+                rows[str(value)] = {
+                    'n': int(n_rows),
+                    'fraud_rate': float((confusion[0] + confusion[2]) / n_rows),
+                    **{k: float(v) for k, v in _confusion_metrics(*confusion).items()},
+                    'roc_auc': float(seg_roc),
+                    'pr_auc': float(seg_pr),
+                }
+            segments[name] = rows
+
+        tp, fp, fn, tn = self.confusion
+        return {
+            'n': self.n,
+            'fraud_rate': float((tp + fn) / self.n) if self.n else float('nan'),
+            'threshold': float(self.threshold),
+            'metrics': metrics,
+            'confusion_matrix': [[int(tn), int(fp)], [int(fn), int(tp)]],
+            'confidence': confidence,
+            'n_bootstrap': self.n_bootstrap,
+            'confidence_intervals': intervals,
+            'segments': segments,
+        }
+
+    def curves(self):
+        """ROC and precision-recall curves (exact when scores were kept)"""
+        if self._scores is not None and self.n:
+            pos, neg, _ = self._exact_levels()
+        else:
+            neg, pos = self.histogram
+        tp, fp = _curve_counts(pos, neg)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return {
+                'fpr': np.r_[0.0, fp / max(fp[-1], 1)],
+                'tpr': np.r_[0.0, tp / max(tp[-1], 1)],
+                'precision': np.r_[1.0, np.where(tp + fp > 0, tp / (tp + fp), 1.0)],
+                'recall': np.r_[0.0, tp / max(tp[-1], 1)],
+            }
+
+
+def stream_evaluate(model, threshold, X_test, y_test, segments=EVAL_SEGMENTS,
+                    chunk_size=EVAL_CHUNK_SIZE, n_bootstrap=EVAL_N_BOOTSTRAP, keep_scores=True):
+    """Score X_test chunk by chunk into a StreamingEvaluator
+
+    Segments missing from X_test are skipped.
+
+    Returns:
+        The filled StreamingEvaluator
+    """
+    present = [name for name in segments if name in X_test.columns]
+    evaluator = StreamingEvaluator(threshold, segments=present, n_bootstrap=n_bootstrap,
+                                   keep_scores=keep_scores)
+    y = np.asarray(y_test)
+    for start in range(0, len(X_test), chunk_size):
+        chunk = X_test.iloc[start:start + chunk_size]
+        evaluator.update(y[start:start + chunk_size], model.predict_proba(chunk)[:, 1], chunk[present])
+    return evaluator
+
+
+def report_json(report):
+    """JSON text of a report, with undefined (NaN) metrics written as null"""
+    def _clean(value):
+        if isinstance(value, dict):
+            return {key: _clean(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [_clean(item) for item in value]
+        if isinstance(value, float) and np.isnan(value):
+            return None
+        return value
+    return json.dumps(_clean(report), indent=2, allow_nan=False)
+
+
+def plot_report(report, curves, plot_dir=None, show=False):
+    """Confusion matrix, ROC and PR curve figures
+
+    Written as PNG files to plot_dir when given; shown interactively only
+    when show=True. Nothing touches a display otherwise.
+
+    Returns:
+        List of written file paths
+    """
+    import seaborn as sns
+    if show:
+        import matplotlib.pyplot as plt
+        new_figure = lambda: plt.figure(figsize=(8, 6))
+    else:
+        from matplotlib.figure import Figure
+        new_figure = lambda: Figure(figsize=(8, 6))
+
+    figures = {}
+    fig = new_figure()
+    ax = fig.add_subplot()
+    sns.heatmap(np.array(report['confusion_matrix']), annot=True, fmt='d', cmap='Blues',
+                xticklabels=['Legit', 'Fraud'], yticklabels=['Legit', 'Fraud'], ax=ax)
+    ax.set_xlabel('Predicted')
+    ax.set_ylabel('Actual')
+    ax.set_title('Confusion Matrix')
+    figures['confusion_matrix'] = fig
+
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.plot(curves['fpr'], curves['tpr'], label=f"ROC-AUC = {report['metrics']['roc_auc']:.4f}")
+    ax.plot([0, 1], [0, 1], 'k--')
+    ax.set_xlabel('False Positive Rate')
+    ax.set_ylabel('True Positive Rate')
+    ax.set_title('ROC Curve')
+    ax.legend(loc='lower right')
+    figures['roc_curve'] = fig
+
+    fig = new_figure()
+    ax = fig.add_subplot()
+    ax.step(curves['recall'], curves['precision'], where='post',
+            label=f"PR-AUC = {report['metrics']['pr_auc']:.4f}")
+    ax.set_xlabel('Recall')
+    ax.set_ylabel('Precision')
+    ax.set_title('Precision-Recall Curve')
+    ax.legend(loc='lower left')
+    figures['pr_curve'] = fig
+
+    paths = []
+    if plot_dir:
+        os.makedirs(plot_dir, exist_ok=True)
+        for name, fig in figures.items():
+            path = os.path.join(plot_dir, f"{name}.png")
+            fig.savefig(path, bbox_inches='tight')
+            paths.append(path)
+    if show:
+        plt.show()
+    return paths
+
+
+def print_report(report, max_segment_rows=10):
+    level = f"{report['confidence']:.0%}"
     print("Model Evaluation Metrics:")
-    for name, value in metrics.items():
-        print(f"{name.capitalize()}: {value:.4f}")
-    
-    # Confusion matrix
-    cm = confusion_matrix(y_test, y_pred)
-    plt.figure(figsize=(8, 6))
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                xticklabels=['Legit', 'Fraud'], 
-                yticklabels=['Legit', 'Fraud'])
-    plt.xlabel('Predicted')
-    plt.ylabel('Actual')
-    plt.title('Confusion Matrix')
-    plt.show()
-    
-    # ROC curve
-    RocCurveDisplay.from_predictions(y_test, y_proba)
-    plt.plot([0, 1], [0, 1], 'k--')
-    plt.title('ROC Curve')
-    plt.show()
-    
-    # Precision-Recall curve
-    PrecisionRecallDisplay.from_predictions(y_test, y_proba)
-    plt.title('Precision-Recall Curve')
-    plt.show()
-    
-    return metrics
+    for name in METRIC_NAMES:
+        value = report['metrics'][name]
+        interval = report['confidence_intervals'].get(name)
+        suffix = f" ({level} CI {interval[0]:.4f}-{interval[1]:.4f})" if interval else ""
+        print(f"{name.capitalize()}: {value:.4f}{suffix}")
+
+    for name, rows in report['segments'].items():
+        print(f"\nBy {name}:")
+        print(f"  {'value':<20} {'n':>9} {'fraud %':>8} {'precision':>10} {'recall':>8} {'roc_auc':>8}")
+        for value, row in list(rows.items())[:max_segment_rows]:
+            print(f"  {value[:20]:<20} {row['n']:>9} {row['fraud_rate']:>8.2%} {row['precision']:>10.4f} "
+                  f"{row['recall']:>8.4f} {row['roc_auc']:>8.4f}")
+        if len(rows) > max_segment_rows:
+            print(f"  ... {len(rows) - max_segment_rows} more")
+
+
+def evaluate_model(model, threshold, X_test, y_test, plot_dir=None, show_plots=False,
+                   segments=EVAL_SEGMENTS, n_bootstrap=EVAL_N_BOOTSTRAP, chunk_size=EVAL_CHUNK_SIZE):
+    """Evaluate model performance with given threshold
+
+    Headless by default: plots are only produced when plot_dir (PNG files)
+    or show_plots is given.
+
+    Returns:
+        Dictionary of accuracy, precision, recall, f1, roc_auc and pr_auc
+    """
+    evaluator = stream_evaluate(model, threshold, X_test, y_test, segments=segments,
+                                chunk_size=chunk_size, n_bootstrap=n_bootstrap)
+    report = evaluator.result()
+    print_report(report)
+    if plot_dir or show_plots:
+        plot_report(report, evaluator.curves(), plot_dir, show_plots)
+    return report['metrics']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a saved model on a labelled CSV/Parquet file")
+    parser.add_argument('data_path', help="Raw transactions with an is_fraud label column")
+    parser.add_argument('--model-name', default="fraud_model")
+    parser.add_argument('--chunk-size', type=int, default=EVAL_CHUNK_SIZE)
+    parser.add_argument('--n-bootstrap', type=int, default=EVAL_N_BOOTSTRAP)
+    parser.add_argument('--output', help="Write the JSON report here")
+    parser.add_argument('--plot-dir', help="Write PNG plots here")
+    args = parser.parse_args(argv)
+
+    from .batch import iter_chunks
+    from .inference import FraudPredictor
+    from .preprocessing import feature_engineering
+
+    # Request metrics and drift monitoring would only queue whole chunks here
+    predictor = FraudPredictor(args.model_name, metrics=None, drift=False)
+    evaluator = StreamingEvaluator(predictor.threshold, n_bootstrap=args.n_bootstrap)
+    for chunk in iter_chunks(args.data_path, args.chunk_size):
+        probabilities = predictor.predict(chunk, return_proba=True)
+        evaluator.update(chunk['is_fraud'].to_numpy(), probabilities,
+                         feature_engineering(chunk, columns=evaluator.segments))
+
+    report = evaluator.result()
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report_json(report))
+    if args.plot_dir:
+        for path in plot_report(report, evaluator.curves(), args.plot_dir):
+            print(f"Plot saved to {path}")
+
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# fast_path.py
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from .preprocessing import HIGH_RISK_CATEGORIES
+
+
+def _parse_timestamp(value):
+    """Parse a timestamp without building a pandas Series"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        # Fall back to pandas for the less common formats
+        return pd.Timestamp(value).to_pydatetime()
+
+
+def _to_float(value):
+    """Convert a raw field to float, mapping missing values to NaN"""
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def engineer_single(transaction):
+    """Compute the engineered features of one transaction dict
+
+    Mirrors preprocessing.feature_engineering for a single row.
+    """
+    features = dict(transaction)
+
+    ts = _parse_timestamp(transaction['timestamp'])
+    features['hour'] = ts.hour
+    features['day_of_week'] = ts.weekday()
+    features['month'] = ts.month
+
+    amount = _to_float(transaction.get('amount'))
+    old_balance = _to_float(transaction.get('old_balance'))
+    new_balance = _to_float(transaction.get('new_balance'))
+    features['balance_diff'] = old_balance - new_balance
+    features['overdraft_attempt'] = int(amount > old_balance)
+    features['amount_to_balance_ratio'] = amount / (old_balance + 1e-6)
+
+    features['is_night'] = int(ts.hour < 5 or ts.hour > 22)
+    features['is_high_risk_category'] = int(transaction.get('category') in HIGH_RISK_CATEGORIES)
+
+    location = transaction.get('location')
+    features['country'] = location.split(',')[-1].strip() if isinstance(location, str) else None
+
+    return features
+
+
+class CompiledPreprocessor:
+    """Fitted ColumnTransformer flattened into plain NumPy lookups
+
+    Built once from the fitted preprocessor (imputer statistics, scaler
+    moments and one-hot vocabularies) so a single transaction can be mapped
+    straight to its feature vector without pandas or sklearn dispatch.
+    With sparse=True the output is a scipy CSR matrix, matching a
+    get_preprocessor(sparse=True) ColumnTransformer.
+    """
+
+    def __init__(self, numeric_features, num_medians, num_means, num_scales,
+                 categorical_features, cat_fill, categories, sparse=False):
+        self.numeric_features = list(numeric_features)
+        self.num_medians = np.asarray(num_medians, dtype=np.float64)
+        self.num_means = np.asarray(num_means, dtype=np.float64)
+        self.num_scales = np.asarray(num_scales, dtype=np.float64)
+        self.categorical_features = list(categorical_features)
+        self.cat_fill = list(cat_fill)
+        self.categories = [list(c) for c in categories]
+        self.sparse = bool(sparse)
+        self.feature_columns = self.numeric_features + self.categorical_features
+
+        # Map each (column, category) pair to its absolute output index
+        self.cat_index = []
+        self.cat_offsets = []
+        offset = len(self.numeric_features)
+        for values in self.categories:
+            self.cat_offsets.append(offset)
+            self.cat_index.append({value: offset + i for i, value in enumerate(values)})
+            offset += len(values)
+        self.n_features = offset
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """Extract the constants of a fitted get_preprocessor() ColumnTransformer"""
+        transformers = {name: (pipeline, columns)
+                        for name, pipeline, columns in preprocessor.transformers_}
+        if set(transformers) - {'num', 'cat', 'remainder'}:
+            raise ValueError("Unsupported preprocessor layout for the compiled path")
+        if 'remainder' in transformers and transformers['remainder'][0] != 'drop':
+            raise ValueError("Compiled path only supports remainder='drop'")
+
+        num_pipeline, num_columns = transformers['num']
+        n_num = len(num_columns)
+        scaler = num_pipeline.named_steps['scaler']
+        means = scaler.mean_ if scaler.mean_ is not None else np.zeros(n_num)
+        scales = scaler.scale_ if scaler.scale_ is not None else np.ones(n_num)
+
+        cat_pipeline, cat_columns = transformers['cat']
+        onehot = cat_pipeline.named_steps['onehot']
+        if onehot.drop is not None:
+            raise ValueError("Compiled path does not support OneHotEncoder(drop=...)")
+
+        return cls(num_columns, num_pipeline.named_steps['imputer'].statistics_, means, scales,
+                   cat_columns, cat_pipeline.named_steps['imputer'].statistics_,
+                   onehot.categories_, sparse=getattr(preprocessor, 'sparse_output_', False))
+
+    def _numeric_block(self, X):
+        numeric = X[self.numeric_features].to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+        missing = np.isnan(numeric)
+        if missing.any():
+            numeric = np.where(missing, self.num_medians, numeric)
+        numeric -= self.num_means
+        numeric /= self.num_scales
+        return numeric
+
+    def _category_codes(self, X):
+        """Absolute output column per (row, categorical feature), -1 if unknown"""
+        codes = np.empty((len(X), len(self.categorical_features)), dtype=np.int64)
+        for j, (name, fill, values, offset) in enumerate(zip(
+                self.categorical_features, self.cat_fill, self.categories, self.cat_offsets)):
+            column = X[name]
+            if column.isna().any():
+                column = column.fillna(fill)
+            # Unknown categories get code -1 and stay all zeros
+            column_codes = pd.Index(values).get_indexer(column).astype(np.int64)
+            codes[:, j] = np.where(column_codes >= 0, offset + column_codes, -1)
+        return codes
+
+    def transform(self, X):
+        """Vectorized equivalent of preprocessor.transform for a DataFrame"""
+        n_rows = len(X)
+        n_num = len(self.numeric_features)
+        numeric = self._numeric_block(X)
+        codes = self._category_codes(X)
+        if self.sparse:
+            return self._to_csr(numeric, codes)
+
+        out = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        out[:, :n_num] = numeric
+        rows, cols = np.nonzero(codes >= 0)
+        out[rows, codes[rows, cols]] = 1.0
+        return out
+
+    def _to_csr(self, numeric, codes):
+        """Assemble CSR output without ever materializing the dense one-hot block
+
+        Explicit zeros are dropped, as in ColumnTransformer's sparse hstack,
+        so XGBoost sees the same missing entries at training and scoring time.
+        """
+        from scipy import sparse
+
+        n_rows, n_num = numeric.shape
+        # Per row: numeric columns in order, then the (increasing) one-hot columns
+        columns = np.concatenate([np.broadcast_to(np.arange(n_num), (n_rows, n_num)), codes], axis=1)
+        values = np.concatenate([numeric, np.ones(codes.shape)], axis=1)
+        keep = (columns >= 0) & (values != 0)
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(keep.sum(axis=1), out=indptr[1:])
+        return sparse.csr_matrix((values[keep], columns[keep], indptr),
+                                 shape=(n_rows, self.n_features))
+
+    def transform_one(self, transaction):
+        """Map one transaction dict to its transformed feature vector
+
+        Returns:
+            Array (or CSR matrix when sparse) of shape (1, n_features)
+            matching preprocessor.transform
+        """
+        features = engineer_single(transaction)
+
+        vector = np.zeros((1, self.n_features), dtype=np.float64)
+        row = vector[0]
+        n_num = len(self.numeric_features)
+        for i, name in enumerate(self.numeric_features):
+            row[i] = _to_float(features.get(name))
+        missing = np.isnan(row[:n_num])
+        if missing.any():
+            row[:n_num][missing] = self.num_medians[missing]
+        row[:n_num] -= self.num_means
+        row[:n_num] /= self.num_scales
+
+        for name, fill, index in zip(self.categorical_features, self.cat_fill, self.cat_index):
+            value = features.get(name)
+            if value is None or (isinstance(value, float) and math.isnan(value)):
+                value = fill
+            position = index.get(value)
+            # Unknown categories encode to all zeros (handle_unknown='ignore')
+            if position is not None:
+                row[position] = 1.0
+
+        if self.sparse:
+            from scipy import sparse
+            return sparse.csr_matrix(vector)
+        return vector
@@ -0,0 +1,176 @@
+# incremental.py
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .artifact import BoosterClassifier, has_bundle, load_bundle, save_bundle
+from .batch import iter_chunks
+from .config import (MODEL_DIR, RANDOM_STATE, MIN_PRECISION, MIN_RECALL, OOC_XGB_PARAMS,
+                     USE_VELOCITY_FEATURES, INCREMENTAL_EXTRA_ROUNDS, INCREMENTAL_LEARNING_RATE,
+                     INCREMENTAL_RESAMPLING)
+from .drift import build_reference_profile
+from .fast_path import CompiledPreprocessor
+from .out_of_core import TARGET, _resample
+from .preprocessing import feature_engineering
+from .training import find_optimal_threshold, threshold_holdout_split
+
+
+def load_base_model(model_name="fraud_model", model_dir=None, version=None):
+    """Saved model to continue training from (version defaults to the active one)
+
+    Returns:
+        Tuple of (CompiledPreprocessor, xgboost.Booster, training parameters,
+        version label)
+    """
+    if has_bundle(model_name, model_dir, version):
+        compiled, classifier, _, manifest = load_bundle(model_name, model_dir, version=version)
+        return compiled, classifier.get_booster(), classifier.get_xgb_params(), manifest['version']
+
+    import joblib
+    model_dir = model_dir or MODEL_DIR
+    preprocessor = joblib.load(os.path.join(model_dir, f"{model_name}_preprocessor.joblib"))
+    classifier = joblib.load(os.path.join(model_dir, f"{model_name}_classifier.joblib"))
+    params = {name: value for name, value in classifier.get_xgb_params().items()
+              if value is not None and name not in ('n_jobs', 'nthread')}
+    return (CompiledPreprocessor.from_preprocessor(preprocessor), classifier.get_booster(),
+            params, 'joblib')
+
+
+def _used_rounds(booster):
+    """Drop trees past an early-stopping best_iteration, which scoring ignores"""
+    best_iteration = booster.attr('best_iteration')
+    if best_iteration is None:
+        return booster
+    booster = booster[:int(best_iteration) + 1]
+    booster.set_attr(best_iteration=None, best_score=None)
+    return booster
+
+
+def unseen_category_share(preprocessor, X):
+    """Share of rows per categorical feature with a value the encoder never saw
+
+    Such values one-hot encode to all zeros, so a high share means the new
+    data needs a full retrain rather than a warm start.
+    """
+    return {name: float((X[name].notna() & ~X[name].isin(categories)).mean())
+            for name, categories in zip(preprocessor.categorical_features, preprocessor.categories)}
+
+
+def train_incremental(X_new, y_new, model_name="fraud_model", model_dir=None,
+                      extra_rounds=INCREMENTAL_EXTRA_ROUNDS, learning_rate=INCREMENTAL_LEARNING_RATE,
+                      resampling=INCREMENTAL_RESAMPLING, base_version=None):
+    """Continue boosting a saved model on new labeled data only
+
+    The preprocessor stays fixed: the existing trees split on features
+    scaled with its statistics, so refitting them would move every split.
+    A stratified holdout of the new data is kept for threshold selection;
+    the rest is resampled and boosted for extra_rounds more rounds with the
+    model's own training parameters.
+
+    Args:
+        X_new, y_new: Feature-engineered new transactions and labels
+        model_name, model_dir: Saved model (bundle, else joblib files)
+        extra_rounds: Boosting rounds to add
+        learning_rate: Learning rate for the new rounds (None keeps the model's)
+        resampling: 'chunk_smote' (SMOTE over the new rows), 'weight' or 'none'
+        base_version: Bundle version to start from (defaults to the active one)
+
+    Returns:
+        Tuple of (CompiledPreprocessor, BoosterClassifier, X_holdout, y_holdout)
+        with the holdout still feature-engineered, not transformed
+    """
+    import xgboost
+
+    preprocessor, booster, params, base_version = load_base_model(model_name, model_dir, base_version)
+    if not params:
+        print("No training parameters saved with the model; using OOC_XGB_PARAMS")
+        params = dict(OOC_XGB_PARAMS)
+    if learning_rate is not None:
+        params = {name: value for name, value in params.items() if name != 'eta'}
+        params['learning_rate'] = learning_rate
+
+    X_fit, X_holdout, y_fit, y_holdout = threshold_holdout_split(X_new, y_new)
+    for name, share in unseen_category_share(preprocessor, X_fit).items():
+        if share > 0:
+            print(f"{share:.1%} of new rows have a {name} value unseen by the preprocessor")
+
+    start = time.perf_counter()
+    y = np.asarray(y_fit).astype(int)
+    n_pos = int(y.sum())
+    X_t, y, weight = _resample(preprocessor.transform(X_fit), y, resampling, RANDOM_STATE,
+                               (len(y) - n_pos) / max(n_pos, 1))
+    booster = _used_rounds(booster)
+    base_rounds = booster.num_boosted_rounds()
+    booster = xgboost.train(params, xgboost.DMatrix(X_t, label=y, weight=weight),
+                            num_boost_round=extra_rounds, xgb_model=booster)
+    print(f"Boosted model {base_version} from {base_rounds} to {booster.num_boosted_rounds()} "
+          f"rounds on {len(X_fit)} new rows in {time.perf_counter() - start:.1f}s")
+
+    return preprocessor, BoosterClassifier(booster, params), X_holdout, y_holdout
+
+
+def retrain_incremental(X_new, y_new, model_name="fraud_model", model_dir=None, output_name=None,
+                        version=None, activate=False, **kwargs):
+    """Warm-start retrain, reselect the threshold and save a new bundle version
+
+    Keyword arguments go to train_incremental. The threshold and the drift
+    reference profile both come from the holdout of the new data. The new
+    version is saved next to the served one and, unless activate is set,
+    left inactive: promote it with ModelRegistry.reload(version=...) (POST
+    /admin/reload), which canary-checks it first. Earlier versions stay on
+    disk for rollback.
+
+    Returns:
+        Tuple of (version directory, threshold)
+    """
+    preprocessor, classifier, X_holdout, y_holdout = train_incremental(
+        X_new, y_new, model_name, model_dir, **kwargs)
+    y_proba = classifier.predict_proba(preprocessor.transform(X_holdout))[:, 1]
+    threshold = find_optimal_threshold(classifier, X_holdout, y_holdout, min_precision=MIN_PRECISION,
+                                       min_recall=MIN_RECALL, y_proba=y_proba)
+    path = save_bundle(preprocessor, classifier, threshold, output_name or model_name, model_dir,
+                       version=version, drift_profile=build_reference_profile(X_holdout, y_proba),
+                       activate=activate)
+    return path, threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continue boosting a saved fraud model on new labeled data")
+    parser.add_argument('input_path', help="CSV or Parquet with only the new transactions and is_fraud")
+    parser.add_argument('--model-name', default="fraud_model")
+    parser.add_argument('--output-name', default=None,
+                        help="Bundle name for the new version (defaults to --model-name)")
+    parser.add_argument('--version', default=None, help="Label of the new version")
+    parser.add_argument('--base-version', default=None, help="Version to start from (default: active)")
+    parser.add_argument('--activate', action='store_true',
+                        help="Make the new version active immediately instead of promoting it via "
+                             "/admin/reload")
+    parser.add_argument('--extra-rounds', type=int, default=INCREMENTAL_EXTRA_ROUNDS)
+    parser.add_argument('--learning-rate', type=float, default=INCREMENTAL_LEARNING_RATE)
+    parser.add_argument('--resampling', default=INCREMENTAL_RESAMPLING,
+                        choices=['chunk_smote', 'weight', 'none'])
+    args = parser.parse_args(argv)
+
+    df = pd.concat(iter_chunks(args.input_path), ignore_index=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = feature_engineering(df)
+    if USE_VELOCITY_FEATURES:
+        # Customer history only reaches back to the start of this file
+        from .velocity import compute_velocity_features
+        df = df.join(compute_velocity_features(df))
+
+    path, threshold = retrain_incremental(
+        df.drop(columns=[TARGET]), df[TARGET], args.model_name, output_name=args.output_name,
+        version=args.version, activate=args.activate, extra_rounds=args.extra_rounds,
+        learning_rate=args.learning_rate, resampling=args.resampling, base_version=args.base_version)
+    print(f"Bundle version saved to {path} (threshold {threshold:.4f})")
+    if not args.activate:
+        print(f"Not active yet; promote it with POST /admin/reload "
+              f'{{"version": "{os.path.basename(path)}"}}')
+
+
+if __name__ == "__main__":
+    main()
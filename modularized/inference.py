@@ -1,26 +1,100 @@
 # inference.py
 import pandas as pd
 import numpy as np
-import joblib
 import os
-from .preprocessing import feature_engineering
-from .config import MODEL_DIR
+import time
+from .preprocessing import feature_engineering, get_feature_columns
+from .fast_path import CompiledPreprocessor
+from .artifact import DRIFT_PROFILE_NAME, MANIFEST_NAME, bundle_path, bundle_root, load_bundle_dir
+from .drift import DriftMonitor, load_profile, profile_path
+from .velocity import VELOCITY_FEATURES, VelocityFeatureStore
+from .metrics import METRICS, BATCH_SIZE_BUCKETS
+from .tree_engine import TreeEngineClassifier
+from .config import (MODEL_DIR, RISK_HIGH_THRESHOLD, RISK_MEDIUM_THRESHOLD,
+                     VELOCITY_MAX_CUSTOMERS, INFERENCE_ENGINE, TREE_ENGINE_MAX_ROWS,
+                     DRIFT_ENABLED)
+
+
+def risk_levels(probabilities):
+    """Map fraud probabilities to HIGH/MEDIUM/LOW risk labels"""
+    probabilities = np.asarray(probabilities)
+    return np.select(
+        [probabilities > RISK_HIGH_THRESHOLD, probabilities > RISK_MEDIUM_THRESHOLD],
+        ['HIGH', 'MEDIUM'], default='LOW')
 
 
 class FraudPredictor:
     """Class for making fraud predictions on new data"""
     
-    def __init__(self, model_name="fraud_model"):
-        """Initialize the predictor by loading model components"""
+    def __init__(self, model_name="fraud_model", use_fast_path=True, model_dir=None,
+                 metrics=METRICS, engine=INFERENCE_ENGINE, drift=DRIFT_ENABLED, version=None):
+        """Initialize the predictor by loading model components
+        
+        version selects a saved bundle version (defaults to the active one).
+        Per-stage latencies are recorded to metrics (None disables them).
+        engine selects how trees are evaluated: 'xgboost', 'numpy' or 'auto'
+        (numpy for calls of up to TREE_ENGINE_MAX_ROWS rows); with a bundle,
+        'numpy' never imports xgboost and 'auto' only on its first large
+        call. With drift,
+        scored rows feed a DriftMonitor when the model has a reference profile.
+        """
+        if engine not in ('xgboost', 'numpy', 'auto'):
+            raise ValueError(f"Unknown inference engine: {engine}")
         self.model_name = model_name
+        self.model_dir = model_dir or MODEL_DIR
+        self.requested_version = version
+        self.bundle_version = None
+        self.engine = engine
+        self.metrics = metrics
         self.preprocessor = None
         self.classifier = None
         self.threshold = None
+        self.compiled = None
+        self.feature_columns = None
+        self.manifest = None
+        self.velocity_store = None
+        self.drift_profile = None
+        self.drift = None
         self._load_model_components()
+        
+        # Models trained with velocity features need live per-customer state
+        self.velocity_columns = [col for col in self.feature_columns if col in VELOCITY_FEATURES]
+        if self.velocity_columns:
+            self.velocity_store = VelocityFeatureStore(max_customers=VELOCITY_MAX_CUSTOMERS)
+        if use_fast_path and self.compiled is None:
+            self._compile_fast_path()
+        elif not use_fast_path:
+            self.compiled = None
+        if engine != 'xgboost':
+            self._use_tree_engine(engine)
+        if drift:
+            self.enable_drift_monitor()
     
     def _load_model_components(self):
         """Load preprocessor, classifier, and threshold"""
-        model_dir = MODEL_DIR
+        model_dir = self.model_dir
+        
+        # Prefer the consolidated artifact bundle when one exists; the
+        # version is resolved once so every file comes from the same one
+        path = bundle_path(self.model_name, model_dir, self.requested_version)
+        if self.requested_version is not None and not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            raise FileNotFoundError(f"No bundle version {self.requested_version} of {self.model_name}")
+        if os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            # The NumPy engine scores from the bundle's compiled trees, so
+            # xgboost is only imported if a batch falls back to it
+            self.compiled, self.classifier, self.threshold, self.manifest = load_bundle_dir(
+                path, lazy_booster=self.engine != 'xgboost')
+            if path != bundle_root(self.model_name, model_dir):
+                self.bundle_version = os.path.basename(path)
+            self.preprocessor = self.compiled
+            self.feature_columns = self.compiled.feature_columns
+            if self.manifest.get('drift_profile'):
+                self.drift_profile = load_profile(os.path.join(path, DRIFT_PROFILE_NAME))
+            print(f"Model bundle {self.manifest['version']} loaded successfully")
+            print(f"Using threshold: {self.threshold:.4f}")
+            return
+        
+        import joblib
         
         # Load preprocessor
         preprocessor_path = os.path.join(model_dir, f"{self.model_name}_preprocessor.joblib")
@@ -35,22 +109,69 @@ class FraudPredictor:
         with open(threshold_path, 'r') as f:
             self.threshold = float(f.read().strip())
         
+        # Only compute the columns the preprocessor consumes
+        self.feature_columns = get_feature_columns(self.preprocessor)
+        self.drift_profile = load_profile(profile_path(self.model_name, model_dir))
+        
         print(f"Model components loaded successfully")
         print(f"Using threshold: {self.threshold:.4f}")
     
-    def preprocess_data(self, df):
-        """Apply feature engineering to new data"""
-        # Ensure timestamp is datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
+    @property
+    def version(self):
+        """Bundle version label, or 'joblib' for models loaded from joblib files"""
+        return self.manifest['version'] if self.manifest else 'joblib'
+    
+    def _compile_fast_path(self):
+        """Precompile the single-transaction scoring path from the fitted preprocessor"""
+        try:
+            self.compiled = CompiledPreprocessor.from_preprocessor(self.preprocessor)
+        except (AttributeError, KeyError, ValueError) as e:
+            # Unexpected preprocessor layout: keep using the DataFrame path
+            print(f"Fast path disabled: {e}")
+            self.compiled = None
+    
+    def _use_tree_engine(self, engine):
+        """Score through trees compiled into NumPy arrays instead of XGBoost"""
+        try:
+            self.classifier = TreeEngineClassifier(
+                self.classifier, max_rows=TREE_ENGINE_MAX_ROWS if engine == 'auto' else None)
+        except ValueError as e:
+            # Unsupported model (objective, categorical splits): keep XGBoost
+            print(f"Tree engine disabled: {e}")
+    
+    def enable_drift_monitor(self):
+        """Start monitoring scored rows (no-op without a reference profile)"""
+        if self.drift is None and self.drift_profile is not None:
+            self.drift = DriftMonitor(self.drift_profile)
+        return self.drift
+    
+    def close(self):
+        """Stop the drift monitor thread, binning the rows it has queued
         
-        # Apply same feature engineering as training
-        df = feature_engineering(df)
+        The monitor itself is kept, so requests still in flight on this
+        predictor can submit to it without a check-then-use race.
+        """
+        if self.drift is not None:
+            self.drift.close()
+    
+    def preprocess_data(self, df):
+        """Apply feature engineering to new data
         
-        # Select features (same as training)
-        features_to_drop = ['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location']
-        features_to_drop = [col for col in features_to_drop if col in df.columns]
-        X = df.drop(features_to_drop, axis=1)
+        Builds a new frame holding only the preprocessor's input columns, so
+        the caller's DataFrame is neither copied nor modified.
+        """
+        if self.velocity_store is None:
+            return feature_engineering(df, columns=self.feature_columns)
         
+        # Velocity features come from the online store unless supplied
+        velocity = [col for col in self.feature_columns
+                    if col in VELOCITY_FEATURES and col not in df.columns]
+        X = feature_engineering(df, columns=[col for col in self.feature_columns
+                                             if col not in velocity])
+        if velocity:
+            live = self.velocity_store.transform_batch(df)
+            for col in velocity:
+                X[col] = live[col].to_numpy()
         return X
     
     def predict(self, df, return_proba=False):
@@ -63,15 +184,30 @@ class FraudPredictor:
         Returns:
             Array of predictions (0/1) or probabilities if return_proba=True
         """
+        start = time.perf_counter()
+        
         # Preprocess the data
-        X = self.preprocess_data(df.copy())
+        X = self.preprocess_data(df)
+        engineered = time.perf_counter()
         
         # Transform using fitted preprocessor
         X_transformed = self.preprocessor.transform(X)
+        transformed = time.perf_counter()
         
         # Get probabilities
         probabilities = self.classifier.predict_proba(X_transformed)[:, 1]
         
+        if self.metrics is not None:
+            self.metrics.observe_stages((
+                ('feature_engineering', engineered - start),
+                ('transform', transformed - engineered),
+                ('predict_proba', time.perf_counter() - transformed)))
+            self.metrics.observe('fraud_batch_size', len(df), buckets=BATCH_SIZE_BUCKETS,
+                                 description="Rows per scoring call", path='dataframe')
+        if self.drift is not None:
+            # X is a new frame nobody modifies later, so it is queued as is
+            self.drift.submit(X, probabilities)
+        
         if return_proba:
             return probabilities
         else:
@@ -79,6 +215,19 @@ class FraudPredictor:
             predictions = (probabilities >= self.threshold).astype(int)
             return predictions
     
+    def predict_with_scores(self, df):
+        """Score new data once and return every output together
+        
+        Args:
+            df: DataFrame with transaction data
+        
+        Returns:
+            Tuple of (probabilities, predictions, risk levels) arrays
+        """
+        probabilities = self.predict(df, return_proba=True)
+        predictions = (probabilities >= self.threshold).astype(int)
+        return probabilities, predictions, risk_levels(probabilities)
+    
     def predict_single(self, transaction_dict):
         """Predict on a single transaction
         
@@ -88,11 +237,35 @@ class FraudPredictor:
         Returns:
             Tuple of (prediction, probability)
         """
-        # Convert to DataFrame
-        df = pd.DataFrame([transaction_dict])
+        stages = []
+        start = time.perf_counter()
+        if self.velocity_store is not None and not all(
+                col in transaction_dict for col in self.velocity_columns):
+            # Like preprocess_data, the store is only used when features are not supplied
+            transaction_dict = {**self.velocity_store.update(
+                transaction_dict.get('customer_id'), transaction_dict['timestamp'],
+                transaction_dict['amount']), **transaction_dict}
+            stages.append(('velocity', time.perf_counter() - start))
+            start = time.perf_counter()
+        
+        if self.compiled is not None:
+            # Compiled path: dict -> feature vector -> classifier
+            X_transformed = self.compiled.transform_one(transaction_dict)
+            transformed = time.perf_counter()
+            prob = self.classifier.predict_proba(X_transformed)[0, 1]
+            stages.append(('transform_one', transformed - start))
+            stages.append(('predict_proba', time.perf_counter() - transformed))
+            if self.drift is not None:
+                self.drift.submit(transaction_dict, prob)
+        else:
+            # Convert to DataFrame (predict records its own stages)
+            df = pd.DataFrame([transaction_dict])
+            stages.append(('dataframe', time.perf_counter() - start))
+            prob = self.predict(df, return_proba=True)[0]
+        
+        if self.metrics is not None:
+            self.metrics.observe_stages(stages)
         
-        # Get prediction and probability
-        prob = self.predict(df, return_proba=True)[0]
         pred = int(prob >= self.threshold)
         
         return pred, prob
@@ -155,12 +328,13 @@ def example_usage():
         }
     ])
     
-    predictions = predictor.predict(batch_data)
-    probabilities = predictor.predict(batch_data, return_proba=True)
+    probabilities, predictions, _ = predictor.predict_with_scores(batch_data)
     
     print("\nBatch predictions:")
     for i, (pred, prob) in enumerate(zip(predictions, probabilities)):
         print(f"Transaction {i+1}: {'Fraud' if pred else 'Legitimate'} (probability: {prob:.4f})")
+    
+    predictor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,279 @@
+# metrics.py
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+
+from .config import METRICS_ENABLED, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+
+# Latency buckets in seconds: 1 / 2.5 / 5 steps per decade, 10us to 10s
+LATENCY_BUCKETS = tuple(m * 10.0 ** e for e in range(-5, 1) for m in (1, 2.5, 5)) + (10.0,)
+# Rows per scoring call
+BATCH_SIZE_BUCKETS = tuple(float(2 ** i) for i in range(17))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and three additions
+
+    Quantiles are estimated from the buckets by linear interpolation, as
+    Prometheus' histogram_quantile does.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by metric name and labels"""
+
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, description='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+                self._help.setdefault(name, description)
+            histogram.observe(value)
+
+    def observe_stages(self, stages):
+        """Record (stage, seconds) pairs of one scoring call under a single lock"""
+        with self._lock:
+            for stage, seconds in stages:
+                key = ('fraud_stage_seconds', (('stage', stage),))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(LATENCY_BUCKETS)
+                    self._help.setdefault('fraud_stage_seconds', "Latency of each scoring stage")
+                histogram.observe(seconds)
+
+    def inc(self, name, value=1, description='', **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+            self._help.setdefault(name, description)
+
+    def record_predictions(self, n_fraud, n_total):
+        self.inc('fraud_predictions_total', n_fraud, description="Scored transactions by outcome",
+                 outcome='fraud')
+        self.inc('fraud_predictions_total', n_total - n_fraud, outcome='legit')
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """Counters plus count, mean and p50/p95/p99 of every histogram"""
+        with self._lock:
+            histograms = {}
+            for (name, labels), h in sorted(self._histograms.items()):
+                entry = {'count': h.count, 'mean': h.sum / h.count if h.count else None}
+                for q in self.QUANTILES:
+                    entry[f'p{int(q * 100)}'] = h.quantile(q)
+                histograms[name + _format_labels(labels)] = entry
+            counters = {name + _format_labels(labels): value
+                        for (name, labels), value in sorted(self._counters.items())}
+        n_fraud = counters.get('fraud_predictions_total{outcome="fraud"}', 0)
+        n_total = n_fraud + counters.get('fraud_predictions_total{outcome="legit"}', 0)
+        return {'histograms': histograms, 'counters': counters,
+                'fraud_rate': n_fraud / n_total if n_total else None}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)
+
+        Latency histograms are also exported as <name>_quantile gauges
+        (p50/p95/p99) for dashboards that do not run histogram_quantile.
+        """
+        with self._lock:
+            families = {}
+            for (name, labels), value in self._counters.items():
+                families.setdefault((name, 'counter'), []).append((labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                families.setdefault((name, 'histogram'), []).append((labels, histogram))
+                if histogram.buckets is LATENCY_BUCKETS and histogram.count:
+                    for q in self.QUANTILES:
+                        families.setdefault((name + '_quantile', 'gauge'), []).append(
+                            (labels + (('quantile', str(q)),), histogram.quantile(q)))
+
+            lines = []
+            for (name, kind), series in sorted(families.items()):
+                description = self._help.get(name) or f"Quantiles of {name[:-len('_quantile')]}"
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(series, key=lambda s: s[0]):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, n in zip(value.buckets + (float('inf'),), value.counts):
+                        cumulative += n
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = Metrics() if METRICS_ENABLED else None
+
+
+def record_request(endpoint, seconds, status):
+    """Latency and request/error counters of one handled request"""
+    if METRICS is None:
+        return
+    METRICS.observe('fraud_request_seconds', seconds,
+                    description="End-to-end handler latency", endpoint=endpoint)
+    METRICS.inc('fraud_requests_total', description="Requests by endpoint and status",
+                endpoint=endpoint, status=status)
+    if status >= 400:
+        METRICS.inc('fraud_errors_total', description="Requests answered with an error status",
+                    endpoint=endpoint)
+
+
+def instrumented(endpoint):
+    """Record latency, request/error counts of a (response, status) handler"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            if METRICS is None:
+                return handler(*args, **kwargs)
+            start = time.perf_counter()
+            response, status = handler(*args, **kwargs)
+            record_request(endpoint, time.perf_counter() - start, status)
+            return response, status
+        return wrapper
+    return decorator
+
+
+# Background threads that never score requests (the profiler's own included)
+PROFILER_IGNORED_THREADS = ('fraud-profiler', 'fraud-drift', 'fraud-shadow', 'fraud-model-watch')
+
+# Innermost Python frames of a thread blocked on a lock, condition or queue
+_IDLE_LEAVES = {('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+                ('queue.py', 'get')}
+
+
+class SamplingProfiler:
+    """Statistical profiler of the scoring threads, toggled at runtime
+
+    A daemon thread samples every other thread's stack each interval and
+    counts stacks that pass through path_filter, in the folded format
+    flamegraph.pl and speedscope read ("outer;...;inner count"). Threads
+    named in ignore_threads and threads idle in a threading/queue wait are
+    not counted, so the samples show where requests spend their time.
+    Sampling stops by itself after max_seconds.
+    """
+
+    def __init__(self, interval_ms=PROFILER_INTERVAL_MS, max_seconds=PROFILER_MAX_SECONDS,
+                 path_filter=os.path.dirname(os.path.abspath(__file__)),
+                 ignore_threads=PROFILER_IGNORED_THREADS):
+        self.interval_ms = interval_ms
+        self.max_seconds = max_seconds
+        self.path_filter = path_filter
+        self.ignore_threads = tuple(ignore_threads)
+        self._lock = threading.Lock()
+        self._stacks = {}
+        self._samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=None, max_seconds=None):
+        if self.running:
+            return
+        self.interval_ms = interval_ms or self.interval_ms
+        self.max_seconds = max_seconds or self.max_seconds
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fraud-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+
+    def folded(self):
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda s: -s[1])
+        return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def stats(self):
+        with self._lock:
+            return {'running': self.running, 'interval_ms': self.interval_ms,
+                    'samples': self._samples, 'distinct_stacks': len(self._stacks)}
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval_ms / 1000.0) and time.monotonic() < deadline:
+            sampled = []
+            ignored = {thread.ident for thread in threading.enumerate()
+                       if thread.name.startswith(self.ignore_threads)}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or thread_id in ignored:
+                    continue
+                leaf = frame.f_code
+                if (os.path.basename(leaf.co_filename), leaf.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                relevant = False
+                while frame is not None:
+                    code = frame.f_code
+                    relevant = relevant or code.co_filename.startswith(self.path_filter)
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if relevant:
+                    sampled.append(';'.join(reversed(stack)))
+            with self._lock:
+                self._samples += 1
+                for stack in sampled:
+                    self._stacks[stack] = self._stacks.get(stack, 0) + 1
+
+
+PROFILER = SamplingProfiler()
@@ -0,0 +1,155 @@
+# microbatch.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from .config import MICROBATCH_MAX_BATCH_SIZE, MICROBATCH_MAX_WAIT_MS
+from .metrics import METRICS
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-transaction requests into vectorized batches
+
+    Callers submit one transaction each; a background thread collects
+    requests for up to max_wait_ms or max_batch_size items, scores them with
+    a single FraudPredictor.predict_with_scores call and resolves each
+    caller's future with its own (prediction, probability).
+    """
+
+    def __init__(self, predictor, max_batch_size=MICROBATCH_MAX_BATCH_SIZE,
+                 max_wait_ms=MICROBATCH_MAX_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_size_counts = {}
+        self._n_batches = 0
+        self._n_items = 0
+        self._n_errors = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fraud-microbatcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, transaction_dict):
+        """Queue a transaction and return a Future of (prediction, probability)"""
+        if not self._running:
+            raise RuntimeError("MicroBatcher has been stopped")
+        future = Future()
+        self._queue.put((transaction_dict, future))
+        return future
+
+    def predict_single(self, transaction_dict, timeout=None):
+        """Blocking drop-in for FraudPredictor.predict_single"""
+        return self.submit(transaction_dict).result(timeout=timeout)
+
+    def stop(self):
+        """Stop the worker thread after draining queued requests"""
+        self._running = False
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        """Achieved batch sizes and request counters"""
+        with self._lock:
+            return {
+                'batches': self._n_batches,
+                'items': self._n_items,
+                'errors': self._n_errors,
+                'mean_batch_size': self._n_items / self._n_batches if self._n_batches else 0.0,
+                'batch_size_counts': dict(sorted(self._batch_size_counts.items())),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+            }
+
+    def _collect(self, first):
+        """Gather requests until the batch is full or the wait budget is spent"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop sentinel: score what we have, then let _run exit
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                if not self._running and self._queue.empty():
+                    return
+                continue
+            batch = self._collect(item)
+            self._score(batch)
+
+    def _apply_velocity(self, batch):
+        """Record each transaction in the velocity store once, before scoring
+
+        The features are added to the transaction, so neither the batch nor
+        the per-transaction fallback updates the store again. Transactions
+        the store rejects fail on their own.
+        """
+        store = getattr(self.predictor, 'velocity_store', None)
+        if store is None:
+            return batch
+        applied = []
+        for transaction, future in batch:
+            try:
+                features = store.update(transaction.get('customer_id'), transaction['timestamp'],
+                                        transaction['amount'])
+            except Exception as e:
+                with self._lock:
+                    self._n_errors += 1
+                future.set_exception(e)
+                continue
+            applied.append(({**features, **transaction}, future))
+        return applied
+
+    def _score(self, batch):
+        size = len(batch)
+        batch = self._apply_velocity(batch)
+        if not batch:
+            self._record(size)
+            return
+        transactions = [transaction for transaction, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            start = time.perf_counter()
+            df = pd.DataFrame(transactions)
+            if METRICS is not None:
+                METRICS.observe_stages((('dataframe', time.perf_counter() - start),))
+            probabilities, predictions, _ = self.predictor.predict_with_scores(df)
+        except Exception:
+            # One malformed request should not fail its neighbours
+            self._score_individually(batch)
+            self._record(size)
+            return
+
+        for future, pred, prob in zip(futures, predictions.tolist(), probabilities.tolist()):
+            future.set_result((pred, prob))
+        self._record(size)
+
+    def _record(self, size):
+        with self._lock:
+            self._n_batches += 1
+            self._n_items += size
+            self._batch_size_counts[size] = self._batch_size_counts.get(size, 0) + 1
+
+    def _score_individually(self, batch):
+        for transaction, future in batch:
+            try:
+                future.set_result(self.predictor.predict_single(transaction))
+            except Exception as e:
+                with self._lock:
+                    self._n_errors += 1
+                future.set_exception(e)
@@ -0,0 +1,288 @@
+# out_of_core.py
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .batch import iter_chunks
+from .config import (RANDOM_STATE, OOC_CHUNK_SIZE, OOC_RESERVOIR_SIZE, OOC_HOLDOUT_EVERY,
+                     OOC_MAX_HOLDOUT_ROWS, OOC_RESAMPLING, OOC_XGB_PARAMS, OOC_NUM_BOOST_ROUND,
+                     SPARSE_ONEHOT)
+from .fast_path import CompiledPreprocessor
+from .preprocessing import feature_engineering
+
+NUMERIC_FEATURES = ['amount', 'old_balance', 'new_balance', 'age', 'hour',
+                    'day_of_week', 'balance_diff', 'amount_to_balance_ratio']
+CATEGORICAL_FEATURES = ['category', 'gender', 'transaction_type', 'country']
+TARGET = 'is_fraud'
+
+
+class _Reservoir:
+    """Fixed-size uniform sample of a stream, for approximate medians"""
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.sample = np.empty(size, dtype=np.float64)
+        self.seen = 0
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        n_fill = min(max(self.size - self.seen, 0), len(values))
+        if n_fill:
+            self.sample[self.seen:self.seen + n_fill] = values[:n_fill]
+        rest = values[n_fill:]
+        if len(rest):
+            # Algorithm R, vectorized: value i replaces a slot with prob size/(i+1)
+            positions = self.seen + n_fill + np.arange(len(rest))
+            slots = (self.rng.random(len(rest)) * (positions + 1)).astype(np.int64)
+            keep = slots < self.size
+            self.sample[slots[keep]] = rest[keep]
+        self.seen += len(values)
+
+    def median(self):
+        n = min(self.seen, self.size)
+        return float(np.median(self.sample[:n])) if n else np.nan
+
+
+class IncrementalPreprocessor:
+    """Streaming fit of the get_preprocessor() statistics
+
+    Accumulates, chunk by chunk and in bounded memory:
+    - approximate medians per numeric column (reservoir sample)
+    - exact count/mean/M2 of the observed numeric values (Chan's merge)
+    - exact category frequencies per categorical column
+
+    finalize() folds the median imputation into the scaler moments, the way
+    SimpleImputer -> StandardScaler sees the data, and returns a
+    CompiledPreprocessor.
+    """
+
+    def __init__(self, numeric_features=NUMERIC_FEATURES,
+                 categorical_features=CATEGORICAL_FEATURES,
+                 reservoir_size=OOC_RESERVOIR_SIZE, random_state=RANDOM_STATE,
+                 sparse=SPARSE_ONEHOT):
+        self.numeric_features = list(numeric_features)
+        self.categorical_features = list(categorical_features)
+        self.sparse = sparse
+        rng = np.random.default_rng(random_state)
+        self._reservoirs = [_Reservoir(reservoir_size, rng) for _ in self.numeric_features]
+        n_num = len(self.numeric_features)
+        self._count = np.zeros(n_num)
+        self._missing = np.zeros(n_num)
+        self._mean = np.zeros(n_num)
+        self._m2 = np.zeros(n_num)
+        self._frequencies = [{} for _ in self.categorical_features]
+
+    def partial_fit(self, X):
+        numeric = X[self.numeric_features].to_numpy(dtype=np.float64, na_value=np.nan)
+        missing = np.isnan(numeric)
+        for j, reservoir in enumerate(self._reservoirs):
+            reservoir.update(numeric[:, j])
+
+        count = (~missing).sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore'):
+            mean = np.nanmean(numeric, axis=0)
+            m2 = np.nansum((numeric - mean) ** 2, axis=0)
+        has = count > 0
+        total = self._count + count
+        delta = np.where(has, mean - self._mean, 0.0)
+        safe_total = np.where(total > 0, total, 1.0)
+        self._mean = np.where(has, self._mean + delta * count / safe_total, self._mean)
+        self._m2 = np.where(has, self._m2 + np.nan_to_num(m2) + delta ** 2 * self._count * count / safe_total,
+                            self._m2)
+        self._count = total
+        self._missing += missing.sum(axis=0)
+
+        for name, frequencies in zip(self.categorical_features, self._frequencies):
+            for value, n in X[name].value_counts(dropna=True).items():
+                frequencies[value] = frequencies.get(value, 0) + int(n)
+        return self
+
+    def finalize(self):
+        medians = np.array([r.median() for r in self._reservoirs])
+
+        # Missing values are imputed with the median before scaling
+        n = self._count + self._missing
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = medians - self._mean
+        mean = self._mean + delta * self._missing / safe_n
+        m2 = self._m2 + delta ** 2 * self._count * self._missing / safe_n
+        scale = np.sqrt(m2 / safe_n)
+        scale[scale == 0] = 1.0
+
+        fills, categories = [], []
+        for frequencies in self._frequencies:
+            vocabulary = sorted(frequencies)
+            categories.append(vocabulary)
+            # most_frequent ties resolve to the smallest value, as in SimpleImputer
+            fills.append(min(vocabulary, key=lambda v: (-frequencies[v], v)) if vocabulary else 'missing')
+
+        return CompiledPreprocessor(self.numeric_features, medians, mean, scale,
+                                    self.categorical_features, fills, categories,
+                                    sparse=self.sparse)
+
+
+def _iter_engineered(input_path, chunk_size, columns):
+    """Feature-engineered chunks with the global row offset of each"""
+    offset = 0
+    for chunk in iter_chunks(input_path, chunk_size):
+        X = feature_engineering(chunk, columns=columns)
+        yield offset, X
+        offset += len(X)
+
+
+def _holdout_mask(offset, n_rows, holdout_every, max_holdout_rows):
+    """Held-out rows of a chunk, identical in both passes
+
+    Every holdout_every-th row of the file until max_holdout_rows are held;
+    rows past that point all go to training.
+    """
+    rows = offset + np.arange(n_rows)
+    return (rows % holdout_every == 0) & (rows < holdout_every * max_holdout_rows)
+
+
+def _resample(X, y, strategy, seed, pos_weight):
+    """Memory-bounded minority resampling within one chunk
+
+    Returns:
+        Tuple of (X, y, sample weights or None)
+    """
+    if strategy == 'weight':
+        return X, y, np.where(y == 1, pos_weight, 1.0)
+    if strategy == 'chunk_smote':
+        n_minority = int((y == 1).sum())
+        if 1 < n_minority < len(y) - n_minority:
+            from imblearn.over_sampling import SMOTE
+            smote = SMOTE(random_state=seed, k_neighbors=min(5, n_minority - 1))
+            X, y = smote.fit_resample(X, y)
+        return X, y, None
+    if strategy == 'none':
+        return X, y, None
+    raise ValueError(f"Unknown resampling strategy: {strategy}")
+
+
+def _make_data_iter(input_path, chunk_size, columns, preprocessor, strategy,
+                    holdout_every, max_holdout_rows, pos_weight, cache_prefix):
+    import xgboost
+
+    class _ChunkIter(xgboost.DataIter):
+        """Feeds transformed, resampled chunks to an external-memory DMatrix"""
+
+        def __init__(self):
+            self._chunks = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def reset(self):
+            self._chunks = None
+
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = _iter_engineered(input_path, chunk_size, columns)
+            try:
+                offset, X = next(self._chunks)
+            except StopIteration:
+                return 0
+            train = ~_holdout_mask(offset, len(X), holdout_every, max_holdout_rows)
+            X_t = preprocessor.transform(X[train])
+            y = X[TARGET].to_numpy()[train].astype(int)
+            # Seed per chunk so repeated passes see identical data
+            X_t, y, weight = _resample(X_t, y, strategy, RANDOM_STATE + offset, pos_weight)
+            input_data(data=X_t, label=y, weight=weight)
+            return 1
+
+    return _ChunkIter()
+
+
+def train_out_of_core(input_path, chunk_size=OOC_CHUNK_SIZE, resampling=OOC_RESAMPLING,
+                      params=None, num_boost_round=OOC_NUM_BOOST_ROUND,
+                      holdout_every=OOC_HOLDOUT_EVERY, max_holdout_rows=OOC_MAX_HOLDOUT_ROWS,
+                      cache_dir=None):
+    """Train on a CSV/Parquet file larger than memory
+
+    Pass 1 streams the file to fit the preprocessor statistics and count the
+    classes. Pass 2 streams it again through an xgboost.DataIter into an
+    external-memory DMatrix, resampling the minority class per chunk. Every
+    holdout_every-th row is held out for threshold selection until
+    max_holdout_rows are held; all later rows are trained on. Peak memory
+    depends on chunk_size and max_holdout_rows, not on the file size.
+
+    Args:
+        input_path: Raw training data with an is_fraud column
+        chunk_size: Rows per chunk
+        resampling: 'chunk_smote' (SMOTE inside each chunk), 'weight'
+            (minority instance weights) or 'none'
+        params: XGBoost parameters (defaults to OOC_XGB_PARAMS)
+        num_boost_round: Boosting rounds
+        holdout_every: Hold out one row in this many for threshold selection
+        max_holdout_rows: Cap on held-out rows kept in memory
+        cache_dir: Directory for the external-memory cache pages
+
+    Returns:
+        Tuple of (CompiledPreprocessor, BoosterClassifier, X_holdout, y_holdout)
+    """
+    import xgboost
+    from .artifact import BoosterClassifier
+
+    columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES + [TARGET]
+
+    # Pass 1: preprocessor statistics, class counts and a bounded holdout
+    incremental = IncrementalPreprocessor()
+    n_pos = n_neg = 0
+    holdout = []
+    n_holdout = 0
+    for offset, X in _iter_engineered(input_path, chunk_size, columns):
+        held = _holdout_mask(offset, len(X), holdout_every, max_holdout_rows)
+        train = X[~held]
+        incremental.partial_fit(train)
+        n_pos += int(train[TARGET].sum())
+        n_neg += int(len(train) - train[TARGET].sum())
+        if held.any():
+            holdout.append(X[held])
+            n_holdout += int(held.sum())
+    preprocessor = incremental.finalize()
+    print(f"Fitted preprocessor statistics: {n_pos + n_neg} training rows, "
+          f"{n_pos} fraud, {n_holdout} held out")
+
+    # Pass 2: external-memory training
+    train_params = dict(OOC_XGB_PARAMS if params is None else params)
+    train_params.setdefault('tree_method', 'hist')
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp_dir:
+        data_iter = _make_data_iter(input_path, chunk_size, columns, preprocessor, resampling,
+                                    holdout_every, max_holdout_rows, n_neg / max(n_pos, 1),
+                                    os.path.join(tmp_dir, 'cache'))
+        dtrain = xgboost.DMatrix(data_iter)
+        booster = xgboost.train(train_params, dtrain, num_boost_round=num_boost_round)
+        del dtrain
+
+    holdout = pd.concat(holdout) if holdout else pd.DataFrame(columns=columns)
+    X_holdout = preprocessor.transform(holdout)
+    y_holdout = holdout[TARGET].to_numpy().astype(int)
+    return preprocessor, BoosterClassifier(booster, train_params), X_holdout, y_holdout
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a fraud model out of core and save a bundle")
+    parser.add_argument('input_path', help="CSV or Parquet training data with is_fraud")
+    parser.add_argument('--chunk-size', type=int, default=OOC_CHUNK_SIZE)
+    parser.add_argument('--resampling', default=OOC_RESAMPLING,
+                        choices=['chunk_smote', 'weight', 'none'])
+    parser.add_argument('--model-name', default="fraud_model")
+    args = parser.parse_args(argv)
+
+    from .artifact import save_bundle
+    from .config import MIN_PRECISION, MIN_RECALL
+    from .training import find_optimal_threshold
+
+    preprocessor, classifier, X_holdout, y_holdout = train_out_of_core(
+        args.input_path, chunk_size=args.chunk_size, resampling=args.resampling)
+    threshold = find_optimal_threshold(classifier, X_holdout, y_holdout,
+                                       min_precision=MIN_PRECISION, min_recall=MIN_RECALL)
+    path = save_bundle(preprocessor, classifier, threshold, args.model_name)
+    print(f"Bundle saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
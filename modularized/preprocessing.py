@@ -1,23 +1,30 @@
 # preprocessing.py
 import pandas as pd
 import numpy as np
-from .config import get_latest_dataset
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from sklearn.compose import ColumnTransformer
-from sklearn.impute import SimpleImputer
-from imblearn.pipeline import Pipeline
-from imblearn.over_sampling import SMOTE
+from .config import get_latest_dataset, USE_VELOCITY_FEATURES, USE_DATASET_CACHE, SPARSE_ONEHOT
 
-def load_and_preprocess_data():
+# sklearn/imblearn are imported inside get_preprocessor so the scoring path
+# (feature_engineering) does not pay for the training stack at import time
+
+def load_and_preprocess_data(include_velocity=USE_VELOCITY_FEATURES, use_cache=USE_DATASET_CACHE):
     """Load and preprocess the latest dataset"""
-    # Load data
     data_path = get_latest_dataset()
-    df = pd.read_csv(data_path)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    if use_cache:
+        # Parsed columns and engineered features come from the columnar cache
+        from .dataset_cache import load_dataset
+        df = load_dataset(data_path, engineered=True)
+    else:
+        # Load data
+        df = pd.read_csv(data_path)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        
+        # Feature engineering
+        df = feature_engineering(df)
     
-    # Feature engineering
-    df = feature_engineering(df)
+    # Per-customer velocity features need customer_id, so add them before it is dropped
+    if include_velocity:
+        from .velocity import compute_velocity_features
+        df = df.join(compute_velocity_features(df))
     
     # Split features and target
     X = df.drop(['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location'], axis=1)
@@ -25,31 +32,106 @@ def load_and_preprocess_data():
     
     return X, y
 
-def feature_engineering(df):
-    """Create additional features"""
-    # Time-based features
-    df['hour'] = df['timestamp'].dt.hour
-    df['day_of_week'] = df['timestamp'].dt.dayofweek
-    df['month'] = df['timestamp'].dt.month
+HIGH_RISK_CATEGORIES = ['electronics', 'travel', 'gaming']
+
+# Columns produced by feature_engineering and the raw inputs each one needs
+ENGINEERED_FEATURES = {
+    'hour': ['timestamp'],
+    'day_of_week': ['timestamp'],
+    'month': ['timestamp'],
+    'balance_diff': ['old_balance', 'new_balance'],
+    'overdraft_attempt': ['amount', 'old_balance'],
+    'amount_to_balance_ratio': ['amount', 'old_balance'],
+    'is_night': ['timestamp'],
+    'is_high_risk_category': ['category'],
+    'country': ['location'],
+}
+
+def extract_country(location):
+    """Vectorized country extraction computed once per unique location"""
+    codes, uniques = pd.factorize(location)
+    countries = np.array([str(loc).split(',')[-1].strip() for loc in uniques] + [np.nan],
+                         dtype=object)
+    # Missing locations get code -1, which indexes the trailing NaN slot
+    return pd.Series(countries[codes], index=location.index, name='country')
+
+def _engineer_column(df, name, timestamps):
+    """Compute a single engineered column as a NumPy array or Series"""
+    if name == 'hour':
+        return timestamps.dt.hour
+    if name == 'day_of_week':
+        return timestamps.dt.dayofweek
+    if name == 'month':
+        return timestamps.dt.month
+    if name == 'balance_diff':
+        return df['old_balance'].to_numpy() - df['new_balance'].to_numpy()
+    if name == 'overdraft_attempt':
+        return (df['amount'].to_numpy() > df['old_balance'].to_numpy()).astype(int)
+    if name == 'amount_to_balance_ratio':
+        return df['amount'].to_numpy() / (df['old_balance'].to_numpy() + 1e-6)
+    if name == 'is_night':
+        hour = timestamps.dt.hour.to_numpy()
+        return ((hour < 5) | (hour > 22)).astype(int)
+    if name == 'is_high_risk_category':
+        return df['category'].isin(HIGH_RISK_CATEGORIES).to_numpy().astype(int)
+    if name == 'country':
+        return extract_country(df['location'])
+    raise KeyError(name)
+
+def feature_engineering(df, columns=None):
+    """Create additional features
     
-    # Balance features
-    df['balance_diff'] = df['old_balance'] - df['new_balance']
-    df['overdraft_attempt'] = np.where(df['amount'] > df['old_balance'], 1, 0)
-    df['amount_to_balance_ratio'] = df['amount'] / (df['old_balance'] + 1e-6)
+    Args:
+        df: DataFrame with raw transaction data
+        columns: Optional list of output columns. When given, only these are
+            computed and returned in a new frame; the input is left untouched.
     
-    # Risk flags
-    df['is_night'] = df['hour'].apply(lambda x: 1 if x < 5 or x > 22 else 0)
-    df['is_high_risk_category'] = df['category'].isin(['electronics', 'travel', 'gaming']).astype(int)
+    Returns:
+        The input frame extended in place, or a new frame holding `columns`
+    """
+    timestamps = df['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
     
-    # Country extraction
-    df['country'] = df['location'].str.split(',').str[-1].str.strip()
+    if columns is None:
+        df['timestamp'] = timestamps
+        for name in ENGINEERED_FEATURES:
+            df[name] = _engineer_column(df, name, timestamps)
+        return df
     
-    return df
+    data = {}
+    for name in columns:
+        if name in ENGINEERED_FEATURES:
+            data[name] = _engineer_column(df, name, timestamps)
+        else:
+            data[name] = df[name]
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+def get_feature_columns(preprocessor):
+    """Input columns actually consumed by a fitted preprocessor"""
+    columns = []
+    for name, transformer, cols in preprocessor.transformers_:
+        if name == 'remainder' or (isinstance(transformer, str) and transformer == 'drop'):
+            continue
+        columns.extend(cols)
+    return columns
 
-def get_preprocessor():
-    """Create preprocessing pipeline"""
+def get_preprocessor(include_velocity=USE_VELOCITY_FEATURES, sparse=SPARSE_ONEHOT):
+    """Create preprocessing pipeline
+    
+    With sparse=True the one-hot block stays a CSR matrix and the whole
+    output is CSR, which SMOTE and XGBoost consume directly.
+    """
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from imblearn.pipeline import Pipeline
+    
     numeric_features = ['amount', 'old_balance', 'new_balance', 'age', 'hour', 
                        'day_of_week', 'balance_diff', 'amount_to_balance_ratio']
+    if include_velocity:
+        from .velocity import VELOCITY_FEATURES
+        numeric_features = numeric_features + VELOCITY_FEATURES
     categorical_features = ['category', 'gender', 'transaction_type', 'country']
     
     numeric_transformer = Pipeline(steps=[
@@ -58,10 +140,11 @@ def get_preprocessor():
     
     categorical_transformer = Pipeline(steps=[
         ('imputer', SimpleImputer(strategy='most_frequent')),
-        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=False))])
+        ('onehot', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse))])
     
     return ColumnTransformer(
         transformers=[
             ('num', numeric_transformer, numeric_features),
-            ('cat', categorical_transformer, categorical_features)])
+            ('cat', categorical_transformer, categorical_features)],
+        sparse_threshold=1.0 if sparse else 0.0)
 
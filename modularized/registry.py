@@ -0,0 +1,383 @@
+# registry.py
+import copy
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .artifact import MANIFEST_NAME, activate_version, bundle_path, current_version, list_versions
+from .config import (MODEL_DIR, MODEL_WATCH_INTERVAL, CANARY_SAMPLE_SIZE, CANARY_MIN_AGREEMENT,
+                     SHADOW_MAX_QUEUE, VELOCITY_MAX_CUSTOMERS, get_latest_dataset)
+from .inference import FraudPredictor
+from .metrics import METRICS
+from .velocity import VelocityFeatureStore
+
+# Rows of each batch request remembered as canary data for the next reload
+_RECENT_ROWS_PER_BATCH = 8
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def list_models(model_dir=None):
+    """Models available in model_dir, one entry per model name
+
+    A bundle takes precedence over joblib files of the same name, as in
+    FraudPredictor. Bundle entries list every saved version, oldest first;
+    version is the active one.
+    """
+    model_dir = model_dir or MODEL_DIR
+    if not os.path.isdir(model_dir):
+        return []
+
+    models = {}
+    for entry in sorted(os.listdir(model_dir)):
+        if entry.endswith('_classifier.joblib'):
+            name = entry[:-len('_classifier.joblib')]
+            models.setdefault(name, {'model_name': name, 'format': 'joblib', 'version': 'joblib'})
+        elif entry.endswith('.bundle'):
+            name = entry[:-len('.bundle')]
+            manifest_path = os.path.join(bundle_path(name, model_dir), MANIFEST_NAME)
+            if not os.path.exists(manifest_path):
+                continue
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            models[name] = {'model_name': name, 'format': 'bundle',
+                            'version': manifest.get('version'),
+                            'threshold': manifest.get('threshold'),
+                            'versions': list_versions(name, model_dir)}
+    return list(models.values())
+
+
+def _fingerprint(model_name, model_dir):
+    """Changes whenever another bundle version is activated or a model is re-saved"""
+    version = current_version(model_name, model_dir)
+    if version is not None:
+        return version
+    for path in (os.path.join(bundle_path(model_name, model_dir), MANIFEST_NAME),
+                 os.path.join(model_dir, f"{model_name}_classifier.joblib")):
+        if os.path.exists(path):
+            return os.stat(path).st_mtime_ns
+    return None
+
+
+def _dataset_canary(n_rows):
+    """First rows of the latest training dataset, if one is on disk"""
+    try:
+        df = pd.read_csv(get_latest_dataset(), nrows=n_rows)
+    except OSError:
+        return None
+    return df.drop(columns=['is_fraud'], errors='ignore')
+
+
+class _Shadow:
+    """Scores live traffic with a candidate model on a background thread
+
+    Requests are handed over through a bounded queue and dropped when it is
+    full, so the primary response never waits on the candidate.
+    """
+
+    def __init__(self, predictor, max_queue=SHADOW_MAX_QUEUE):
+        self.predictor = predictor
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._items = 0
+        self._disagreements = 0
+        self._abs_diff_sum = 0.0
+        self._max_abs_diff = 0.0
+        self._seconds = 0.0
+        self._errors = 0
+        self._dropped = 0
+        self._thread = threading.Thread(target=self._run, name="fraud-shadow", daemon=True)
+        self._thread.start()
+
+    def submit(self, payload, probabilities, predictions):
+        try:
+            self._queue.put_nowait((payload, probabilities, predictions))
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'model_name': self.predictor.model_name,
+                'version': self.predictor.version,
+                'items': self._items,
+                'disagreements': self._disagreements,
+                'agreement': 1.0 - self._disagreements / self._items if self._items else None,
+                'mean_abs_diff': self._abs_diff_sum / self._items if self._items else None,
+                'max_abs_diff': self._max_abs_diff,
+                'mean_ms_per_item': self._seconds / self._items * 1000.0 if self._items else None,
+                'errors': self._errors,
+                'dropped': self._dropped,
+                'queued': self._queue.qsize(),
+            }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            payload, primary_proba, primary_pred = item
+            start = time.perf_counter()
+            try:
+                if isinstance(payload, pd.DataFrame):
+                    probabilities, predictions, _ = self.predictor.predict_with_scores(payload)
+                else:
+                    prediction, probability = self.predictor.predict_single(payload)
+                    probabilities, predictions = np.array([probability]), np.array([prediction])
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+
+            diff = np.abs(probabilities - np.asarray(primary_proba))
+            with self._lock:
+                self._items += len(diff)
+                self._disagreements += int((predictions != np.asarray(primary_pred)).sum())
+                self._abs_diff_sum += float(diff.sum())
+                self._max_abs_diff = max(self._max_abs_diff, float(diff.max(initial=0.0)))
+                self._seconds += elapsed
+
+
+class ModelRegistry:
+    """Serves the active model and swaps in new versions without downtime
+
+    Exposes the FraudPredictor scoring interface (threshold, predict_single,
+    predict_with_scores), so it can stand in for a predictor in service.py
+    and MicroBatcher. reload() loads a model, validates it on a canary sample
+    (recent live requests, else the first rows of the latest dataset) and
+    only then replaces the active reference; in-flight requests finish on the
+    model they started with. A shadow model can score the same traffic in
+    the background for comparison.
+    """
+
+    def __init__(self, model_name="fraud_model", model_dir=None, canary=None,
+                 canary_size=CANARY_SAMPLE_SIZE, min_agreement=CANARY_MIN_AGREEMENT):
+        self.model_dir = model_dir or MODEL_DIR
+        self.canary = canary
+        self.canary_size = canary_size
+        self.min_agreement = min_agreement
+        self._recent = deque(maxlen=canary_size)
+        self._reload_lock = threading.Lock()
+        self._history = deque(maxlen=20)
+        self._shadow = None
+        self._watch_thread = None
+        self._watch_stop = threading.Event()
+
+        self._seen_fingerprint = _fingerprint(model_name, self.model_dir)
+        self._active = FraudPredictor(model_name, model_dir=self.model_dir)
+        self._loaded_at = _utc_now()
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def threshold(self):
+        return self._active.threshold
+
+    @property
+    def drift(self):
+        return self._active.drift
+
+    @property
+    def velocity_store(self):
+        return self._active.velocity_store
+
+    def predict_single(self, transaction_dict):
+        prediction, probability = self._active.predict_single(transaction_dict)
+        self._recent.append(transaction_dict)
+        shadow = self._shadow
+        if shadow is not None:
+            shadow.submit(transaction_dict, [probability], [prediction])
+        return prediction, probability
+
+    def predict_with_scores(self, df):
+        probabilities, predictions, risks = self._active.predict_with_scores(df)
+        self._recent.extend(df.head(_RECENT_ROWS_PER_BATCH).to_dict('records'))
+        shadow = self._shadow
+        if shadow is not None:
+            shadow.submit(df, probabilities, predictions)
+        return probabilities, predictions, risks
+
+    def _canary_frame(self):
+        if self.canary is not None:
+            return self.canary
+        recent = list(self._recent)
+        if recent:
+            return pd.DataFrame(recent)
+        return _dataset_canary(self.canary_size)
+
+    def validate(self, candidate):
+        """Score the canary sample with a candidate model
+
+        Raises:
+            ValueError: If the candidate's output is malformed or its decisions
+                agree with the active model's less than min_agreement
+
+        Returns:
+            Dictionary describing the canary run
+        """
+        canary = self._canary_frame()
+        if canary is None or len(canary) == 0:
+            return {'canary_rows': 0}
+
+        start = time.perf_counter()
+        probabilities, predictions, _ = candidate.predict_with_scores(canary)
+        report = {'canary_rows': len(canary),
+                  'canary_ms': (time.perf_counter() - start) * 1000.0}
+        if len(probabilities) != len(canary):
+            raise ValueError("Candidate returned the wrong number of scores on the canary sample")
+        if not np.all((probabilities >= 0) & (probabilities <= 1)):
+            raise ValueError("Candidate produced invalid probabilities on the canary sample")
+        report['fraud_rate'] = float(predictions.mean())
+
+        # The active model scores a copy that records neither metrics nor
+        # drift, and with velocity features an empty store like the
+        # candidate's, so the canary rows never count as live traffic
+        active = copy.copy(self._active)
+        active.metrics, active.drift = None, None
+        if active.velocity_store is not None:
+            active.velocity_store = VelocityFeatureStore(max_customers=VELOCITY_MAX_CUSTOMERS)
+        _, active_predictions, _ = active.predict_with_scores(canary)
+        report['agreement'] = float((active_predictions == predictions).mean())
+        if report['agreement'] < self.min_agreement:
+            raise ValueError(f"Candidate agrees with the active model on "
+                             f"{report['agreement']:.1%} of the canary sample, "
+                             f"below {self.min_agreement:.1%}")
+        return report
+
+    def reload(self, model_name=None, version=None, background=False):
+        """Load, validate and atomically swap in a model
+
+        Args:
+            model_name: Model to serve (defaults to reloading the active name)
+            version: Saved bundle version to serve, e.g. an older one to roll
+                back to (defaults to the active version on disk). Once
+                swapped in it also becomes the active version on disk.
+            background: Return immediately and load on a separate thread
+
+        Raises:
+            RuntimeError: If another reload is already in progress
+
+        Returns:
+            Dictionary with the reload outcome ('swapped', 'rejected' or
+            'failed'), or status 'loading' when running in the background
+        """
+        model_name = model_name or self._active.model_name
+        if not self._reload_lock.acquire(blocking=False):
+            raise RuntimeError("A model reload is already in progress")
+        if background:
+            threading.Thread(target=self._reload_locked, args=(model_name, version),
+                             name="fraud-model-reload", daemon=True).start()
+            return {'status': 'loading', 'model_name': model_name}
+        return self._reload_locked(model_name, version)
+
+    def _reload_locked(self, model_name, version=None):
+        event = {'model_name': model_name, 'started_at': _utc_now()}
+        try:
+            fingerprint = _fingerprint(model_name, self.model_dir)
+            try:
+                # Canary scoring stays out of the live latency metrics and drift windows
+                candidate = FraudPredictor(model_name, model_dir=self.model_dir, metrics=None,
+                                           drift=False, version=version)
+            except Exception as e:
+                event.update(status='failed', error=str(e))
+                return event
+            event['version'] = candidate.version
+            try:
+                event['canary'] = self.validate(candidate)
+            except Exception as e:
+                event.update(status='rejected', error=str(e))
+                return event
+            if version is not None:
+                # Restarts and other workers watching the directory follow
+                activate_version(model_name, version, self.model_dir)
+                fingerprint = version
+
+            active = self._active
+            if candidate.velocity_store is not None:
+                # Keep the live per-customer state; drop what the canary wrote
+                candidate.velocity_store = (active.velocity_store if active.velocity_store is not None
+                                            else VelocityFeatureStore(max_customers=VELOCITY_MAX_CUSTOMERS))
+            candidate.metrics = METRICS
+            candidate.enable_drift_monitor()
+            self._active = candidate
+            self._loaded_at = _utc_now()
+            self._seen_fingerprint = fingerprint
+            event.update(status='swapped', previous_version=active.version)
+            active.close()
+            return event
+        finally:
+            event['finished_at'] = _utc_now()
+            self._history.append(event)
+            self._reload_lock.release()
+
+    def set_shadow(self, model_name, version=None):
+        """Shadow-score live traffic with model_name; None stops shadowing"""
+        shadow = (_Shadow(FraudPredictor(model_name, model_dir=self.model_dir, metrics=None,
+                                         drift=False, version=version))
+                  if model_name else None)
+        previous, self._shadow = self._shadow, shadow
+        if previous is not None:
+            previous.stop()
+        return shadow.stats() if shadow is not None else None
+
+    def start_watch(self, interval=MODEL_WATCH_INTERVAL):
+        """Reload automatically when another version of the active model is activated"""
+        if self._watch_thread is not None or interval <= 0:
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(interval,),
+                                              name="fraud-model-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self):
+        if self._watch_thread is not None:
+            self._watch_stop.set()
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def _watch(self, interval):
+        while not self._watch_stop.wait(interval):
+            fingerprint = _fingerprint(self._active.model_name, self.model_dir)
+            if fingerprint is None or fingerprint == self._seen_fingerprint:
+                continue
+            # Remember it even if rejected, so a bad model is not retried every tick
+            self._seen_fingerprint = fingerprint
+            try:
+                self.reload()
+            except RuntimeError:
+                self._seen_fingerprint = None
+
+    def close(self):
+        self.stop_watch()
+        self.set_shadow(None)
+        self._active.close()
+
+    def status(self):
+        shadow = self._shadow
+        return {
+            'active': {'model_name': self._active.model_name,
+                       'version': self._active.version,
+                       'threshold': float(self._active.threshold),
+                       'loaded_at': self._loaded_at},
+            'reloading': self._reload_lock.locked(),
+            'watching': self._watch_thread is not None,
+            'shadow': shadow.stats() if shadow is not None else None,
+            'history': list(self._history),
+        }
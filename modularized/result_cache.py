@@ -0,0 +1,130 @@
+# result_cache.py
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from .config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL_SECONDS
+
+# Approximate memory per entry: 16-byte key, (prediction, probability,
+# expiry) tuple and the OrderedDict's hash slot and linked-list node
+ENTRY_BYTES = sys.getsizeof(b'\0' * 16) + sys.getsizeof((0, 0.0, 0.0)) + 2 * sys.getsizeof(0.0) + 120
+
+
+def canonical_transaction(transaction):
+    """Stable text form of a transaction: sorted fields, numbers as floats, trimmed strings
+
+    So 150 and 150.0, or "electronics " and "electronics", give the same key.
+    """
+    items = []
+    for name in sorted(transaction):
+        value = transaction[name]
+        if isinstance(value, bool) or value is None:
+            pass
+        elif isinstance(value, (int, float)):
+            value = float(value)
+        elif isinstance(value, str):
+            value = value.strip()
+        else:
+            value = str(value)
+        items.append((name, value))
+    return json.dumps(items, separators=(',', ':'))
+
+
+def transaction_key(transaction, model_version):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(model_version).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(canonical_transaction(transaction).encode('utf-8'))
+    return digest.digest()
+
+
+class ResultCache:
+    """Bounded LRU cache of (prediction, probability) for repeated transactions
+
+    Keys hash the canonical transaction together with the model version.
+    Entries also belong to the model object that produced them: the first
+    lookup after a different model is served (e.g. a registry swap, even
+    between joblib models that share a version label) clears the cache, and
+    results computed by the previous model are not stored. Entries expire
+    after ttl_seconds; least recently used ones are evicted beyond
+    max_entries or max_bytes (estimated at ENTRY_BYTES per entry).
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_MAX_ENTRIES, max_bytes=RESULT_CACHE_MAX_BYTES,
+                 ttl_seconds=RESULT_CACHE_TTL_SECONDS):
+        self.max_entries = max(1, min(max_entries, max_bytes // ENTRY_BYTES))
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self._counts = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0,
+                        'invalidations': 0}
+
+    def _check_model(self, model):
+        # Caller holds the lock
+        if model is not self._model:
+            if self._entries:
+                self._counts['invalidations'] += 1
+                self._entries.clear()
+            self._model = model
+
+    def get(self, key, model):
+        """Cached (prediction, probability) for key under model, or None"""
+        with self._lock:
+            self._check_model(model)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts['misses'] += 1
+                return None
+            if entry[2] < time.monotonic():
+                del self._entries[key]
+                self._counts['expirations'] += 1
+                self._counts['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts['hits'] += 1
+            return entry[0], entry[1]
+
+    def put(self, key, model, prediction, probability):
+        with self._lock:
+            if model is not self._model:
+                # Scored by a model that has been swapped out meanwhile
+                return
+            self._entries[key] = (prediction, probability, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counts['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            if self._entries:
+                self._counts['invalidations'] += 1
+                self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._entries)
+        lookups = counts['hits'] + counts['misses']
+        return {**counts,
+                'hit_rate': counts['hits'] / lookups if lookups else None,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'approx_bytes': entries * ENTRY_BYTES,
+                'ttl_seconds': self.ttl_seconds}
+
+    def render(self):
+        """Counters and size in Prometheus text format"""
+        stats = self.stats()
+        lines = ["# HELP fraud_result_cache_total Result cache lookups and removals by outcome",
+                 "# TYPE fraud_result_cache_total counter"]
+        for outcome in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+            lines.append(f'fraud_result_cache_total{{outcome="{outcome}"}} {stats[outcome]}')
+        lines += ["# HELP fraud_result_cache_entries Entries in the result cache",
+                  "# TYPE fraud_result_cache_entries gauge",
+                  f"fraud_result_cache_entries {stats['entries']}"]
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,308 @@
+# service.py
+import hmac
+import itertools
+import json
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from .bulk import (JSON, NDJSON, NdjsonDecoder, UnsupportedMediaType, decode_frame,
+                   encode_results, result_records)
+from .config import ADMIN_TOKEN, BULK_NDJSON_FRAME_ROWS
+from .inference import risk_levels
+from .metrics import METRICS, PROFILER, instrumented, record_request
+from .result_cache import transaction_key
+
+REQUIRED_FIELDS = [
+    'amount', 'old_balance', 'new_balance', 'age',
+    'category', 'gender', 'transaction_type', 'location'
+]
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+@instrumented('predict')
+def predict_response(predictor, transaction, batcher=None, cache=None):
+    """Build the /predict response for one transaction
+
+    Shared by the Flask and ASGI servers so both expose the same contract.
+    With a ResultCache, a transaction already scored by the current model
+    is answered from it without touching the model (or velocity state).
+    Transactions sent without a timestamp bypass the cache: they are scored
+    at the server's clock, which a cached result would not follow.
+
+    Returns:
+        Tuple of (response dict, HTTP status)
+    """
+    try:
+        if not isinstance(transaction, dict):
+            return {'error': 'Request body must be a JSON object'}, 400
+
+        # Validate required fields
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in transaction]
+        if missing_fields:
+            return {'error': f'Missing required fields: {missing_fields}'}, 400
+
+        if 'timestamp' not in transaction:
+            cache = None
+
+        # Add timestamp and default values for optional fields
+        transaction.setdefault('timestamp', _now())
+        transaction.setdefault('customer_id', 'UNKNOWN')
+        transaction.setdefault('merchant', 'UNKNOWN')
+
+        cached = None
+        if cache is not None:
+            model = getattr(predictor, 'active', predictor)
+            key = transaction_key(transaction, model.version)
+            cached = cache.get(key, model)
+
+        # Make prediction
+        if cached is not None:
+            prediction, probability = cached
+        elif batcher is not None:
+            prediction, probability = batcher.predict_single(transaction)
+        else:
+            prediction, probability = predictor.predict_single(transaction)
+        if cache is not None and cached is None:
+            cache.put(key, model, prediction, probability)
+        if METRICS is not None:
+            METRICS.record_predictions(int(prediction), 1)
+
+        response = {
+            'is_fraud': bool(prediction),
+            'fraud_probability': float(probability),
+            'threshold': float(predictor.threshold),
+            'risk_level': str(risk_levels(probability))
+        }
+        return response, 200
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+def _score_frame(predictor, df):
+    """Fill optional columns and score a transactions frame in one pass"""
+    # Add timestamps and default values for optional fields
+    if 'timestamp' not in df.columns:
+        df['timestamp'] = _now()
+    if 'customer_id' not in df.columns:
+        df['customer_id'] = 'UNKNOWN'
+    if 'merchant' not in df.columns:
+        df['merchant'] = 'UNKNOWN'
+
+    # Make predictions (single pass through the model)
+    probabilities, predictions, risks = predictor.predict_with_scores(df)
+
+    if METRICS is not None:
+        METRICS.record_predictions(int(predictions.sum()), len(predictions))
+    return probabilities, predictions, risks
+
+
+def _batch_json(threshold, probabilities, predictions, risks):
+    # Prepare response from plain Python lists rather than NumPy scalars
+    results = [
+        {
+            'transaction_index': i,
+            'is_fraud': is_fraud,
+            'fraud_probability': prob,
+            'risk_level': risk
+        }
+        for i, is_fraud, prob, risk in zip(
+            range(len(probabilities)),
+            predictions.astype(bool).tolist(),
+            probabilities.astype(float).tolist(),
+            risks.tolist())
+    ]
+
+    return {
+        'threshold': float(threshold),
+        'total_transactions': len(results),
+        'fraud_count': int(predictions.sum()),
+        'results': results
+    }
+
+
+@instrumented('predict_batch')
+def predict_batch_response(predictor, data):
+    """Build the /predict_batch response for a list of transactions
+
+    Returns:
+        Tuple of (response dict, HTTP status)
+    """
+    try:
+        if not isinstance(data, dict) or 'transactions' not in data:
+            return {'error': 'Missing transactions field'}, 400
+
+        start = time.perf_counter()
+        df = pd.DataFrame(data['transactions'])
+        if METRICS is not None:
+            METRICS.observe_stages((('dataframe', time.perf_counter() - start),))
+
+        threshold = predictor.threshold
+        return _batch_json(threshold, *_score_frame(predictor, df)), 200
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+@instrumented('predict_batch_bulk')
+def predict_batch_bulk_response(predictor, body, content_type, output_type):
+    """Build the /predict_batch response for an Arrow IPC or .npy request body
+
+    Args:
+        body: Raw request bytes
+        content_type: bulk.ARROW or bulk.NPY
+        output_type: Negotiated response format (see bulk.negotiate)
+
+    Returns:
+        Tuple of (response, HTTP status); the response is encoded bytes in
+        output_type, or a dict for JSON responses and errors
+    """
+    try:
+        start = time.perf_counter()
+        try:
+            df = decode_frame(body, content_type)
+        except UnsupportedMediaType as e:
+            return {'error': str(e)}, 415
+        except ValueError as e:
+            return {'error': f'Invalid request body: {e}'}, 400
+        if METRICS is not None:
+            METRICS.observe_stages((('dataframe', time.perf_counter() - start),))
+
+        threshold = predictor.threshold
+        probabilities, predictions, risks = _score_frame(predictor, df)
+        if output_type == JSON:
+            return _batch_json(threshold, probabilities, predictions, risks), 200
+        return encode_results(result_records(probabilities, predictions, risks),
+                              output_type, threshold), 200
+
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+def ndjson_frame_response(predictor, df, offset):
+    """NDJSON result lines for one frame of a streamed batch, indexed from offset"""
+    threshold = predictor.threshold
+    probabilities, predictions, risks = _score_frame(predictor, df)
+    return encode_results(result_records(probabilities, predictions, risks, start=offset),
+                          NDJSON, threshold)
+
+
+def predict_batch_stream(predictor, chunks, rows_per_frame=BULK_NDJSON_FRAME_ROWS):
+    """Score an NDJSON request body while it is still being read
+
+    Args:
+        chunks: Iterable of request body byte chunks
+
+    Yields:
+        NDJSON result lines, one block per frame of rows_per_frame rows. The
+        HTTP status is sent before scoring starts, so a failure ends the
+        stream with an {"error": ...} line instead.
+    """
+    start = time.perf_counter()
+    decoder = NdjsonDecoder(rows_per_frame)
+    offset = 0
+    status = 200
+    try:
+        for chunk in itertools.chain(chunks, [None]):
+            for df in decoder.feed(chunk) if chunk is not None else decoder.flush():
+                yield ndjson_frame_response(predictor, df, offset)
+                offset += len(df)
+    except Exception as e:
+        status = 400 if isinstance(e, ValueError) else 500
+        yield (json.dumps({'error': str(e), 'transaction_index': offset}) + '\n').encode('utf-8')
+    finally:
+        record_request('predict_batch_ndjson', time.perf_counter() - start, status)
+
+
+def admin_authorized(token):
+    """Admin endpoints stay disabled unless FRAUD_ADMIN_TOKEN is set"""
+    return ADMIN_TOKEN is not None and token is not None and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def models_response(registry):
+    """Build the /admin/models response: available models and registry state"""
+    from .registry import list_models
+    return {'models': list_models(registry.model_dir), **registry.status()}, 200
+
+
+def reload_response(registry, data):
+    """Build the /admin/reload response
+
+    Body fields (all optional): model_name, version (a saved bundle
+    version, e.g. to roll back), background.
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        return {'error': 'Request body must be a JSON object'}, 400
+    try:
+        event = registry.reload(data.get('model_name'), version=data.get('version'),
+                                background=bool(data.get('background', False)))
+    except RuntimeError as e:
+        return {'error': str(e)}, 409
+    status = {'swapped': 200, 'loading': 202, 'rejected': 422}.get(event['status'], 500)
+    return event, status
+
+
+def shadow_response(registry, data):
+    """Build the /admin/shadow response; model_name null stops shadowing"""
+    if not isinstance(data, dict) or 'model_name' not in data:
+        return {'error': 'Missing model_name field'}, 400
+    try:
+        return {'shadow': registry.set_shadow(data['model_name'], version=data.get('version'))}, 200
+    except Exception as e:
+        return {'error': str(e)}, 500
+
+
+def metrics_text(predictor=None, cache=None):
+    """Body of the /metrics endpoint in Prometheus text format
+
+    Includes the drift gauges of predictor's monitor when it has one and
+    the result cache counters.
+    """
+    text = METRICS.render() if METRICS is not None else ''
+    monitor = getattr(predictor, 'drift', None)
+    if monitor is not None:
+        text += monitor.render()
+    if cache is not None:
+        text += cache.render()
+    return text
+
+
+def cache_response(cache):
+    """Build the /cache_stats response: result cache hits, misses and size"""
+    if cache is None:
+        return {'enabled': False}, 200
+    return {'enabled': True, **cache.stats()}, 200
+
+
+def drift_response(predictor):
+    """Build the /drift response: live traffic vs the model's training reference"""
+    monitor = predictor.drift
+    if monitor is None:
+        return {'enabled': False}, 200
+    return {'enabled': True, **monitor.stats()}, 200
+
+
+def profile_response(data):
+    """Build the /admin/profile response
+
+    POST {"enabled": true, "interval_ms": 5} starts sampling, {"enabled":
+    false} stops it; the response carries the folded stacks collected so far.
+    Pass "reset": true to discard them.
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        return {'error': 'Request body must be a JSON object'}, 400
+    if data.get('reset'):
+        PROFILER.reset()
+    if 'enabled' in data:
+        if data['enabled']:
+            PROFILER.start(interval_ms=data.get('interval_ms'), max_seconds=data.get('max_seconds'))
+        else:
+            PROFILER.stop()
+    return {**PROFILER.stats(), 'folded': PROFILER.folded()}, 200
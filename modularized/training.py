@@ -2,89 +2,257 @@
 import joblib
 import numpy as np
 import os
+import time
+from joblib import Parallel, delayed
 from xgboost import XGBClassifier
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
-from config import MODEL_DIR, HYPERPARAMETERS, RANDOM_STATE
-from preprocessing import get_preprocessor
-from sklearn.metrics import precision_recall_curve, f1_score
+from sklearn.model_selection import GridSearchCV, ParameterGrid, StratifiedKFold, train_test_split
+from sklearn.metrics import f1_score
+from .config import (MODEL_DIR, HYPERPARAMETERS, RANDOM_STATE, THRESHOLD_HOLDOUT_SIZE,
+                     SEARCH_MODE, CV_FOLDS, EARLY_STOPPING_ROUNDS, HALVING_FACTOR,
+                     HALVING_MIN_ROUNDS, HALVING_MAX_ROUNDS)
+from .preprocessing import get_preprocessor
+from .artifact import save_bundle
+from .drift import build_reference_profile, profile_path, save_profile
 from imblearn.over_sampling import SMOTE
 from imblearn.pipeline import Pipeline as ImbPipeline
 
 
-def train_model(X_train, y_train):
-    """Train model with SMOTE and hyperparameter tuning"""
-    preprocessor = get_preprocessor()
-    
-    # Create pipeline with SMOTE and XGBoost
-    pipeline = ImbPipeline(steps=[
-        ('preprocessor', preprocessor),
+def _build_pipeline(classifier_params=None, n_jobs=-1):
+    """Preprocessor + SMOTE + XGBoost pipeline"""
+    return ImbPipeline(steps=[
+        ('preprocessor', get_preprocessor()),
         ('smote', SMOTE(random_state=RANDOM_STATE)),
         ('classifier', XGBClassifier(
             objective='binary:logistic',
             eval_metric='logloss',
             random_state=RANDOM_STATE,
-            n_jobs=-1
+            n_jobs=n_jobs,
+            **(classifier_params or {})
         ))
     ])
+
+def _thread_allocation(n_tasks):
+    """Split the cores between parallel search workers and XGBoost threads"""
+    n_cpus = os.cpu_count() or 1
+    search_jobs = max(1, min(n_tasks, n_cpus))
+    return search_jobs, max(1, n_cpus // search_jobs)
+
+def train_model(X_train, y_train, search=SEARCH_MODE):
+    """Train model with SMOTE and hyperparameter tuning
+    
+    Args:
+        X_train, y_train: Training data
+        search: 'grid' (exhaustive GridSearchCV) or 'halving' (successive
+            halving over boosting rounds with early stopping)
+    """
+    print("Starting model training with SMOTE...")
+    start = time.perf_counter()
+    if search == 'grid':
+        best_model, best_params, best_score = _grid_search(X_train, y_train)
+    elif search == 'halving':
+        best_model, best_params, best_score = _halving_search(X_train, y_train)
+    else:
+        raise ValueError(f"Unknown search mode: {search}")
+    print(f"Training complete in {time.perf_counter() - start:.1f}s ({search} search)")
+    
+    print(f"Best parameters: {best_params}")
+    print(f"Best F1 score (CV): {best_score:.4f}")
+    
+    return best_model
+
+def _grid_search(X_train, y_train):
+    """Exhaustive grid search over HYPERPARAMETERS"""
+    cv = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=RANDOM_STATE)
+    n_fits = len(ParameterGrid(HYPERPARAMETERS)) * CV_FOLDS
+    search_jobs, xgb_threads = _thread_allocation(n_fits)
     
-    # Hyperparameter tuning
-    cv = StratifiedKFold(n_splits=3, shuffle=True, random_state=RANDOM_STATE)
     grid_search = GridSearchCV(
-        pipeline, 
+        _build_pipeline(n_jobs=xgb_threads), 
         HYPERPARAMETERS, 
         cv=cv, 
         scoring='f1',  # Optimize for F1 score
-        n_jobs=-1,
+        n_jobs=search_jobs,
         verbose=1
     )
-    
-    print("Starting model training with SMOTE...")
     grid_search.fit(X_train, y_train)
-    print("Training complete!")
     
     best_model = grid_search.best_estimator_
-    best_params = grid_search.best_params_
-    best_score = grid_search.best_score_
+    best_model.named_steps['classifier'].set_params(n_jobs=-1)
+    return best_model, grid_search.best_params_, grid_search.best_score_
+
+def _cached_folds(X, y, cv):
+    """Fit the preprocessor and SMOTE once per fold and keep the results
     
-    print(f"Best parameters: {best_params}")
-    print(f"Best F1 score (CV): {best_score:.4f}")
+    Every candidate is then trained on the same cached arrays instead of
+    refitting the preprocessor and resampling for each parameter set.
+    """
+    folds = []
+    for train_idx, val_idx in cv.split(X, y):
+        preprocessor = get_preprocessor()
+        X_fold = preprocessor.fit_transform(X.iloc[train_idx])
+        X_val = preprocessor.transform(X.iloc[val_idx])
+        X_res, y_res = SMOTE(random_state=RANDOM_STATE).fit_resample(X_fold, y.iloc[train_idx])
+        folds.append((X_res, np.asarray(y_res), X_val, y.iloc[val_idx].to_numpy()))
+    return folds
+
+def _evaluate_candidate(params, folds, n_rounds, n_threads):
+    """Mean validation F1 and best iteration of one parameter set"""
+    scores, iterations = [], []
+    for X_res, y_res, X_val, y_val in folds:
+        classifier = XGBClassifier(
+            objective='binary:logistic',
+            eval_metric='logloss',
+            random_state=RANDOM_STATE,
+            n_estimators=n_rounds,
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+            n_jobs=n_threads,
+            **params)
+        classifier.fit(X_res, y_res, eval_set=[(X_val, y_val)], verbose=False)
+        scores.append(f1_score(y_val, classifier.predict(X_val)))
+        iterations.append(classifier.best_iteration + 1)
+    return float(np.mean(scores)), int(round(np.mean(iterations)))
+
+def _halving_search(X_train, y_train):
+    """Successive halving over boosting rounds with early stopping
     
-    return best_model
+    All candidates start with HALVING_MIN_ROUNDS boosting rounds; after each
+    rung only the best 1/HALVING_FACTOR survive and get HALVING_FACTOR times
+    more rounds, up to HALVING_MAX_ROUNDS.
+    """
+    cv = StratifiedKFold(n_splits=CV_FOLDS, shuffle=True, random_state=RANDOM_STATE)
+    folds = _cached_folds(X_train, y_train, cv)
+    
+    # Parameter names without the pipeline prefix
+    candidates = [{name.split('__', 1)[-1]: value for name, value in params.items()}
+                  for params in ParameterGrid(HYPERPARAMETERS)]
+    n_rounds = min(HALVING_MIN_ROUNDS, HALVING_MAX_ROUNDS)
+    
+    while True:
+        search_jobs, xgb_threads = _thread_allocation(len(candidates))
+        results = Parallel(n_jobs=search_jobs)(
+            delayed(_evaluate_candidate)(params, folds, n_rounds, xgb_threads)
+            for params in candidates)
+        ranking = np.argsort([-score for score, _ in results], kind='stable')
+        print(f"Rung with {n_rounds} rounds: {len(candidates)} candidates, "
+              f"best F1={results[ranking[0]][0]:.4f}")
+        
+        if len(candidates) == 1 or n_rounds >= HALVING_MAX_ROUNDS:
+            break
+        keep = ranking[:max(1, int(np.ceil(len(candidates) / HALVING_FACTOR)))]
+        candidates = [candidates[i] for i in keep]
+        n_rounds = min(n_rounds * HALVING_FACTOR, HALVING_MAX_ROUNDS)
+    
+    best_params = candidates[ranking[0]]
+    best_score, best_rounds = results[ranking[0]]
+    
+    # Refit on the full training data with the early-stopped round count
+    best_model = _build_pipeline({**best_params, 'n_estimators': best_rounds})
+    best_model.fit(X_train, y_train)
+    
+    best_params = {f'classifier__{name}': value for name, value in best_params.items()}
+    best_params['classifier__n_estimators'] = best_rounds
+    return best_model, best_params, best_score
+
+def threshold_curve(y_true, y_proba):
+    """Confusion counts and metrics at every distinct score threshold
+    
+    One sort plus cumulative sums, so the whole curve costs O(n log n)
+    regardless of how many distinct scores there are.
+    
+    Returns:
+        Dictionary of arrays (thresholds ascending): thresholds, tp, fp, fn,
+        precision, recall, f1
+    """
+    y_true = np.asarray(y_true).astype(bool)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    
+    # Sort scores descending; the last index of each run of equal scores
+    # gives the counts for predicting positive at score >= that threshold
+    order = np.argsort(y_proba, kind='mergesort')[::-1]
+    scores = y_proba[order]
+    distinct = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1]
+    tp = np.cumsum(y_true[order])[distinct]
+    fp = (distinct + 1) - tp
+    fn = tp[-1] - tp if len(tp) else tp
+    
+    n_pos = max(int(y_true.sum()), 1)
+    precision = tp / (tp + fp)
+    recall = tp / n_pos
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f1 = np.where(tp > 0, 2 * precision * recall / (precision + recall), 0.0)
+    
+    # Reverse to ascending thresholds
+    curve = {'thresholds': scores[distinct], 'tp': tp, 'fp': fp, 'fn': fn,
+             'precision': precision, 'recall': recall, 'f1': f1}
+    return {name: values[::-1] for name, values in curve.items()}
 
-def find_optimal_threshold(model, X, y_true, min_precision=0.60, min_recall=0.60):
-    """Find optimal threshold meeting precision/recall requirements"""
+def find_optimal_threshold(model, X, y_true, min_precision=0.60, min_recall=0.60,
+                           objective='f1', cost_fp=1.0, cost_fn=10.0, y_proba=None):
+    """Find optimal threshold meeting precision/recall requirements
+    
+    Args:
+        model: Fitted pipeline with predict_proba
+        X, y_true: Data to select the threshold on; prefer a held-out split
+            (see threshold_holdout_split) over the training data
+        min_precision, min_recall: Requirements a candidate threshold must meet
+        objective: 'f1' (maximize F1), 'cost' (minimize
+            cost_fp * FP + cost_fn * FN) or 'recall_at_precision' (maximize
+            recall subject to min_precision only)
+        cost_fp, cost_fn: Misclassification costs for objective='cost'
+        y_proba: Precomputed probabilities for X (skips predict_proba)
+    
+    Returns:
+        Selected threshold
+    """
     # Get predicted probabilities
-    y_proba = model.predict_proba(X)[:, 1]
-    
-    # Calculate precision-recall curve
-    precision, recall, thresholds = precision_recall_curve(y_true, y_proba)
-    
-    # Find thresholds that meet minimum requirements
-    candidate_thresholds = []
-    for i, thresh in enumerate(thresholds):
-        if precision[i] >= min_precision and recall[i] >= min_recall:
-            candidate_thresholds.append((thresh, f1_score(y_true, y_proba >= thresh)))
-    
-    # Select best threshold
-    if candidate_thresholds:
-        # Sort by F1 score (descending)
-        candidate_thresholds.sort(key=lambda x: x[1], reverse=True)
-        best_threshold, best_f1 = candidate_thresholds[0]
-        print(f"Found threshold meeting requirements: {best_threshold:.4f} (F1={best_f1:.4f})")
+    if y_proba is None:
+        y_proba = model.predict_proba(X)[:, 1]
+    
+    curve = threshold_curve(y_true, y_proba)
+    thresholds = curve['thresholds']
+    
+    if objective == 'f1':
+        score, label = curve['f1'], 'F1'
+        meets = (curve['precision'] >= min_precision) & (curve['recall'] >= min_recall)
+    elif objective == 'cost':
+        score, label = -(cost_fp * curve['fp'] + cost_fn * curve['fn']), 'cost'
+        meets = (curve['precision'] >= min_precision) & (curve['recall'] >= min_recall)
+    elif objective == 'recall_at_precision':
+        score, label = curve['recall'], 'recall'
+        meets = curve['precision'] >= min_precision
     else:
-        # If no threshold meets both, find one that maximizes F1
-        print("No threshold meets both min precision and recall requirements.")
-        print("Selecting threshold that maximizes F1 score.")
-        f1_scores = 2 * (precision * recall) / (precision + recall + 1e-9)
-        best_idx = np.argmax(f1_scores)
-        best_threshold = thresholds[best_idx]
-        best_f1 = f1_scores[best_idx]
-        print(f"Best F1 threshold: {best_threshold:.4f} (F1={best_f1:.4f})")
-    
-    return best_threshold
+        raise ValueError(f"Unknown threshold objective: {objective}")
+    
+    # Select best threshold (ties go to the lowest threshold)
+    if meets.any():
+        best_idx = np.flatnonzero(meets)[np.argmax(score[meets])]
+        print(f"Found threshold meeting requirements: {thresholds[best_idx]:.4f} "
+              f"({label}={abs(score[best_idx]):.4f})")
+    else:
+        # If no threshold meets the requirements, optimize the objective alone
+        print("No threshold meets the min precision/recall requirements.")
+        print(f"Selecting threshold that optimizes {label}.")
+        best_idx = np.argmax(score)
+        print(f"Best {label} threshold: {thresholds[best_idx]:.4f} ({label}={abs(score[best_idx]):.4f})")
+    
+    return float(thresholds[best_idx])
 
-def save_model(model, threshold, model_name="fraud_model"):
-    """Save model pipeline and threshold to disk"""
+def threshold_holdout_split(X_train, y_train, holdout_size=THRESHOLD_HOLDOUT_SIZE):
+    """Carve a stratified held-out split for threshold selection
+    
+    Returns:
+        Tuple of (X_fit, X_holdout, y_fit, y_holdout)
+    """
+    return train_test_split(X_train, y_train, test_size=holdout_size,
+                            stratify=y_train, random_state=RANDOM_STATE)
+
+def save_model(model, threshold, model_name="fraud_model", reference_data=None):
+    """Save model pipeline and threshold to disk
+    
+    With reference_data (feature-engineered rows the model did not train
+    on, e.g. the threshold holdout) a drift reference profile of its
+    features and scores is saved as well, for drift.DriftMonitor.
+    """
     os.makedirs(MODEL_DIR, exist_ok=True)
     
     # Save the entire pipeline (includes preprocessor + SMOTE + classifier)
@@ -106,10 +274,24 @@ def save_model(model, threshold, model_name="fraud_model"):
     with open(threshold_path, 'w') as f:
         f.write(str(threshold))
     
+    # Reference distribution of inputs and scores for live drift checks
+    drift_profile = None
+    if reference_data is not None:
+        drift_profile = build_reference_profile(reference_data,
+                                                model.predict_proba(reference_data)[:, 1])
+        save_profile(drift_profile, profile_path(model_name))
+    
+    # Consolidated bundle for fast inference start-up
+    bundle_dir = save_bundle(preprocessor, classifier, threshold, model_name,
+                             drift_profile=drift_profile)
+    
     print(f"Full pipeline saved to {pipeline_path}")
     print(f"Preprocessor saved to {preprocessor_path}")
     print(f"Classifier saved to {classifier_path}")
     print(f"Threshold saved to {threshold_path}")
+    if drift_profile is not None:
+        print(f"Drift reference profile saved to {profile_path(model_name)}")
+    print(f"Artifact bundle saved to {bundle_dir}")
     
     return pipeline_path, preprocessor_path, classifier_path, threshold_path
 
@@ -0,0 +1,180 @@
+# tree_engine.py
+import json
+
+import numpy as np
+
+# Rows traversed together; keeps the (rows x trees) node matrix cache-sized
+CHUNK_ROWS = 4096
+
+
+def _base_margin(learner):
+    """Starting margin of a binary:logistic model (base_score is a probability)"""
+    base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for node in frontier for c in (left[node], right[node]) if c != -1]
+        if not children:
+            return depth
+        depth += 1
+        frontier = children
+
+
+class TreeEnsemble:
+    """XGBoost binary:logistic booster flattened into NumPy arrays
+
+    All trees share one node table (split feature, threshold, child per
+    branch, default direction for missing values, leaf value). Leaves point
+    to themselves, so a batch is scored by stepping every (row, tree) pair
+    max_depth times with a few vectorized gathers, then summing leaf values.
+    Splits follow XGBoost: go left when x < threshold in float32, and take
+    the default branch when x is missing (NaN, or absent from a CSR row).
+    """
+
+    def __init__(self, feature, threshold, children, default_left, value, roots, max_depth,
+                 base_margin, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+        self.n_features = n_features
+
+    @classmethod
+    def from_booster(cls, booster, iteration_range=(0, 0)):
+        """Compile a trained booster
+
+        Args:
+            booster: xgboost.Booster trained with objective binary:logistic
+            iteration_range: Boosting rounds to use, as in inplace_predict;
+                (0, 0) means all of them
+
+        Raises:
+            ValueError: For other objectives or categorical splits
+        """
+        model = json.loads(booster.save_raw('json'))
+        learner = model['learner']
+        if learner['objective']['name'] != 'binary:logistic':
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+        if learner['gradient_booster']['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster: {learner['gradient_booster']['name']}")
+
+        gbtree = learner['gradient_booster']['model']
+        trees = gbtree['trees']
+        start, end = iteration_range
+        if end > 0:
+            indptr = gbtree['iteration_indptr']
+            trees = trees[indptr[start]:indptr[end]]
+
+        features, thresholds, children, defaults, values, roots = [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            if tree['categories_nodes']:
+                raise ValueError("Trees with categorical splits are not supported")
+            left = np.asarray(tree['left_children'], dtype=np.int64)
+            right = np.asarray(tree['right_children'], dtype=np.int64)
+            leaf = left == -1
+            own = np.arange(len(left))
+            # Leaves loop back to themselves so extra steps are no-ops
+            left = np.where(leaf, own, left) + offset
+            right = np.where(leaf, own, right) + offset
+            condition = np.asarray(tree['split_conditions'], dtype=np.float32)
+
+            features.append(np.where(leaf, 0, tree['split_indices']))
+            thresholds.append(np.where(leaf, np.float32(0), condition))
+            # children[2 * node + went_left]
+            children.append(np.column_stack([right, left]).ravel())
+            defaults.append(np.asarray(tree['default_left'], dtype=bool))
+            values.append(np.where(leaf, condition, np.float32(0)))
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(tree['left_children'], tree['right_children']))
+            offset += len(own)
+
+        if not trees:
+            raise ValueError("Booster has no trees")
+        return cls(
+            feature=np.concatenate(features).astype(np.int64),
+            threshold=np.concatenate(thresholds).astype(np.float32),
+            children=np.concatenate(children).astype(np.int64),
+            default_left=np.concatenate(defaults).astype(bool),
+            value=np.concatenate(values).astype(np.float32),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            base_margin=_base_margin(learner),
+            n_features=int(learner['learner_model_param']['num_feature']))
+
+    def _dense(self, X):
+        """float32 matrix with NaN marking missing values"""
+        if hasattr(X, 'tocsr'):
+            X = X.tocsr()
+            dense = np.full(X.shape, np.nan, dtype=np.float32)
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            dense[rows, X.indices] = X.data
+            return dense
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def margin(self, X):
+        X = self._dense(X)
+        n_rows, n_columns = X.shape
+        if n_columns < self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {n_columns}")
+        margins = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, CHUNK_ROWS):
+            block = X[start:start + CHUNK_ROWS]
+            flat = block.ravel()
+            row_offsets = (np.arange(len(block)) * n_columns)[:, None]
+            has_missing = np.isnan(block).any()
+
+            node = np.repeat(self.roots[None, :], len(block), axis=0)
+            for _ in range(self.max_depth):
+                # np.take skips fancy-indexing dispatch on these flat lookups
+                x = np.take(flat, row_offsets + np.take(self.feature, node))
+                go_left = x < np.take(self.threshold, node)
+                if has_missing:
+                    go_left |= np.isnan(x) & np.take(self.default_left, node)
+                node = np.take(self.children, 2 * node + go_left)
+            margins[start:start + len(block)] = np.take(self.value, node).sum(axis=1, dtype=np.float64)
+        return margins + self.base_margin
+
+    def predict_proba(self, X):
+        positive = 1.0 / (1.0 + np.exp(-self.margin(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+
+class TreeEngineClassifier:
+    """Classifier wrapper scoring through a compiled TreeEnsemble
+
+    Batches larger than max_rows (None means no limit) go to the wrapped
+    XGBoost classifier, whose multithreaded C++ predictor wins there.
+    Everything else (get_booster, set_params, ...) is delegated.
+    """
+
+    def __init__(self, classifier, max_rows=None):
+        self.classifier = classifier
+        # Bundles carry the compiled trees, so the booster need not be loaded
+        self.ensemble = getattr(classifier, 'ensemble', None)
+        if self.ensemble is None:
+            booster = classifier.get_booster()
+            best_iteration = booster.attr('best_iteration')
+            iteration_range = (0, int(best_iteration) + 1) if best_iteration is not None else (0, 0)
+            self.ensemble = TreeEnsemble.from_booster(booster, iteration_range)
+        self.max_rows = max_rows
+
+    def predict_proba(self, X):
+        if self.max_rows is not None and X.shape[0] > self.max_rows:
+            return self.classifier.predict_proba(X)
+        return self.ensemble.predict_proba(X)
+
+    def get_booster(self):
+        return self.classifier.get_booster()
+
+    def set_params(self, **params):
+        self.classifier.set_params(**params)
+        return self
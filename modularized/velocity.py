@@ -0,0 +1,276 @@
+# velocity.py
+import calendar
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from .config import (VELOCITY_BUCKET_SECONDS, VELOCITY_EVICT_INTERVAL_SECONDS, VELOCITY_IDLE_SECONDS,
+                     VELOCITY_MAX_CUSTOMERS)
+from .fast_path import _parse_timestamp
+
+# Sliding windows in seconds, keyed by feature suffix
+VELOCITY_WINDOWS = {'1h': 3600, '24h': 86400}
+
+VELOCITY_FEATURES = (
+    [f'txn_count_{name}' for name in VELOCITY_WINDOWS]
+    + [f'txn_amount_{name}' for name in VELOCITY_WINDOWS]
+    + ['seconds_since_last_txn', 'amount_vs_customer_mean']
+)
+
+
+def _to_seconds(timestamps):
+    """Datetime-like values to int64 epoch seconds"""
+    return pd.to_datetime(timestamps).to_numpy(dtype='datetime64[s]').astype(np.int64)
+
+
+def _to_cents(amounts):
+    """Amounts as int64 cents so running sums are exact in both implementations"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def _epoch_seconds(value):
+    """Single timestamp to epoch seconds, matching _to_seconds"""
+    ts = _parse_timestamp(value)
+    if ts.tzinfo is not None:
+        return int(ts.timestamp() // 1)
+    return calendar.timegm(ts.timetuple())
+
+
+def _window_buckets(window, bucket_seconds):
+    if window % bucket_seconds:
+        raise ValueError(f"Velocity bucket of {bucket_seconds}s does not divide the {window}s window")
+    return window // bucket_seconds
+
+
+def compute_velocity_features(df, bucket_seconds=VELOCITY_BUCKET_SECONDS, sort=True):
+    """Offline, vectorized velocity features for training
+
+    Gives the same features as feeding the rows one at a time through a
+    fresh VelocityFeatureStore with the same bucket_seconds (and no
+    evictions): in timestamp order, ties kept in df order, when sort is
+    True, or in df order when it is False. Every row only sees the same
+    customer's rows streamed before it. As in the store, a row older than
+    its customer's latest streamed row is clamped to that time. Windows
+    cover whole time buckets: an earlier row counts towards a window while
+    its bucket is within window / bucket_seconds buckets of the current
+    one, so a 1h window reaches back between 1h - bucket_seconds and 1h.
+
+    Args:
+        df: DataFrame with customer_id, timestamp and amount columns
+        bucket_seconds: Bucket width; must match the serving store's
+        sort: Stream rows in timestamp order rather than df order
+
+    Returns:
+        DataFrame of VELOCITY_FEATURES aligned to df.index
+    """
+    n_rows = len(df)
+    if n_rows == 0:
+        return pd.DataFrame(columns=VELOCITY_FEATURES, index=df.index, dtype=np.float64)
+
+    seconds = _to_seconds(df['timestamp'])
+    cents = _to_cents(df['amount'])
+    codes, _ = pd.factorize(df['customer_id'])
+
+    # Group rows by customer, keeping the stream order within each customer
+    stream = np.argsort(seconds, kind='stable') if sort else np.arange(n_rows)
+    order = stream[np.argsort(codes[stream], kind='stable')]
+    s_codes, s_seconds, s_cents = codes[order], seconds[order], cents[order]
+
+    # Clamp late rows to their customer's running max, as the store does;
+    # the offset keeps the running max from crossing customers
+    low = s_seconds.min()
+    offset = s_codes.astype(np.int64) * (int(s_seconds.max() - low) + 1)
+    s_seconds = np.maximum.accumulate(offset + (s_seconds - low)) - offset + low
+
+    # Exclusive prefix sums over the sorted rows
+    csum = np.concatenate([[0], np.cumsum(s_cents)])
+    positions = np.arange(n_rows)
+    group_start = np.r_[0, np.flatnonzero(np.diff(s_codes)) + 1]
+    group_sizes = np.diff(np.r_[group_start, n_rows])
+    first_in_group = np.repeat(group_start, group_sizes)
+
+    # One sortable key per row; the multiplier keeps customers' ranges apart
+    buckets = s_seconds // bucket_seconds
+    max_buckets = max(_window_buckets(window, bucket_seconds) for window in VELOCITY_WINDOWS.values())
+    b0 = buckets.min()
+    span = int(buckets.max() - b0) + max_buckets + 1
+    keys = s_codes.astype(np.int64) * span + (buckets - b0)
+
+    features = {}
+    for name, window in VELOCITY_WINDOWS.items():
+        left = np.searchsorted(keys, keys - _window_buckets(window, bucket_seconds), side='right')
+        features[f'txn_count_{name}'] = (positions - left).astype(np.float64)
+        features[f'txn_amount_{name}'] = (csum[positions] - csum[left]) / 100.0
+
+    previous = positions - 1
+    has_previous = positions > first_in_group
+    since_last = np.full(n_rows, np.nan)
+    since_last[has_previous] = s_seconds[has_previous] - s_seconds[previous[has_previous]]
+    features['seconds_since_last_txn'] = since_last
+
+    prior_count = positions - first_in_group
+    prior_sum = csum[positions] - csum[first_in_group]
+    deviation = np.full(n_rows, np.nan)
+    seen = prior_count > 0
+    deviation[seen] = (s_cents[seen] - prior_sum[seen] / prior_count[seen]) / 100.0
+    features['amount_vs_customer_mean'] = deviation
+
+    # Scatter back to the input order
+    result = np.empty((n_rows, len(VELOCITY_FEATURES)))
+    for j, name in enumerate(VELOCITY_FEATURES):
+        result[order, j] = features[name]
+    return pd.DataFrame(result, columns=VELOCITY_FEATURES, index=df.index)
+
+
+class _CustomerState:
+    """Per-customer window buckets plus lifetime totals"""
+
+    __slots__ = ('windows', 'last_seconds', 'count', 'cents')
+
+    def __init__(self):
+        # Per window: deque of [bucket, count, cents] for its non-empty
+        # buckets, oldest first, and the window's running count and cents
+        self.windows = {name: [deque(), 0, 0] for name in VELOCITY_WINDOWS}
+        self.last_seconds = None
+        self.count = 0
+        self.cents = 0
+
+
+class VelocityFeatureStore:
+    """Online, bounded-memory velocity features keyed by customer_id
+
+    Events are counted per bucket_seconds time bucket, so a customer holds
+    at most one counter per bucket of each window however many transactions
+    it sends (60 + 1440 with 60s buckets), and updates cost O(1) amortized.
+    Windows span whole buckets, matching compute_velocity_features with the
+    same bucket_seconds. At most max_customers customers are tracked, the
+    least recently active dropped first, and update sweeps out customers
+    idle for idle_seconds every evict_interval seconds of wall-clock time.
+    Timestamps are assumed non-decreasing per customer, as in a live
+    stream; a late event is clamped to the customer's latest timestamp, so
+    it lands in the newest bucket with seconds_since_last_txn of 0.
+    Thread-safe.
+
+    Offline parity holds for customers that were never dropped: a dropped
+    customer starts over with no history.
+    """
+
+    def __init__(self, max_customers=VELOCITY_MAX_CUSTOMERS, bucket_seconds=VELOCITY_BUCKET_SECONDS,
+                 idle_seconds=VELOCITY_IDLE_SECONDS, evict_interval=VELOCITY_EVICT_INTERVAL_SECONDS):
+        self.max_customers = max_customers
+        self.bucket_seconds = bucket_seconds
+        self.idle_seconds = idle_seconds
+        self.evict_interval = evict_interval
+        self._window_buckets = {name: _window_buckets(window, bucket_seconds)
+                                for name, window in VELOCITY_WINDOWS.items()}
+        self._customers = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + evict_interval
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._customers)
+
+    def update(self, customer_id, timestamp, amount):
+        """Return the velocity features of a transaction, then record it"""
+        seconds = _epoch_seconds(timestamp)
+        cents = int(np.rint(float(amount) * 100))
+        with self._lock:
+            self._maybe_sweep(seconds)
+            return self._update(customer_id, seconds, cents)
+
+    def _update(self, customer_id, seconds, cents):
+        # Caller holds the lock
+        state = self._customers.get(customer_id)
+        if state is None:
+            state = _CustomerState()
+            self._customers[customer_id] = state
+            if len(self._customers) > self.max_customers:
+                self._customers.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._customers.move_to_end(customer_id)
+            if state.last_seconds is not None and seconds < state.last_seconds:
+                seconds = state.last_seconds
+
+        bucket = seconds // self.bucket_seconds
+        features = {}
+        for name, n_buckets in self._window_buckets.items():
+            entry = state.windows[name]
+            buckets = entry[0]
+            while buckets and buckets[0][0] <= bucket - n_buckets:
+                _, count, bucket_cents = buckets.popleft()
+                entry[1] -= count
+                entry[2] -= bucket_cents
+            features[f'txn_count_{name}'] = float(entry[1])
+            features[f'txn_amount_{name}'] = entry[2] / 100.0
+            if buckets and buckets[-1][0] >= bucket:
+                buckets[-1][1] += 1
+                buckets[-1][2] += cents
+            else:
+                buckets.append([bucket, 1, cents])
+            entry[1] += 1
+            entry[2] += cents
+
+        features['seconds_since_last_txn'] = (
+            float(seconds - state.last_seconds) if state.last_seconds is not None else np.nan)
+        features['amount_vs_customer_mean'] = (
+            (cents - state.cents / state.count) / 100.0 if state.count else np.nan)
+
+        state.last_seconds = seconds
+        state.count += 1
+        state.cents += cents
+        return {name: features[name] for name in VELOCITY_FEATURES}
+
+    def _maybe_sweep(self, seconds):
+        # Caller holds the lock; the latest event time stands in for "now"
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.evict_interval
+            self._evict_idle(seconds)
+
+    def evict_idle(self, now):
+        """Drop customers with no activity within idle_seconds of now
+
+        Their window features would read as empty anyway; lifetime totals
+        (mean amount) are forgotten. update calls this periodically.
+
+        Returns:
+            Number of customers dropped
+        """
+        with self._lock:
+            return self._evict_idle(_epoch_seconds(now))
+
+    def _evict_idle(self, now_seconds):
+        # Caller holds the lock
+        cutoff = now_seconds - self.idle_seconds
+        removed = 0
+        # OrderedDict is kept in last-activity order, oldest first
+        while self._customers:
+            customer_id, state = next(iter(self._customers.items()))
+            if state.last_seconds is None or state.last_seconds > cutoff:
+                break
+            self._customers.popitem(last=False)
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def transform_batch(self, df):
+        """Stream a batch through the store in row order
+
+        The lock is held for the whole batch, so concurrent requests do not
+        interleave with its rows.
+
+        Returns:
+            DataFrame of VELOCITY_FEATURES aligned to df.index
+        """
+        seconds = [_epoch_seconds(t) for t in df['timestamp'].tolist()]
+        cents = _to_cents(df['amount']).tolist()
+        with self._lock:
+            if seconds:
+                self._maybe_sweep(max(seconds))
+            rows = [self._update(c, t, a) for c, t, a in
+                    zip(df['customer_id'].tolist(), seconds, cents)]
+        return pd.DataFrame(rows, columns=VELOCITY_FEATURES, index=df.index, dtype=np.float64)
@@ -0,0 +1,65 @@
+# conftest.py
+import contextlib
+import io
+import os
+
+import joblib
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import save_bundle
+from modularized.preprocessing import feature_engineering, get_preprocessor
+from modularized.training import _build_pipeline
+from modularized.velocity import compute_velocity_features
+
+MODEL_PARAMS = {'n_estimators': 30, 'max_depth': 5, 'learning_rate': 0.1}
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: runs training in subprocesses; deselect with -m 'not slow'")
+
+
+@pytest.fixture(scope='session')
+def fitted_model():
+    """Small preprocessor + XGBoost pipeline fitted on synthetic transactions"""
+    df = feature_engineering(generate_transactions(5_000, seed=1))
+    X = df.drop(columns=['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location'])
+    return _build_pipeline(MODEL_PARAMS, n_jobs=1).fit(X, df['is_fraud'])
+
+
+@pytest.fixture(scope='session')
+def joblib_model_dir(fitted_model, tmp_path_factory):
+    """Model directory in the joblib layout training.save_model writes"""
+    model_dir = str(tmp_path_factory.mktemp('joblib_model'))
+    joblib.dump(fitted_model.named_steps['preprocessor'],
+                os.path.join(model_dir, 'fraud_model_preprocessor.joblib'))
+    joblib.dump(fitted_model.named_steps['classifier'],
+                os.path.join(model_dir, 'fraud_model_classifier.joblib'))
+    with open(os.path.join(model_dir, 'fraud_model_threshold.txt'), 'w') as f:
+        f.write('0.5')
+    return model_dir
+
+
+@pytest.fixture(scope='session')
+def bundle_model_dir(fitted_model, tmp_path_factory):
+    """Model directory holding an artifact bundle"""
+    model_dir = str(tmp_path_factory.mktemp('bundle_model'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_bundle(fitted_model.named_steps['preprocessor'], fitted_model.named_steps['classifier'],
+                    0.5, model_dir=model_dir)
+    return model_dir
+
+
+@pytest.fixture(scope='session')
+def velocity_model_dir(tmp_path_factory):
+    """Model directory holding a bundle trained with velocity features"""
+    raw = generate_transactions(5_000, seed=2, n_customers=200)
+    df = feature_engineering(raw).join(compute_velocity_features(raw))
+    X = df.drop(columns=['is_fraud', 'timestamp', 'customer_id', 'merchant', 'location'])
+    model = _build_pipeline(MODEL_PARAMS, n_jobs=1).set_params(
+        preprocessor=get_preprocessor(include_velocity=True)).fit(X, df['is_fraud'])
+    model_dir = str(tmp_path_factory.mktemp('velocity_model'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_bundle(model.named_steps['preprocessor'], model.named_steps['classifier'],
+                    0.5, model_dir=model_dir)
+    return model_dir
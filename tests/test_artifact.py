@@ -0,0 +1,100 @@
+# test_artifact.py
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import (BOOSTER_NAME, MANIFEST_NAME, activate_version, bundle_path,
+                                  current_version, list_versions, load_bundle, save_bundle)
+from modularized.inference import FraudPredictor
+from modularized.preprocessing import feature_engineering
+
+
+@pytest.fixture
+def save(fitted_model, tmp_path):
+    """save_bundle of the fitted model into a fresh directory"""
+    def _save(threshold=0.5, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return save_bundle(fitted_model.named_steps['preprocessor'],
+                               fitted_model.named_steps['classifier'], threshold,
+                               model_dir=str(tmp_path), **kwargs)
+    return _save
+
+
+def _load(tmp_path, **kwargs):
+    return load_bundle(model_dir=str(tmp_path), **kwargs)
+
+
+def test_round_trip_scores_like_the_pipeline(fitted_model, save, tmp_path):
+    save(0.42)
+    compiled, classifier, threshold, manifest = _load(tmp_path)
+    X = feature_engineering(generate_transactions(500, seed=16, with_label=False))
+
+    np.testing.assert_allclose(classifier.predict_proba(compiled.transform(X))[:, 1],
+                               fitted_model.predict_proba(X)[:, 1], rtol=1e-6)
+    assert threshold == 0.42 and manifest['version'] == current_version(model_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize('filename', ['num_means.npy', BOOSTER_NAME, 'tree_threshold.npy'])
+def test_checksum_mismatch_is_rejected(save, tmp_path, filename):
+    path = save()
+    with open(os.path.join(path, filename), 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        _load(tmp_path)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        FraudPredictor(model_dir=str(tmp_path), metrics=None, drift=False)
+
+
+def test_current_pointer_rollback(save, tmp_path):
+    model_dir = str(tmp_path)
+    v1 = os.path.basename(save(0.3, version='v1'))
+    v2 = os.path.basename(save(0.6, version='v2'))
+    assert (v1, v2) == ('v1', 'v2') and current_version(model_dir=model_dir) == 'v2'
+
+    # A candidate saved inactive does not move CURRENT
+    save(0.9, version='v3', activate=False)
+    assert current_version(model_dir=model_dir) == 'v2'
+    assert list_versions(model_dir=model_dir) == ['v1', 'v2', 'v3']
+    assert FraudPredictor(model_dir=model_dir, metrics=None, drift=False).threshold == 0.6
+
+    activate_version('fraud_model', 'v1', model_dir)
+    predictor = FraudPredictor(model_dir=model_dir, metrics=None, drift=False)
+    assert (predictor.bundle_version, predictor.threshold) == ('v1', 0.3)
+    assert _load(tmp_path, version='v3')[2] == 0.9
+
+    with pytest.raises(FileNotFoundError):
+        activate_version('fraud_model', 'v9', model_dir)
+    assert current_version(model_dir=model_dir) == 'v1'
+
+
+def test_saved_versions_are_never_rewritten(save, tmp_path):
+    path = save(version='v1')
+    before = {name: os.stat(os.path.join(path, name)).st_mtime_ns for name in os.listdir(path)}
+    with pytest.raises(FileExistsError):
+        save(version='v1')
+    for label in ('.hidden', 'CURRENT', os.path.join('a', 'b')):
+        with pytest.raises(ValueError):
+            save(version=label)
+    save(version='v2')
+    assert {name: os.stat(os.path.join(path, name)).st_mtime_ns for name in os.listdir(path)} == before
+
+
+def test_old_versions_are_pruned(save, tmp_path):
+    model_dir = str(tmp_path)
+    for i in range(4):
+        save(version=f'v{i}', keep_versions=2)
+    assert list_versions(model_dir=model_dir) == ['v2', 'v3']
+
+    # The active version survives pruning even when it is the oldest
+    activate_version('fraud_model', 'v2', model_dir)
+    save(version='v4', activate=False, keep_versions=2)
+    assert list_versions(model_dir=model_dir) == ['v2', 'v4']
+    assert os.path.exists(os.path.join(bundle_path(model_dir=model_dir), MANIFEST_NAME))
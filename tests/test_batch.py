@@ -0,0 +1,60 @@
+# test_batch.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.batch import _batch_predictor, score_dataframe, score_file
+
+
+def test_velocity_model_scores_the_same_with_workers(velocity_model_dir):
+    df = generate_transactions(3_000, seed=11, with_label=False, n_customers=100)
+    kwargs = dict(chunk_size=400, model_dir=velocity_model_dir, keep_columns=['customer_id'])
+
+    sequential = score_dataframe(df, n_workers=1, **kwargs)
+    parallel = score_dataframe(df, n_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(parallel, sequential)
+    assert sequential['row_id'].tolist() == list(range(len(df)))
+
+    # One store sees every chunk, as a single predictor over the whole frame
+    whole = _batch_predictor('fraud_model', velocity_model_dir).predict(df, return_proba=True)
+    assert (sequential['fraud_probability'].to_numpy() == whole).all()
+
+
+@pytest.fixture(scope='module')
+def transactions():
+    return generate_transactions(2_500, seed=12, with_label=False)
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_chunks_are_scored_in_input_order(bundle_model_dir, transactions, n_workers):
+    expected = _batch_predictor('fraud_model', bundle_model_dir).predict(transactions, return_proba=True)
+    results = score_dataframe(transactions, n_workers=n_workers, chunk_size=300,
+                              model_dir=bundle_model_dir, keep_columns=['customer_id', 'missing'])
+
+    assert list(results.columns) == ['row_id', 'customer_id', 'fraud_probability', 'is_fraud']
+    assert results['row_id'].tolist() == list(range(len(transactions)))
+    assert results['customer_id'].tolist() == transactions['customer_id'].tolist()
+    np.testing.assert_allclose(results['fraud_probability'], expected, rtol=1e-6)
+    np.testing.assert_array_equal(results['is_fraud'], (expected >= 0.5).astype(int))
+
+
+@pytest.mark.parametrize('extension', ['.csv', '.parquet'])
+def test_score_file_matches_score_dataframe(bundle_model_dir, transactions, tmp_path, extension):
+    input_path, output_path = str(tmp_path / f'in{extension}'), str(tmp_path / f'out{extension}')
+    if extension == '.csv':
+        transactions.to_csv(input_path, index=False)
+        read = pd.read_csv
+    else:
+        transactions.to_parquet(input_path, index=False)
+        read = pd.read_parquet
+
+    summary = score_file(input_path, output_path, chunk_size=700, model_dir=bundle_model_dir)
+    expected = score_dataframe(transactions, chunk_size=700, model_dir=bundle_model_dir,
+                               keep_columns=['customer_id'])
+
+    assert summary == {'rows': len(transactions), 'fraud_count': int(expected['is_fraud'].sum()),
+                       'chunks': 4}
+    written = read(output_path)
+    assert written['row_id'].tolist() == list(range(len(transactions)))
+    np.testing.assert_allclose(written['fraud_probability'], expected['fraud_probability'], rtol=1e-6)
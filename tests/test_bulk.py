@@ -0,0 +1,99 @@
+# test_bulk.py
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.bulk import (ARROW, NDJSON, NPY, NdjsonDecoder, UnsupportedMediaType, decode_frame,
+                              encode_frame, encode_results, result_records)
+from modularized.inference import FraudPredictor
+from modularized.service import predict_batch_bulk_response
+
+FRAME_FORMATS = [pytest.param(ARROW, id='arrow'), pytest.param(NPY, id='npy')]
+
+
+@pytest.fixture
+def transactions():
+    df = generate_transactions(200, seed=18, with_label=False)
+    return df.assign(timestamp=df['timestamp'].astype(str))
+
+
+def _require(content_type):
+    if content_type == ARROW:
+        pytest.importorskip('pyarrow')
+
+
+@pytest.mark.parametrize('content_type', FRAME_FORMATS)
+def test_frame_round_trip(transactions, content_type):
+    _require(content_type)
+    decoded = decode_frame(encode_frame(transactions, content_type), content_type)
+    pd.testing.assert_frame_equal(decoded, transactions, check_dtype=False)
+
+
+def _decode_results(body, content_type):
+    if content_type == ARROW:
+        import pyarrow as pa
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        return table.to_pandas(), table.schema.metadata
+    if content_type == NPY:
+        return pd.DataFrame(np.load(io.BytesIO(body), allow_pickle=False)), None
+    return pd.DataFrame([json.loads(line) for line in body.decode('utf-8').splitlines()]), None
+
+
+@pytest.mark.parametrize('content_type', FRAME_FORMATS + [pytest.param(NDJSON, id='ndjson')])
+def test_results_round_trip(bundle_model_dir, transactions, content_type):
+    _require(content_type)
+    predictor = FraudPredictor(model_dir=bundle_model_dir, metrics=None, drift=False)
+    probabilities, predictions, risks = predictor.predict_with_scores(transactions)
+
+    body, status = predict_batch_bulk_response(predictor, encode_frame(transactions, NPY), NPY,
+                                               content_type)
+    assert status == 200
+    results, metadata = _decode_results(body, content_type)
+
+    np.testing.assert_array_equal(results['transaction_index'], np.arange(len(transactions)))
+    np.testing.assert_array_equal(results['is_fraud'], predictions.astype(bool))
+    np.testing.assert_array_equal(results['fraud_probability'], probabilities)
+    np.testing.assert_array_equal(results['risk_level'].astype(str), np.asarray(risks, dtype=str))
+    if metadata is not None:
+        assert float(metadata[b'threshold']) == predictor.threshold
+        assert int(metadata[b'fraud_count']) == int(predictions.sum())
+
+
+def test_ndjson_decoder_ignores_chunk_boundaries(transactions):
+    body = encode_frame(transactions, NDJSON)
+    decoder = NdjsonDecoder(rows_per_frame=64)
+    frames = []
+    for start in range(0, len(body), 777):
+        frames.extend(decoder.feed(body[start:start + 777]))
+    frames.extend(decoder.flush())
+
+    assert [len(frame) for frame in frames] == [64, 64, 64, 8]
+    pd.testing.assert_frame_equal(pd.concat(frames, ignore_index=True), transactions, check_dtype=False)
+
+    offset = 100
+    lines = encode_results(result_records(np.array([0.2]), np.array([0]), np.array(['LOW']), offset),
+                           NDJSON, 0.5).decode('utf-8').splitlines()
+    assert json.loads(lines[0]) == {'transaction_index': offset, 'is_fraud': False,
+                                    'fraud_probability': 0.2, 'risk_level': 'LOW'}
+
+
+def test_npy_with_object_fields_is_rejected(bundle_model_dir):
+    # A pickled field would run code on load; it is refused before any is read
+    records = np.array([(1.0, 'electronics')], dtype=[('amount', '<f8'), ('category', 'O')])
+    out = io.BytesIO()
+    np.lib.format.write_array(out, records, allow_pickle=True)
+
+    with pytest.raises(ValueError, match='without object fields'):
+        decode_frame(out.getvalue(), NPY)
+    with pytest.raises(ValueError):
+        decode_frame(out.getvalue()[:40], NPY)
+    with pytest.raises(UnsupportedMediaType):
+        decode_frame(b'', 'text/csv')
+
+    predictor = FraudPredictor(model_dir=bundle_model_dir, metrics=None, drift=False)
+    assert predict_batch_bulk_response(predictor, out.getvalue(), NPY, NPY)[1] == 400
+    assert predict_batch_bulk_response(predictor, b'', 'text/csv', NPY)[1] == 415
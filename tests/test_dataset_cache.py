@@ -0,0 +1,76 @@
+# test_dataset_cache.py
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized import preprocessing
+from modularized.dataset_cache import load_dataset
+from modularized.preprocessing import feature_engineering
+
+
+def _write_csv(path, tz=None, seed=0):
+    df = generate_transactions(2_000, seed=seed)
+    if tz is not None:
+        df['timestamp'] = df['timestamp'].dt.tz_localize('UTC').dt.tz_convert(tz)
+    df.loc[::97, 'category'] = np.nan
+    df.loc[::89, 'amount'] = np.nan
+    df.to_csv(path, index=False)
+
+
+def _read_csv(path):
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+
+def _entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if os.path.isdir(os.path.join(cache_dir, name)))
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'Asia/Kolkata'])
+def test_cache_hit_matches_csv_load(tmp_path, tz):
+    path, cache_dir = str(tmp_path / 'data.csv'), str(tmp_path / 'cache')
+    _write_csv(path, tz)
+    direct = _read_csv(path)
+
+    for _ in range(2):  # miss, then hit
+        pd.testing.assert_frame_equal(load_dataset(path, cache_dir=cache_dir), direct)
+        pd.testing.assert_frame_equal(load_dataset(path, engineered=True, cache_dir=cache_dir),
+                                      feature_engineering(direct.copy()))
+
+
+def test_editing_the_csv_invalidates(tmp_path):
+    path, cache_dir = str(tmp_path / 'data.csv'), str(tmp_path / 'cache')
+    _write_csv(path, seed=0)
+    load_dataset(path, cache_dir=cache_dir)
+    before = _entries(cache_dir)
+
+    _write_csv(path, seed=1)
+    pd.testing.assert_frame_equal(load_dataset(path, cache_dir=cache_dir), _read_csv(path))
+    after = _entries(cache_dir)
+    # The entry of the old content is replaced, not kept next to the new one
+    assert len(after) == 1 and after != before
+
+
+def test_editing_preprocessing_invalidates(tmp_path, monkeypatch):
+    path, cache_dir = str(tmp_path / 'data.csv'), str(tmp_path / 'cache')
+    _write_csv(path)
+    load_dataset(path, engineered=True, cache_dir=cache_dir)
+    key_dir = os.path.join(cache_dir, _entries(cache_dir)[0])
+    before = set(os.listdir(key_dir))
+
+    edited = str(tmp_path / 'preprocessing.py')
+    shutil.copy(preprocessing.__file__, edited)
+    with open(edited, 'a') as f:
+        f.write("\n# edited\n")
+    monkeypatch.setattr(preprocessing, '__file__', edited)
+
+    df = load_dataset(path, engineered=True, cache_dir=cache_dir)
+    pd.testing.assert_frame_equal(df, feature_engineering(_read_csv(path)))
+    after = set(os.listdir(key_dir))
+    assert 'raw' in after
+    assert len(after) == 2 and after != before
@@ -0,0 +1,108 @@
+# test_drift.py
+import contextlib
+import io
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import save_bundle
+from modularized.drift import DriftMonitor, build_reference_profile, ks_statistic, psi
+from modularized.inference import FraudPredictor
+from modularized.preprocessing import feature_engineering
+
+
+def test_psi_known_values():
+    assert psi([0.25] * 4, [0.25] * 4) == 0.0
+    expected = 0.4 * math.log(0.9 / 0.5) - 0.4 * math.log(0.1 / 0.5)
+    assert psi([0.5, 0.5], [0.9, 0.1]) == pytest.approx(expected)
+    assert psi([0.5, 0.5], [0.9, 0.1]) == pytest.approx(psi([0.9, 0.1], [0.5, 0.5]))
+    # Empty bins are floored, so PSI stays finite
+    assert np.isfinite(psi([0.5, 0.5, 0.0], [0.0, 0.5, 0.5]))
+
+
+def test_ks_known_values():
+    assert ks_statistic([0.25] * 4, [0.25] * 4) == 0.0
+    assert ks_statistic([0.5, 0.5, 0.0], [0.0, 0.5, 0.5]) == pytest.approx(0.5)
+    assert ks_statistic([1.0, 0.0], [0.0, 1.0]) == pytest.approx(1.0)
+    assert ks_statistic([], []) == 0.0
+
+
+def _monitor(reference, **kwargs):
+    profile = build_reference_profile(pd.DataFrame({'x': reference}), numeric_features=['x'],
+                                      categorical_features=[], n_bins=20)
+    return DriftMonitor(profile, flush_seconds=3600, **kwargs)
+
+
+def _live_stats(reference, live):
+    monitor = _monitor(reference, window_rows=1_000_000)
+    try:
+        monitor.update(pd.DataFrame({'x': live}))
+        return monitor.stats()['features']['x']
+    finally:
+        monitor.close()
+
+
+def test_normal_shift_is_detected():
+    rng = np.random.default_rng(0)
+    same = _live_stats(rng.normal(0, 1, 50_000), rng.normal(0, 1, 20_000))
+    shifted = _live_stats(rng.normal(0, 1, 50_000), rng.normal(1, 1, 20_000))
+
+    assert same['psi'] < 0.01 and same['ks'] < 0.02
+    assert shifted['psi'] > 0.5 and shifted['status'] == 'alert'
+    # Exact KS between N(0, 1) and N(1, 1) is 2 * Phi(0.5) - 1 = 0.383; bin edges bound it below
+    assert 0.33 < shifted['ks'] <= 0.40
+
+
+def test_window_rollover():
+    monitor = _monitor(np.arange(1_000.0), window_rows=100)
+    try:
+        def feed(n_rows, value):
+            monitor.update(pd.DataFrame({'x': np.full(n_rows, value)}))
+            return monitor.stats()
+
+        assert feed(60, 1.0)['window_rows'] == 60
+        # 120 rows fill the window: it becomes the previous one
+        assert feed(60, 1.0)['window_rows'] == 120
+        assert feed(50, 999.0)['window_rows'] == 170
+        # The second rollover drops the first window's rows
+        stats = feed(60, 999.0)
+        assert stats['window_rows'] == 110 and stats['rows_seen'] == 230
+        assert stats['features']['x']['psi'] > 1.0
+    finally:
+        monitor.close()
+
+
+def test_malformed_items_are_skipped():
+    monitor = DriftMonitor(build_reference_profile(feature_engineering(generate_transactions(500, seed=3))),
+                           flush_seconds=3600)
+    transactions = generate_transactions(20, seed=4, with_label=False)
+    rows = transactions.to_dict('records')
+    rows[3]['timestamp'] = 'not a timestamp'
+
+    for row in rows:
+        monitor.submit(row, 0.1)
+    monitor.submit(transactions, np.full(len(transactions), 0.1))
+    monitor.submit(transactions.drop(columns=['category']), np.full(len(transactions), 0.1))
+    monitor.close()
+
+    stats = monitor.stats()
+    assert stats['errors'] == 2
+    assert stats['rows_seen'] == 19 + len(transactions)
+
+
+def test_predictor_close_stops_the_monitor(fitted_model, tmp_path):
+    raw = generate_transactions(500, seed=5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_bundle(fitted_model.named_steps['preprocessor'], fitted_model.named_steps['classifier'],
+                    0.5, model_dir=str(tmp_path),
+                    drift_profile=build_reference_profile(feature_engineering(raw)))
+    predictor = FraudPredictor(model_dir=str(tmp_path), metrics=None, drift=True)
+    assert predictor.drift is not None and predictor.drift._thread.is_alive()
+
+    predictor.predict(raw.drop(columns=['is_fraud']), return_proba=True)
+    predictor.close()
+    assert not predictor.drift._thread.is_alive()
+    assert predictor.drift.stats()['rows_seen'] == len(raw)
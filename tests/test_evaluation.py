@@ -0,0 +1,80 @@
+# test_evaluation.py
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import (accuracy_score, average_precision_score, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+
+from modularized.evaluation import METRIC_NAMES, StreamingEvaluator, report_json
+
+
+def _scores(n_rows=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < 0.05).astype(int)
+    # Rounded scores give plenty of ties
+    proba = np.round(np.clip(rng.normal(0.3 + 0.3 * y, 0.15), 0, 1), 3)
+    return y, proba
+
+
+def _evaluate(y, proba, chunk_size=3_000, **kwargs):
+    kwargs.setdefault('segments', [])
+    evaluator = StreamingEvaluator(0.5, **kwargs)
+    for start in range(0, len(y), chunk_size):
+        evaluator.update(y[start:start + chunk_size], proba[start:start + chunk_size])
+    return evaluator
+
+
+def test_exact_metrics_match_sklearn():
+    y, proba = _scores()
+    metrics = _evaluate(y, proba, n_bootstrap=0, keep_scores=True).result()['metrics']
+    predicted = (proba >= 0.5).astype(int)
+
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y, predicted))
+    assert metrics['precision'] == pytest.approx(precision_score(y, predicted))
+    assert metrics['recall'] == pytest.approx(recall_score(y, predicted))
+    assert metrics['f1'] == pytest.approx(f1_score(y, predicted))
+    assert metrics['roc_auc'] == pytest.approx(roc_auc_score(y, proba), abs=1e-12)
+    assert metrics['pr_auc'] == pytest.approx(average_precision_score(y, proba), abs=1e-12)
+
+
+def test_binned_metrics_approximate_sklearn():
+    y, proba = _scores(seed=1)
+    metrics = _evaluate(y, proba, n_bootstrap=0).result()['metrics']
+    assert metrics['roc_auc'] == pytest.approx(roc_auc_score(y, proba), abs=5e-3)
+    assert metrics['pr_auc'] == pytest.approx(average_precision_score(y, proba), abs=1e-2)
+
+
+def test_chunking_does_not_change_the_result():
+    y, proba = _scores(seed=2)
+    whole = _evaluate(y, proba, chunk_size=len(y), n_bootstrap=0).result()
+    chunked = _evaluate(y, proba, chunk_size=777, n_bootstrap=0).result()
+    assert chunked['metrics'] == whole['metrics']
+    assert chunked['confusion_matrix'] == whole['confusion_matrix']
+
+
+def test_bootstrap_interval_shape():
+    y, proba = _scores(seed=3)
+    report = _evaluate(y, proba, n_bootstrap=50).result(confidence=0.9)
+    intervals = report['confidence_intervals']
+
+    assert set(intervals) == set(METRIC_NAMES)
+    for name, (low, high) in intervals.items():
+        assert low <= high
+        assert low <= report['metrics'][name] + 0.02 and report['metrics'][name] - 0.02 <= high
+    assert report['n_bootstrap'] == 50 and report['confidence'] == 0.9
+
+    assert _evaluate(y, proba, n_bootstrap=0).result()['confidence_intervals'] == {}
+
+
+def test_segments_and_undefined_metrics():
+    y = np.array([0, 0, 1, 0, 1, 0])
+    proba = np.array([0.1, 0.6, 0.9, 0.2, 0.4, 0.3])
+    evaluator = StreamingEvaluator(0.5, segments=['category'], n_bootstrap=0)
+    evaluator.update(y, proba, pd.DataFrame({'category': ['a', 'a', 'a', 'b', 'b', None]}))
+    segments = evaluator.result()['segments']['category']
+
+    assert sum(row['n'] for row in segments.values()) == len(y)
+    assert segments['a']['precision'] == 0.5
+    # One class only: AUCs are undefined and written as null
+    assert np.isnan(segments['missing']['roc_auc'])
+    assert '"roc_auc": null' in report_json(evaluator.result())
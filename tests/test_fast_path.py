@@ -0,0 +1,64 @@
+# test_fast_path.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.inference import FraudPredictor
+
+
+def _transactions():
+    transactions = generate_transactions(200, seed=7, with_label=False).to_dict('records')
+    for transaction in transactions:
+        transaction['timestamp'] = str(transaction['timestamp'])
+    # Values the encoder never saw encode to all zeros on both paths
+    transactions[0]['location'] = 'Reykjavik, Iceland'
+    transactions[1]['location'] = 'Nowhere'
+    transactions[2]['category'] = 'crypto'
+    transactions[3]['transaction_type'] = 'refund'
+    # Missing values are imputed with the fitted medians / most frequent values
+    transactions[4]['amount'] = None
+    transactions[5]['old_balance'] = None
+    transactions[5]['new_balance'] = None
+    transactions[6]['age'] = None
+    transactions[7]['category'] = None
+    transactions[8]['gender'] = None
+    transactions[9]['location'] = None
+    transactions[10].update(amount=None, category=None, location=None, gender=None)
+    return transactions
+
+
+@pytest.fixture(params=['joblib_model_dir', 'bundle_model_dir'])
+def predictor(request):
+    return FraudPredictor(model_dir=request.getfixturevalue(request.param), metrics=None, drift=False)
+
+
+def test_fast_path_is_compiled(predictor):
+    assert predictor.compiled is not None
+
+
+def test_predict_single_matches_predict(predictor):
+    transactions = _transactions()
+    fast = np.array([predictor.predict_single(t)[1] for t in transactions])
+    batch = predictor.predict(pd.DataFrame(transactions), return_proba=True)
+    np.testing.assert_allclose(fast, batch, rtol=0, atol=1e-7)
+
+
+def test_predict_single_matches_predict_one_row_frames(predictor):
+    transactions = _transactions()
+    # Rows of the full frame keep numeric dtypes where a field is None
+    df = pd.DataFrame(transactions)
+    for i, transaction in enumerate(transactions[:12]):
+        fast_pred, fast_prob = predictor.predict_single(transaction)
+        prob = predictor.predict(df.iloc[[i]], return_proba=True)[0]
+        assert fast_prob == pytest.approx(prob, rel=0, abs=1e-7)
+        assert fast_pred == int(prob >= predictor.threshold)
+
+
+def test_transform_one_matches_preprocessor(joblib_model_dir):
+    predictor = FraudPredictor(model_dir=joblib_model_dir, metrics=None, drift=False)
+    transactions = _transactions()
+    X = predictor.preprocess_data(pd.DataFrame(transactions))
+    expected = predictor.preprocessor.transform(X)
+    compiled = np.vstack([predictor.compiled.transform_one(t) for t in transactions])
+    np.testing.assert_allclose(compiled, expected, rtol=1e-12, atol=1e-12)
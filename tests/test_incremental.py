@@ -0,0 +1,88 @@
+# test_incremental.py
+import contextlib
+import io
+
+import numpy as np
+import pytest
+import xgboost
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import current_version, list_versions, load_bundle, save_bundle
+from modularized.incremental import _used_rounds, retrain_incremental
+from modularized.preprocessing import feature_engineering
+
+BASE_ROUNDS = 30
+
+
+def _matrix(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(2_000, 5))
+    y = (X[:, 0] + rng.normal(scale=2.0, size=len(X)) > 1.5).astype(int)
+    return xgboost.DMatrix(X, label=y)
+
+
+def test_used_rounds_drops_trees_past_early_stopping():
+    train, valid = _matrix(0), _matrix(1)
+    booster = xgboost.train({'max_depth': 6, 'eta': 0.5, 'eval_metric': 'logloss'}, train,
+                            num_boost_round=200, evals=[(valid, 'valid')],
+                            early_stopping_rounds=5, verbose_eval=False)
+    best_iteration = int(booster.attr('best_iteration'))
+    assert best_iteration + 1 < booster.num_boosted_rounds()
+
+    trimmed = _used_rounds(booster)
+    assert trimmed.num_boosted_rounds() == best_iteration + 1
+    assert trimmed.attr('best_iteration') is None
+    np.testing.assert_allclose(trimmed.predict(valid),
+                               booster.predict(valid, iteration_range=(0, best_iteration + 1)))
+
+
+def test_used_rounds_keeps_boosters_without_early_stopping():
+    booster = xgboost.train({'max_depth': 3}, _matrix(0), num_boost_round=10)
+    assert _used_rounds(booster) is booster and booster.num_boosted_rounds() == 10
+
+
+@pytest.fixture
+def base_dir(fitted_model, tmp_path):
+    """Model directory whose active bundle version v1 is the fitted model"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_bundle(fitted_model.named_steps['preprocessor'], fitted_model.named_steps['classifier'],
+                    0.5, model_dir=str(tmp_path), version='v1')
+    return str(tmp_path)
+
+
+def _retrain(model_dir, **kwargs):
+    df = feature_engineering(generate_transactions(3_000, seed=19))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return retrain_incremental(df.drop(columns=['is_fraud']), df['is_fraud'], model_dir=model_dir,
+                                   extra_rounds=10, **kwargs)
+
+
+@pytest.mark.parametrize('resampling', ['chunk_smote', 'weight'])
+def test_new_version_is_saved_inactive(base_dir, resampling):
+    _retrain(base_dir, version='v2', resampling=resampling)
+
+    assert current_version(model_dir=base_dir) == 'v1'
+    assert list_versions(model_dir=base_dir) == ['v1', 'v2']
+    base = load_bundle(model_dir=base_dir)[1].get_booster()
+    compiled, classifier, threshold, manifest = load_bundle(model_dir=base_dir, version='v2')
+    assert manifest['version'] == 'v2' and 0.0 <= threshold <= 1.0
+
+    # The warm start keeps the base trees and adds extra_rounds after them
+    booster = classifier.get_booster()
+    assert booster.num_boosted_rounds() == BASE_ROUNDS + 10
+    X = xgboost.DMatrix(compiled.transform(feature_engineering(
+        generate_transactions(500, seed=20, with_label=False))))
+    np.testing.assert_allclose(booster.predict(X, iteration_range=(0, BASE_ROUNDS)), base.predict(X),
+                               rtol=1e-6)
+    assert not np.allclose(booster.predict(X), base.predict(X))
+
+
+def test_activate_and_base_version(base_dir):
+    _retrain(base_dir, version='v2', activate=True)
+    assert current_version(model_dir=base_dir) == 'v2'
+
+    # Starting again from v1 rather than the now active v2
+    _retrain(base_dir, version='v3', base_version='v1')
+    assert current_version(model_dir=base_dir) == 'v2'
+    booster = load_bundle(model_dir=base_dir, version='v3')[1].get_booster()
+    assert booster.num_boosted_rounds() == BASE_ROUNDS + 10
@@ -0,0 +1,56 @@
+# test_metrics.py
+import threading
+import time
+
+from benchmarks.synthetic import generate_transactions
+from modularized.drift import DriftMonitor, build_reference_profile
+from modularized.inference import FraudPredictor
+from modularized.metrics import SamplingProfiler
+from modularized.microbatch import MicroBatcher
+from modularized.service import predict_response
+
+
+def _folded_counts(folded):
+    for line in folded.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        yield stack, int(count)
+
+
+def test_profiler_samples_the_scoring_threads(bundle_model_dir):
+    predictor = FraudPredictor(model_dir=bundle_model_dir, metrics=None, drift=False)
+    transactions = generate_transactions(50, seed=9, with_label=False).to_dict('records')
+    for transaction in transactions:
+        transaction['timestamp'] = str(transaction['timestamp'])
+
+    # Idle background threads inside the package, as in a running server
+    monitor = DriftMonitor(build_reference_profile(generate_transactions(500, seed=9)))
+    batcher = MicroBatcher(predictor)
+    stop = threading.Event()
+
+    def load():
+        while not stop.is_set():
+            for transaction in transactions:
+                predict_response(predictor, dict(transaction))
+
+    profiler = SamplingProfiler(interval_ms=2, max_seconds=30)
+    workers = [threading.Thread(target=load) for _ in range(2)]
+    try:
+        for worker in workers:
+            worker.start()
+        profiler.start()
+        time.sleep(1.0)
+        profiler.stop()
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+        batcher.stop()
+        monitor.close()
+
+    counts = dict(_folded_counts(profiler.folded()))
+    total = sum(counts.values())
+    assert total > 0
+    scoring = sum(count for stack, count in counts.items()
+                  if 'service.py:' in stack or 'inference.py:' in stack)
+    assert scoring / total > 0.9
+    assert not any('drift.py:_run' in stack or 'microbatch.py:_run' in stack for stack in counts)
@@ -0,0 +1,87 @@
+# test_microbatch.py
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.inference import FraudPredictor
+from modularized.microbatch import MicroBatcher
+
+
+def _transactions(n_rows, seed, n_customers=None):
+    transactions = generate_transactions(n_rows, seed=seed, with_label=False,
+                                         n_customers=n_customers).to_dict('records')
+    for transaction in transactions:
+        transaction['timestamp'] = str(transaction['timestamp'])
+    return transactions
+
+
+def _outcomes(results):
+    """(prediction, probability) per request, or the exception type"""
+    outcomes = []
+    for result in results:
+        try:
+            outcomes.append(result() if callable(result) else result.result(timeout=30))
+        except Exception as e:
+            outcomes.append(type(e))
+    return outcomes
+
+
+def _assert_same(actual, expected):
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected):
+        if isinstance(e, tuple):
+            assert a[0] == e[0] and a[1] == pytest.approx(e[1], rel=1e-6)
+        else:
+            assert a is e
+
+
+def _run(model_dir, transactions):
+    """Micro-batched and sequential outcomes, each on a fresh predictor"""
+    predictor = FraudPredictor(model_dir=model_dir, metrics=None, drift=False)
+    batcher = MicroBatcher(predictor, max_batch_size=16, max_wait_ms=20)
+    try:
+        futures = [batcher.submit(dict(transaction)) for transaction in transactions]
+        batched = _outcomes(futures)
+        stats = batcher.stats()
+    finally:
+        batcher.stop()
+
+    sequential = FraudPredictor(model_dir=model_dir, metrics=None, drift=False)
+    expected = _outcomes([lambda t=t: sequential.predict_single(dict(t)) for t in transactions])
+    return predictor, sequential, batched, expected, stats
+
+
+def test_batches_match_single_predictions(bundle_model_dir):
+    transactions = _transactions(100, seed=13)
+    _, _, batched, expected, stats = _run(bundle_model_dir, transactions)
+
+    _assert_same(batched, expected)
+    assert stats['items'] == 100 and stats['errors'] == 0
+    assert stats['mean_batch_size'] > 1
+
+
+def test_malformed_request_fails_alone(bundle_model_dir):
+    transactions = _transactions(40, seed=14)
+    # Fails the batch frame, so its batch is scored one by one
+    transactions[3]['age'] = 'forty'
+    # Fails on every path
+    transactions[5]['category'] = {'nested': 'value'}
+    _, _, batched, expected, stats = _run(bundle_model_dir, transactions)
+
+    assert batched[5] is expected[5] is TypeError
+    _assert_same(batched, expected)
+    assert stats['errors'] == 1
+
+
+def test_velocity_is_recorded_once(velocity_model_dir):
+    transactions = _transactions(120, seed=15, n_customers=10)
+    transactions[3]['age'] = 'forty'
+    # Rejected by the store, and rejected by scoring after the store recorded it
+    transactions[7]['amount'] = 'n/a'
+    transactions[30]['category'] = {'nested': 'value'}
+    predictor, sequential, batched, expected, stats = _run(velocity_model_dir, transactions)
+
+    _assert_same(batched, expected)
+    assert stats['errors'] == 2
+    counts = {c: s.count for c, s in predictor.velocity_store._customers.items()}
+    assert counts == {c: s.count for c, s in sequential.velocity_store._customers.items()}
+    assert sum(counts.values()) == len(transactions) - 1
@@ -0,0 +1,60 @@
+# test_preprocessing.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.preprocessing import ENGINEERED_FEATURES, feature_engineering
+
+
+def _baseline_feature_engineering(df):
+    """The row-wise implementation feature_engineering replaced"""
+    df['hour'] = df['timestamp'].dt.hour
+    df['day_of_week'] = df['timestamp'].dt.dayofweek
+    df['month'] = df['timestamp'].dt.month
+    df['balance_diff'] = df['old_balance'] - df['new_balance']
+    df['overdraft_attempt'] = np.where(df['amount'] > df['old_balance'], 1, 0)
+    df['amount_to_balance_ratio'] = df['amount'] / (df['old_balance'] + 1e-6)
+    df['is_night'] = df['hour'].apply(lambda x: 1 if x < 5 or x > 22 else 0)
+    df['is_high_risk_category'] = df['category'].isin(['electronics', 'travel', 'gaming']).astype(int)
+    df['country'] = df['location'].str.split(',').str[-1].str.strip()
+    return df
+
+
+@pytest.fixture
+def raw():
+    df = generate_transactions(3_000, seed=6)
+    df.index = df.index * 3 + 100  # a non-default index must be kept
+    df.loc[df.index[::50], 'location'] = np.nan
+    df.loc[df.index[::70], 'category'] = np.nan
+    df.loc[df.index[::90], 'amount'] = np.nan
+    df.loc[df.index[1], 'location'] = 'Lisbon,Portugal '
+    return df
+
+
+def test_full_output_matches_baseline(raw):
+    expected = _baseline_feature_engineering(raw.copy())
+    actual = feature_engineering(raw.copy())
+    pd.testing.assert_frame_equal(actual, expected[actual.columns], check_dtype=False)
+
+
+def test_string_timestamps_are_parsed(raw):
+    expected = feature_engineering(raw.copy())
+    actual = feature_engineering(raw.assign(timestamp=raw['timestamp'].astype(str)))
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('columns', [
+    list(ENGINEERED_FEATURES),
+    ['amount', 'hour', 'country'],
+    ['is_night', 'category'],
+    ['customer_id'],
+])
+def test_selected_columns_match_baseline(raw, columns):
+    untouched = raw.copy()
+    expected = _baseline_feature_engineering(raw.copy())[columns]
+    actual = feature_engineering(raw, columns=columns)
+
+    assert list(actual.columns) == columns
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(raw, untouched)
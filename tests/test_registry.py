@@ -0,0 +1,76 @@
+# test_registry.py
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.artifact import current_version, save_bundle
+from modularized.inference import FraudPredictor
+from modularized.registry import ModelRegistry
+
+
+@pytest.fixture
+def save(fitted_model, tmp_path):
+    """save_bundle of the fitted model into a fresh directory"""
+    def _save(threshold, version, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_bundle(fitted_model.named_steps['preprocessor'],
+                        fitted_model.named_steps['classifier'], threshold,
+                        model_dir=str(tmp_path), version=version, **kwargs)
+    return _save
+
+
+@pytest.fixture
+def registry(save, tmp_path):
+    save(0.5, 'v1')
+    canary = generate_transactions(300, seed=17, with_label=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        registry = ModelRegistry(model_dir=str(tmp_path), canary=canary, min_agreement=0.95)
+    yield registry
+    registry.close()
+
+
+def _reload(registry, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return registry.reload(**kwargs)
+
+
+def test_canary_accepts_a_matching_candidate(registry, save, tmp_path):
+    save(0.55, 'v2', activate=False)
+    event = _reload(registry, version='v2')
+
+    assert event['status'] == 'swapped' and event['previous_version'] == 'v1'
+    assert event['canary']['canary_rows'] == 300 and event['canary']['agreement'] >= 0.95
+    assert registry.status()['active']['version'] == 'v2' and registry.threshold == 0.55
+    assert current_version(model_dir=str(tmp_path)) == 'v2'
+
+
+def test_canary_rejects_a_disagreeing_candidate(registry, save, tmp_path):
+    # Flags every transaction, so it disagrees on all legitimate canary rows
+    save(0.0, 'v2', activate=False)
+    before = registry.active
+    event = _reload(registry, version='v2')
+
+    assert event['status'] == 'rejected' and 'agrees with the active model' in event['error']
+    assert registry.active is before and registry.threshold == 0.5
+    assert current_version(model_dir=str(tmp_path)) == 'v1'
+    assert registry.status()['history'][-1] is event
+
+    with pytest.raises(ValueError):
+        registry.validate(FraudPredictor(model_dir=str(tmp_path), version='v2', metrics=None, drift=False))
+
+
+def test_rollback_to_an_older_version(registry, save, tmp_path):
+    save(0.6, 'v2')
+    assert _reload(registry)['status'] == 'swapped'
+    assert (registry.status()['active']['version'], registry.threshold) == ('v2', 0.6)
+
+    event = _reload(registry, version='v1')
+    assert event['status'] == 'swapped' and event['previous_version'] == 'v2'
+    assert (registry.status()['active']['version'], registry.threshold) == ('v1', 0.5)
+    assert current_version(model_dir=str(tmp_path)) == 'v1'
+
+    # A version that does not exist leaves the active model in place
+    assert _reload(registry, version='v9')['status'] == 'failed'
+    assert registry.status()['active']['version'] == 'v1'
@@ -0,0 +1,111 @@
+# test_result_cache.py
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized import result_cache
+from modularized.registry import ModelRegistry
+from modularized.result_cache import ENTRY_BYTES, ResultCache, transaction_key
+from modularized.service import predict_response
+
+MODEL = object()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl_seconds=10)
+    assert cache.get(b'k', MODEL) is None
+    cache.put(b'k', MODEL, 1, 0.9)
+    clock[0] += 9.5
+    assert cache.get(b'k', MODEL) == (1, 0.9)
+    clock[0] += 1.0
+    assert cache.get(b'k', MODEL) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations'], stats['entries']) == (1, 2, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=3)
+    cache.get(b'a', MODEL)
+    for key in (b'a', b'b', b'c'):
+        cache.put(key, MODEL, 0, 0.1)
+    cache.get(b'a', MODEL)
+    cache.put(b'd', MODEL, 0, 0.1)
+
+    assert cache.get(b'b', MODEL) is None
+    assert all(cache.get(key, MODEL) is not None for key in (b'a', b'c', b'd'))
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_cap_limits_entries():
+    assert ResultCache(max_entries=1_000, max_bytes=5 * ENTRY_BYTES).max_entries == 5
+    assert ResultCache(max_entries=3, max_bytes=5 * ENTRY_BYTES).max_entries == 3
+    assert ResultCache(max_bytes=0).max_entries == 1
+
+    cache = ResultCache(max_entries=1_000, max_bytes=5 * ENTRY_BYTES)
+    for i in range(20):
+        cache.get(bytes([i]), MODEL)
+        cache.put(bytes([i]), MODEL, 0, 0.1)
+    assert cache.stats()['entries'] == 5
+    assert cache.stats()['approx_bytes'] <= 5 * ENTRY_BYTES
+
+
+def test_model_change_invalidates():
+    old, new = object(), object()
+    cache = ResultCache()
+    cache.get(b'k', old)
+    cache.put(b'k', old, 1, 0.9)
+    assert cache.get(b'k', new) is None
+    # A result scored by the swapped-out model is not stored
+    cache.put(b'k', old, 1, 0.9)
+    assert cache.get(b'k', new) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_transaction_key_is_canonical():
+    key = transaction_key({'amount': 150, 'category': 'electronics '}, 'v1')
+    assert key == transaction_key({'category': 'electronics', 'amount': 150.0}, 'v1')
+    assert key != transaction_key({'amount': 150, 'category': 'electronics'}, 'v2')
+
+
+def _transaction(**overrides):
+    transaction = generate_transactions(1, seed=21, with_label=False).to_dict('records')[0]
+    transaction['timestamp'] = str(transaction['timestamp'])
+    transaction.update(overrides)
+    return transaction
+
+
+def test_reload_invalidates_cached_results(bundle_model_dir):
+    registry = ModelRegistry(model_dir=bundle_model_dir)
+    cache = ResultCache()
+    try:
+        first, _ = predict_response(registry, _transaction(), cache=cache)
+        again, _ = predict_response(registry, _transaction(), cache=cache)
+        assert again == first and cache.stats()['hits'] == 1
+
+        assert registry.reload()['status'] == 'swapped'
+        predict_response(registry, _transaction(), cache=cache)
+        stats = cache.stats()
+        assert (stats['hits'], stats['invalidations']) == (1, 1)
+    finally:
+        registry.close()
+
+
+def test_transactions_without_timestamp_skip_the_cache(bundle_model_dir):
+    registry = ModelRegistry(model_dir=bundle_model_dir)
+    cache = ResultCache()
+    try:
+        transaction = _transaction()
+        del transaction['timestamp']
+        for _ in range(2):
+            response, status = predict_response(registry, dict(transaction), cache=cache)
+            assert status == 200
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (0, 0, 0)
+    finally:
+        registry.close()
@@ -0,0 +1,86 @@
+# test_training.py
+import numpy as np
+import pytest
+from sklearn.metrics import confusion_matrix, f1_score, precision_recall_curve
+
+from modularized.training import find_optimal_threshold, threshold_curve
+
+
+class _Scores:
+    """Stands in for a fitted model whose probabilities are known"""
+
+    def __init__(self, y_proba):
+        self.y_proba = y_proba
+
+    def predict_proba(self, X):
+        return np.column_stack([1 - self.y_proba, self.y_proba])
+
+
+def _baseline_find_optimal_threshold(model, X, y_true, min_precision=0.60, min_recall=0.60):
+    """The per-threshold loop find_optimal_threshold replaced"""
+    y_proba = model.predict_proba(X)[:, 1]
+    precision, recall, thresholds = precision_recall_curve(y_true, y_proba)
+    candidate_thresholds = []
+    for i, thresh in enumerate(thresholds):
+        if precision[i] >= min_precision and recall[i] >= min_recall:
+            candidate_thresholds.append((thresh, f1_score(y_true, y_proba >= thresh)))
+    if candidate_thresholds:
+        candidate_thresholds.sort(key=lambda x: x[1], reverse=True)
+        return candidate_thresholds[0][0]
+    f1_scores = 2 * (precision * recall) / (precision + recall + 1e-9)
+    return thresholds[np.argmax(f1_scores)]
+
+
+def _scores(n_rows=3_000, seed=0):
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < 0.1).astype(int)
+    # Rounded scores give ties between classes
+    proba = np.round(np.clip(rng.normal(0.3 + 0.35 * y, 0.15), 0, 1), 2)
+    return y, proba
+
+
+def test_curve_matches_sklearn():
+    y, proba = _scores()
+    curve = threshold_curve(y, proba)
+    precision, recall, thresholds = precision_recall_curve(y, proba)
+
+    index = np.searchsorted(curve['thresholds'], thresholds)
+    np.testing.assert_array_equal(curve['thresholds'][index], thresholds)
+    np.testing.assert_allclose(curve['precision'][index], precision[:-1])
+    np.testing.assert_allclose(curve['recall'][index], recall[:-1])
+
+    for i in range(0, len(curve['thresholds']), 7):
+        predicted = proba >= curve['thresholds'][i]
+        tn, fp, fn, tp = confusion_matrix(y, predicted).ravel()
+        assert (curve['tp'][i], curve['fp'][i], curve['fn'][i]) == (tp, fp, fn)
+        assert curve['f1'][i] == pytest.approx(f1_score(y, predicted))
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('min_precision, min_recall', [(0.6, 0.6), (0.3, 0.8), (0.99, 0.99)])
+def test_selection_matches_baseline(seed, min_precision, min_recall):
+    y, proba = _scores(seed=seed)
+    model = _Scores(proba)
+    expected = _baseline_find_optimal_threshold(model, None, y, min_precision, min_recall)
+    assert find_optimal_threshold(model, None, y, min_precision, min_recall) == pytest.approx(expected)
+    assert find_optimal_threshold(None, None, y, min_precision, min_recall, y_proba=proba) == \
+        pytest.approx(expected)
+
+
+def test_other_objectives_match_brute_force():
+    y, proba = _scores(seed=7)
+    thresholds = np.unique(proba)
+    counts = [confusion_matrix(y, proba >= t).ravel() for t in thresholds]
+
+    costs = [1.0 * fp + 10.0 * fn for tn, fp, fn, tp in counts]
+    selected = find_optimal_threshold(None, None, y, 0.0, 0.0, objective='cost', y_proba=proba)
+    assert selected == thresholds[int(np.argmin(costs))]
+
+    recall = np.array([tp / (tp + fn) for tn, fp, fn, tp in counts])
+    precision = np.array([tp / (tp + fp) if tp + fp else 0.0 for tn, fp, fn, tp in counts])
+    allowed = np.flatnonzero(precision >= 0.5)
+    selected = find_optimal_threshold(None, None, y, 0.5, objective='recall_at_precision', y_proba=proba)
+    assert selected == thresholds[allowed[np.argmax(recall[allowed])]]
+
+    with pytest.raises(ValueError):
+        find_optimal_threshold(None, None, y, objective='accuracy', y_proba=proba)
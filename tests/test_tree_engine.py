@@ -0,0 +1,95 @@
+# test_tree_engine.py
+import numpy as np
+import pytest
+from scipy import sparse
+from xgboost import XGBClassifier, XGBRegressor
+
+from benchmarks.synthetic import generate_transactions
+from modularized.inference import FraudPredictor
+from modularized.preprocessing import feature_engineering, get_preprocessor
+from modularized.tree_engine import TreeEngineClassifier, TreeEnsemble
+
+TRAIN_PARAMS = {'n_estimators': 40, 'max_depth': 6, 'n_jobs': 1, 'random_state': 0}
+
+
+def _engineered(n_rows, seed):
+    df = feature_engineering(generate_transactions(n_rows, seed=seed))
+    return df.drop(columns=['is_fraud']), df['is_fraud']
+
+
+@pytest.fixture(scope='module')
+def dense_data():
+    X_train, y_train = _engineered(4_000, seed=1)
+    X_test, _ = _engineered(1_000, seed=2)
+    preprocessor = get_preprocessor(include_velocity=False, sparse=False).fit(X_train)
+    return preprocessor.transform(X_train), y_train, preprocessor.transform(X_test)
+
+
+def _inplace(classifier, X, iteration_range=(0, 0)):
+    return classifier.get_booster().inplace_predict(X, iteration_range=iteration_range)
+
+
+def test_matches_inplace_predict(dense_data):
+    X_train, y_train, X_test = dense_data
+    classifier = XGBClassifier(**TRAIN_PARAMS).fit(X_train, y_train)
+    engine = TreeEngineClassifier(classifier)
+    assert np.allclose(engine.predict_proba(X_test)[:, 1], _inplace(classifier, X_test), atol=1e-6)
+
+
+def test_matches_inplace_predict_with_missing_values(dense_data):
+    X_train, y_train, X_test = dense_data
+    rng = np.random.default_rng(0)
+    X_train = np.where(rng.random(X_train.shape) < 0.1, np.nan, X_train)
+    X_test = np.where(rng.random(X_test.shape) < 0.1, np.nan, X_test)
+    classifier = XGBClassifier(**TRAIN_PARAMS).fit(X_train, y_train)
+    engine = TreeEngineClassifier(classifier)
+    assert np.allclose(engine.predict_proba(X_test)[:, 1], _inplace(classifier, X_test), atol=1e-6)
+
+
+def test_matches_inplace_predict_on_csr():
+    X_train, y_train = _engineered(4_000, seed=1)
+    X_test, _ = _engineered(1_000, seed=2)
+    preprocessor = get_preprocessor(include_velocity=False, sparse=True).fit(X_train)
+    X_train, X_test = preprocessor.transform(X_train), preprocessor.transform(X_test)
+    assert sparse.issparse(X_test)
+    classifier = XGBClassifier(**TRAIN_PARAMS).fit(X_train, y_train)
+    engine = TreeEngineClassifier(classifier)
+    assert np.allclose(engine.predict_proba(X_test)[:, 1], _inplace(classifier, X_test), atol=1e-6)
+
+
+def test_single_row(dense_data):
+    X_train, y_train, X_test = dense_data
+    classifier = XGBClassifier(**TRAIN_PARAMS).fit(X_train, y_train)
+    engine = TreeEngineClassifier(classifier)
+    for row in X_test[:20]:
+        row = row.reshape(1, -1)
+        assert np.allclose(engine.predict_proba(row)[:, 1], _inplace(classifier, row), atol=1e-6)
+
+
+def test_early_stopping_uses_best_iteration(dense_data):
+    X_train, y_train, X_test = dense_data
+    classifier = XGBClassifier(**{**TRAIN_PARAMS, 'n_estimators': 200}, early_stopping_rounds=5,
+                               eval_metric='logloss')
+    classifier.fit(X_train[:3_000], y_train[:3_000], eval_set=[(X_train[3_000:], y_train[3_000:])],
+                   verbose=False)
+    best = int(classifier.get_booster().attr('best_iteration'))
+    engine = TreeEngineClassifier(classifier)
+    assert np.allclose(engine.predict_proba(X_test)[:, 1],
+                       _inplace(classifier, X_test, iteration_range=(0, best + 1)), atol=1e-6)
+
+
+def test_bundle_predictor_engines_agree(bundle_model_dir):
+    df = generate_transactions(500, seed=3, with_label=False)
+    numpy_engine = FraudPredictor(model_dir=bundle_model_dir, metrics=None, drift=False, engine='numpy')
+    xgboost_engine = FraudPredictor(model_dir=bundle_model_dir, metrics=None, drift=False,
+                                    engine='xgboost')
+    assert isinstance(numpy_engine.classifier, TreeEngineClassifier)
+    assert np.allclose(numpy_engine.predict(df, return_proba=True),
+                       xgboost_engine.predict(df, return_proba=True), atol=1e-6)
+
+
+def test_rejects_other_objectives(dense_data):
+    X_train, y_train, _ = dense_data
+    regressor = XGBRegressor(n_estimators=5, n_jobs=1).fit(X_train, y_train)
+    with pytest.raises(ValueError):
+        TreeEnsemble.from_booster(regressor.get_booster())
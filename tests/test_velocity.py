@@ -0,0 +1,111 @@
+# test_velocity.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_transactions
+from modularized.velocity import VELOCITY_FEATURES, VelocityFeatureStore, compute_velocity_features
+
+NO_SWEEP = float('inf')
+
+
+def _frame(rows):
+    """DataFrame from (customer_id, timestamp, amount) tuples"""
+    return pd.DataFrame(rows, columns=['customer_id', 'timestamp', 'amount']).assign(
+        timestamp=lambda df: pd.to_datetime(df['timestamp']))
+
+
+def _stream(df, store):
+    """Features from feeding df's rows one by one through store"""
+    rows = [store.update(c, t, a) for c, t, a in zip(df['customer_id'], df['timestamp'], df['amount'])]
+    return pd.DataFrame(rows, columns=VELOCITY_FEATURES, index=df.index, dtype=np.float64)
+
+
+def _store(**kwargs):
+    kwargs.setdefault('evict_interval', NO_SWEEP)
+    return VelocityFeatureStore(**kwargs)
+
+
+def test_out_of_order_rows_match_the_store():
+    df = _frame([('c1', '2024-01-01 10:00', 10.0), ('c1', '2024-01-01 09:00', 20.0),
+                 ('c1', '2024-01-01 10:30', 30.0), ('c1', '2024-01-01 08:00', 40.0),
+                 ('c2', '2024-01-01 09:15', 5.0)])
+
+    online = _stream(df, _store())
+    offline = compute_velocity_features(df, sort=False)
+    pd.testing.assert_frame_equal(offline, online)
+    # Late rows are clamped, never giving negative gaps
+    assert (online['seconds_since_last_txn'].dropna() >= 0).all()
+    assert online.loc[1, 'seconds_since_last_txn'] == 0
+    assert online.loc[3, 'txn_count_1h'] == 3
+
+    # Sorted offline features match the store fed in timestamp order
+    ordered = df.sort_values('timestamp', kind='stable')
+    pd.testing.assert_frame_equal(compute_velocity_features(df),
+                                  _stream(ordered, _store()).loc[df.index])
+
+
+@pytest.mark.parametrize('bucket_seconds', [1, 60, 3600])
+def test_bucket_boundaries_and_ties(bucket_seconds):
+    base = pd.Timestamp('2024-01-01')
+    offsets = [0, 0, 59, 60, 60, 3599, 3600, 3600, 3660, 86399, 86400, 86400, 90000]
+    df = _frame([('c1', base + pd.Timedelta(seconds=s), float(i + 1)) for i, s in enumerate(offsets)])
+
+    online = _stream(df, _store(bucket_seconds=bucket_seconds))
+    offline = compute_velocity_features(df, bucket_seconds=bucket_seconds)
+    pd.testing.assert_frame_equal(offline, online)
+    # Ties see each other in row order
+    assert online.loc[1, 'seconds_since_last_txn'] == 0
+    assert online.loc[1, 'txn_count_1h'] == 1
+
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_shuffled_transactions_match_the_store(sort):
+    raw = generate_transactions(2_000, seed=3, with_label=False, n_customers=50)
+    df = raw.sample(frac=1.0, random_state=0)
+    streamed = df.sort_values('timestamp', kind='stable') if sort else df
+
+    online = _stream(streamed, _store()).loc[df.index]
+    offline = compute_velocity_features(df, sort=sort)
+    pd.testing.assert_frame_equal(offline, online)
+
+
+def test_transform_batch_matches_update():
+    df = generate_transactions(300, seed=5, with_label=False, n_customers=20)
+    pd.testing.assert_frame_equal(_store().transform_batch(df), _stream(df, _store()))
+
+
+def test_evicted_customer_starts_over():
+    df = _frame([('c1', '2024-01-01 10:00', 10.0), ('c1', '2024-01-01 10:05', 20.0),
+                 ('c2', '2024-01-01 10:10', 30.0),
+                 ('c1', '2024-01-01 10:20', 40.0), ('c1', '2024-01-01 10:25', 50.0)])
+    store = _store(max_customers=1)
+    online = _stream(df, store)
+    assert store.evictions == 2
+
+    # c1 was dropped for c2, so its later rows only see each other
+    again = df.iloc[3:]
+    pd.testing.assert_frame_equal(online.iloc[3:], compute_velocity_features(again))
+    pd.testing.assert_frame_equal(online.iloc[:2], compute_velocity_features(df.iloc[:2]))
+
+
+def test_idle_sweep_drops_history():
+    df = _frame([('c1', '2024-01-01 10:00', 10.0), ('c2', '2024-01-02 09:00', 20.0),
+                 ('c1', '2024-01-02 12:00', 30.0), ('c2', '2024-01-02 12:30', 40.0)])
+    store = _store(idle_seconds=86400)
+    first = _stream(df.iloc[:2], store)
+    assert store.evict_idle('2024-01-02 11:00') == 1
+    assert len(store) == 1
+    second = _stream(df.iloc[2:], store)
+
+    # c1 starts over; c2 keeps its history as if nothing was swept
+    assert np.isnan(second.loc[2, 'seconds_since_last_txn'])
+    assert np.isnan(second.loc[2, 'amount_vs_customer_mean'])
+    offline = compute_velocity_features(df)
+    pd.testing.assert_frame_equal(second.loc[[3]], offline.loc[[3]])
+    pd.testing.assert_frame_equal(first, offline.loc[[0, 1]])
+
+
+def test_bucket_must_divide_windows():
+    with pytest.raises(ValueError):
+        VelocityFeatureStore(bucket_seconds=7)